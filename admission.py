@@ -0,0 +1,160 @@
+"""
+ECHO AI - Admission Control
+Decides at the door whether a command is taken on at all, so a traffic spike
+gets fast 429/503 answers instead of slowing every user down until requests
+time out. Two checks, cheapest first:
+
+    rate    every client has a token bucket; an empty bucket is a 429 with
+            Retry-After set to when enough tokens will be back
+    load    commands in flight are counted per class; when the server is busy
+            'heavy' work (LLM answers, image generation) is shed with a 503
+            first, and 'local' commands keep a share of the slots to themselves
+
+Heavy commands also take more tokens from the bucket than local ones.
+
+Tuning: ECHO_RATE_LIMIT commands per second per client (default 2, 0 turns
+rate limiting off), ECHO_RATE_BURST bucket size (default 10), ECHO_HEAVY_COST
+tokens per heavy command (default 3), ECHO_MAX_INFLIGHT commands in flight
+(default 64), ECHO_MAX_HEAVY heavy commands in flight (default 12),
+ECHO_LOCAL_RESERVE in-flight slots heavy work never takes (default 16).
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+RATE_LIMIT = float(os.getenv("ECHO_RATE_LIMIT", "2"))
+RATE_BURST = float(os.getenv("ECHO_RATE_BURST", "10"))
+HEAVY_COST = float(os.getenv("ECHO_HEAVY_COST", "3"))
+MAX_INFLIGHT = int(os.getenv("ECHO_MAX_INFLIGHT", "64"))
+MAX_HEAVY = int(os.getenv("ECHO_MAX_HEAVY", "12"))
+LOCAL_RESERVE = int(os.getenv("ECHO_LOCAL_RESERVE", "16"))
+# Buckets kept for this many clients; the least recently seen one is dropped,
+# by then it has usually refilled anyway
+MAX_CLIENTS = 10000
+
+LOCAL, HEAVY = "local", "heavy"
+# Smoothing of the per-class time in flight, used for Retry-After on a 503
+SERVICE_SMOOTHING = 0.2
+
+class Rejected(Exception):
+    """Command refused at the door; status is 429 (rate) or 503 (load)"""
+
+    def __init__(self, status, action, message, retry_after):
+        self.status = status
+        self.action = action
+        self.retry_after = retry_after
+        super().__init__(message)
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+
+    def take(self, cost, rate, burst, now):
+        """0 if cost tokens were taken, otherwise seconds until they will be there"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+class Admission:
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, heavy_cost=HEAVY_COST, max_inflight=MAX_INFLIGHT,
+                 max_heavy=MAX_HEAVY, local_reserve=LOCAL_RESERVE, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.costs = {LOCAL: 1.0, HEAVY: min(heavy_cost, burst)}
+        self.max_inflight = max_inflight
+        self.max_heavy = max_heavy
+        self.local_reserve = min(local_reserve, max_inflight)
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()    # client -> TokenBucket, least recently seen first
+        self.inflight = {LOCAL: 0, HEAVY: 0}
+        self.service_s = {LOCAL: 0.05, HEAVY: 2.0}
+        self.counters = {kind: {"admitted": 0, "rate_limited": 0, "shed": 0} for kind in (LOCAL, HEAVY)}
+
+    def check_rate(self, client, kind=LOCAL, paid=None):
+        """
+        Take kind's tokens from client's bucket, raises Rejected (429) when it is
+        empty. paid is a kind already charged for the same request, only the
+        difference is taken (an audio command is charged before its transcript is known).
+        """
+        cost = self.costs[kind] - (self.costs[paid] if paid else 0)
+        if self.rate <= 0 or cost <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                bucket = self.buckets[client] = TokenBucket(self.burst, now)
+                if len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client)
+            wait = bucket.take(cost, self.rate, self.burst, now)
+            if wait:
+                self.counters[kind]["rate_limited"] += 1
+        if wait:
+            retry_after = max(1, math.ceil(wait))
+            raise Rejected(429, "rate_limited",
+                           f"You're sending commands too quickly. Please wait {retry_after} seconds.", retry_after)
+
+    @contextmanager
+    def enter(self, kind):
+        """Hold an in-flight slot for kind, raises Rejected (503) when that class is being shed"""
+        with self.lock:
+            total = self.inflight[LOCAL] + self.inflight[HEAVY]
+            if kind == HEAVY:
+                shed = self.inflight[HEAVY] >= self.max_heavy or total >= self.max_inflight - self.local_reserve
+            else:
+                shed = total >= self.max_inflight
+            if shed:
+                self.counters[kind]["shed"] += 1
+                retry_after = max(1, math.ceil(self.service_s[kind]))
+            else:
+                self.inflight[kind] += 1
+                self.counters[kind]["admitted"] += 1
+        if shed:
+            raise Rejected(503, "overloaded",
+                           f"I'm handling too many requests right now. Please try again in {retry_after} seconds.",
+                           retry_after)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self.lock:
+                self.inflight[kind] -= 1
+                self.service_s[kind] += SERVICE_SMOOTHING * (elapsed - self.service_s[kind])
+
+    @contextmanager
+    def admit(self, client, kind):
+        """Rate check for client, then an in-flight slot for kind"""
+        self.check_rate(client, kind)
+        with self.enter(kind):
+            yield
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "limits": {
+                    "rate_per_s": self.rate,
+                    "burst": self.burst,
+                    "heavy_cost": self.costs[HEAVY],
+                    "max_inflight": self.max_inflight,
+                    "max_heavy": self.max_heavy,
+                    "local_reserve": self.local_reserve,
+                },
+                "inflight": dict(self.inflight),
+                "service_ms": {kind: round(s * 1000, 1) for kind, s in self.service_s.items()},
+                "clients": len(self.buckets),
+                **{kind: dict(counters) for kind, counters in self.counters.items()},
+            }
@@ -1,6 +1,22 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, request, jsonify, render_template, send_from_directory, send_file, Response, g, abort
 import main 
 import os
+import json
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from tts import tts_worker, AUDIO_MIMETYPE, MAX_TEXT_CHARS, TTSBusy
+from audio_stream import iter_upload_pcm, UnsupportedAudio
+from recognizers import get_backend
+from events import broker, to_sse, to_message
+from resilience import breaker_status
+from bulkheads import bulkhead_status
+from admission import Admission, Rejected, LOCAL
+from warmup import Warmup
+from assets import AssetManifest, Variants, negotiate, compress, COMPRESS_MIN_BYTES, COMPRESSIBLE_TYPES
 
 # Check if pyttsx3 is available for a status check
 try:
@@ -9,26 +25,165 @@ try:
 except ImportError:
     TTS_AVAILABLE = False
 
+# WebSocket channel is optional, the UI falls back to Server-Sent Events and HTTP
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
 app = Flask(__name__, template_folder='templates')
+sock = Sock(app) if WEBSOCKET_AVAILABLE else None
+
+# Seconds between keep-alive messages on idle event streams
+EVENT_KEEPALIVE = 15
+
+# Each browser gets its own conversation history through this cookie, API
+# clients can send 'Authorization: Bearer <token>' instead
+SESSION_COOKIE = 'echo_session'
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+
+# Static files are hashed and compressed once; the page itself is rendered once
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+asset_manifest = AssetManifest()
+index_page = None
 
 # Create a directory for captured images if it doesn't exist
 CAPTURE_FOLDER = 'captures'
 if not os.path.exists(CAPTURE_FOLDER):
     os.makedirs(CAPTURE_FOLDER)
 
+# Speech recognition for uploaded audio runs on its own small pool so decoding
+# overlaps the upload instead of waiting for the whole file
+STT_WORKERS = int(os.getenv('ECHO_STT_WORKERS', '2'))
+stt_pool = ThreadPoolExecutor(max_workers=STT_WORKERS, thread_name_prefix='stt')
+
+# Per-client rate limits and load shedding in front of every command channel
+admission = Admission()
+
+# Saved reminders keep firing while the server runs, delivered as 'reminder' events
+main.start_reminders()
+
+def warm_tts():
+    """Start the engine and pre-render the fixed handler responses so they play back instantly"""
+    if not tts_worker:
+        raise RuntimeError("pyttsx3 not installed")
+    for future in tts_worker.prewarm(main.FIXED_RESPONSES):
+        future.result()
+
+def warm_stt():
+    get_backend()
+
+# Cold paths are primed in parallel; /ready stays 503 until none is still warming
+warmup = Warmup({**main.warmup_tasks(), 'tts': warm_tts, 'stt': warm_stt})
+warmup.start()
+
+def current_session():
+    """Session id for this request: API token, session cookie, or a new id for first-time browsers"""
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer ') and auth[7:].strip():
+        return auth[7:].strip()
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if not session_id or len(session_id) > 64:
+        session_id = g.get('new_session') or secrets.token_urlsafe(18)
+        g.new_session = session_id
+    return session_id
+
+def client_address():
+    """Rate limit key, the peer address (put ProxyFix in front when behind a reverse proxy)"""
+    return request.remote_addr or 'unknown'
+
+def rejected_response(e):
+    """429/503 with Retry-After; the body still has 'text' so the UI can show it"""
+    response = jsonify({'text': str(e), 'error': str(e), 'action': e.action, 'retry_after': e.retry_after})
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+@app.after_request
+def set_session_cookie(response):
+    if g.get('new_session'):
+        response.set_cookie(SESSION_COOKIE, g.new_session, max_age=SESSION_COOKIE_MAX_AGE,
+                            httponly=True, samesite='Lax')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli for HTML, JSON, CSS and JS bodies big enough to benefit"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    data = response.get_data()
+    if encoding and len(data) >= COMPRESS_MIN_BYTES:
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+def send_variants(variants, cache_control):
+    """A pre-compressed body in the client's encoding, 304 when its ETag still matches"""
+    encoding, body, etag = variants.pick(request.headers.get('Accept-Encoding'))
+    response = Response(body, content_type=variants.mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
     """Serves the main HTML page."""
-    return render_template('index.html')
+    global index_page
+    current_session()
+    # Nothing on the page varies per request; re-render only while debugging templates
+    if index_page is None or app.debug:
+        html = render_template('index.html', asset_url=asset_manifest.url)
+        index_page = Variants(html.encode('utf-8'), 'text/html; charset=utf-8')
+    # Revalidated on every visit, a 304 when nothing changed
+    return send_variants(index_page, 'no-cache')
+
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    """Content-hashed static files, cacheable forever since a change gets a new name."""
+    variants = asset_manifest.get(filename)
+    if variants is None:
+        abort(404)
+    return send_variants(variants, ASSET_CACHE_CONTROL)
 
 @app.route('/status')
 def status():
     """A status endpoint for the UI to check the connection."""
     return jsonify({
         'status': 'online',
-        'tts_available': TTS_AVAILABLE
+        'tts_available': TTS_AVAILABLE,
+        'websocket': WEBSOCKET_AVAILABLE,
+        'ready': warmup.ready(),
+        'components': warmup.status(),
+        'upstreams': breaker_status(),
+        'bulkheads': bulkhead_status(),
+        'sessions': main.conversations.stats(),
+        'admission': admission.snapshot()
     })
 
+@app.route('/ready')
+def ready():
+    """Readiness probe for the load balancer: 200 once no component is still warming."""
+    is_ready = warmup.ready()
+    response = jsonify({'ready': is_ready, 'components': warmup.status()})
+    response.status_code = 200 if is_ready else 503
+    if not is_ready:
+        response.headers['Retry-After'] = '1'
+    return response
+
+def add_audio_url(response_data):
+    """Point the UI at pre-rendered audio when this exact phrase is already cached"""
+    if tts_worker and response_data.get('text') and tts_worker.cached(response_data['text']):
+        response_data['audio_url'] = f"/tts?text={quote(response_data['text'])}"
+    return response_data
+
 @app.route('/command', methods=['POST'])
 def handle_command():
     """Receives commands from the UI and executes them."""
@@ -39,11 +194,209 @@ def handle_command():
         return jsonify({'text': "Please provide a command."})
 
     # Call the core logic function from main.py
-    response_data = main.execute_command(command)
+    try:
+        with admission.admit(client_address(), main.command_cost(command)):
+            response_data = add_audio_url(main.execute_command(command, current_session()))
+    except Rejected as e:
+        return rejected_response(e)
     
     # Return the dictionary response as JSON to the UI
     return jsonify(response_data)
 
+def recognize_blocks(blocks):
+    """Pool task: feed PCM blocks from the queue into a streaming session until the None sentinel"""
+    session = get_backend().stream()
+    text = None
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                break
+            session.feed(block)
+    finally:
+        # Also on a failed feed, an unfinished session holds the recognizer
+        text = session.finish()
+    return text
+
+def queue_block(blocks, block, recognition):
+    """Hand a block to the recognition task, giving up if that task has already failed"""
+    while not recognition.done():
+        try:
+            blocks.put(block, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+@app.route('/command/audio', methods=['POST'])
+def handle_audio_command():
+    """Receives recorded speech, transcribes it while it uploads and executes the command."""
+    start = time.perf_counter()
+    # Rate limited before the upload is read; the transcript is checked against load below
+    try:
+        admission.check_rate(client_address(), LOCAL)
+    except Rejected as e:
+        return rejected_response(e)
+    blocks = queue.Queue(maxsize=64)
+    recognition = stt_pool.submit(recognize_blocks, blocks)
+
+    try:
+        for block in iter_upload_pcm(request.stream, request.content_type):
+            queue_block(blocks, block, recognition)
+        error = None
+    except UnsupportedAudio as e:
+        error = (jsonify({'error': str(e)}), 415)
+    except Exception as e:
+        error = (jsonify({'error': f'Upload error: {str(e)}'}), 400)
+    finally:
+        # Always end the session, offline decoders hold a lock until finish()
+        queue_block(blocks, None, recognition)
+    uploaded = time.perf_counter()
+
+    try:
+        transcript = recognition.result().strip()
+    except Exception as e:
+        return error or (jsonify({'error': f'Speech recognition error: {str(e)}'}), 503)
+    if error:
+        return error
+    recognized = time.perf_counter()
+
+    if not transcript:
+        response_data = {'text': "Sorry, I didn't catch that."}
+    else:
+        cost = main.command_cost(transcript)
+        try:
+            # Charged as LOCAL before the upload, a heavy transcript pays the rest now
+            admission.check_rate(client_address(), cost, paid=LOCAL)
+            with admission.enter(cost):
+                response_data = main.execute_command(transcript, current_session())
+        except Rejected as e:
+            return rejected_response(e)
+    executed = time.perf_counter()
+    add_audio_url(response_data)
+
+    timings = {
+        'upload_ms': round((uploaded - start) * 1000, 1),
+        'recognition_ms': round((recognized - uploaded) * 1000, 1),
+        'execute_ms': round((executed - recognized) * 1000, 1),
+        'total_ms': round((executed - start) * 1000, 1),
+    }
+    print(f"Audio command '{transcript}': " + ", ".join(f"{k} {v}" for k, v in timings.items()))
+    response_data['transcript'] = transcript
+    response_data['timings'] = timings
+
+    response = jsonify(response_data)
+    response.headers['Server-Timing'] = ", ".join(
+        f"{name};dur={timings[name + '_ms']}" for name in ('upload', 'recognition', 'execute', 'total')
+    )
+    return response
+
+@app.route('/events')
+def event_stream():
+    """Server-Sent Events stream of job completions, for clients without a WebSocket."""
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    subscriber = broker.subscribe(int(last_id) if last_id and last_id.isdigit() else None, current_session())
+
+    def generate():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    yield to_sse(subscriber.get(timeout=EVENT_KEEPALIVE))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+if WEBSOCKET_AVAILABLE:
+    @sock.route('/ws')
+    def websocket(ws):
+        """Persistent channel: commands in, responses and pushed events out."""
+        last_id = request.args.get('last_id')
+        session_id = current_session()
+        client = client_address()
+        subscriber = broker.subscribe(int(last_id) if last_id and last_id.isdigit() else None, session_id)
+        send_lock = threading.Lock()
+        closed = threading.Event()
+
+        def send(message):
+            with send_lock:
+                ws.send(message)
+
+        def forward_events():
+            while not closed.is_set():
+                try:
+                    event = subscriber.get(timeout=EVENT_KEEPALIVE)
+                except queue.Empty:
+                    continue
+                try:
+                    send(to_message(event))
+                except ConnectionClosed:
+                    break
+
+        forwarder = threading.Thread(target=forward_events, name='ws-events', daemon=True)
+        forwarder.start()
+        try:
+            while True:
+                try:
+                    message = json.loads(ws.receive())
+                except ValueError:
+                    message = None
+                # Valid JSON can still be a list, string or number, none of which is a message
+                if not isinstance(message, dict):
+                    send(json.dumps({'type': 'error', 'text': 'Invalid message.'}))
+                    continue
+                if message.get('type') == 'ping':
+                    send(json.dumps({'type': 'pong'}))
+                    continue
+                command = message.get('command')
+                command = command.strip() if isinstance(command, str) else ''
+                if not command:
+                    response_data = {'text': "Please provide a command."}
+                else:
+                    try:
+                        with admission.admit(client, main.command_cost(command)):
+                            response_data = add_audio_url(main.execute_command(command, session_id))
+                    except Rejected as e:
+                        response_data = {'text': str(e), 'action': e.action, 'retry_after': e.retry_after}
+                send(json.dumps({'type': 'response', 'id': message.get('id'), 'data': response_data}))
+        except ConnectionClosed:
+            pass
+        finally:
+            closed.set()
+            broker.unsubscribe(subscriber)
+
+@app.route('/tts', methods=['GET', 'POST'])
+def text_to_speech():
+    """Render text to audio on the server-side TTS worker, served from the phrase cache when possible."""
+    if not tts_worker:
+        return jsonify({'error': 'Text-to-speech not available on the server.'}), 503
+
+    data = request.get_json(silent=True) or {}
+    text = (data.get('text') or request.args.get('text', '')).strip()
+    voice = data.get('voice') or request.args.get('voice')
+    if not text:
+        return jsonify({'error': 'Please provide text to speak.'}), 400
+    if len(text) > MAX_TEXT_CHARS:
+        return jsonify({'error': f'Text is too long to speak (at most {MAX_TEXT_CHARS} characters).'}), 413
+
+    try:
+        # Refused rather than queued when the worker is backed up
+        path = tts_worker.render(text, voice, block=False)
+    except TTSBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    except Exception as e:
+        return jsonify({'error': f'TTS error: {str(e)}'}), 500
+
+    response = send_file(os.path.abspath(path), mimetype=AUDIO_MIMETYPE, conditional=True)
+    # Same text and voice always render to the same audio
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
 @app.route('/captures/<filename>')
 def serve_capture(filename):
     """Serve captured images and screenshots."""
@@ -0,0 +1,151 @@
+"""
+ECHO AI - Conversation Archive
+Turns older than ECHO_ARCHIVE_DAYS (default 30) are moved out of the hot
+history file into one gzip-compressed JSON Lines segment per day, in a
+'<history file>.archive' directory next to it. A small index.json lists each
+day's segment with its turn count and time range, so reading one day only
+decompresses that day's segment.
+
+Segments are only ever appended to (gzip allows concatenated members). The
+index is the commit record: it holds each segment's committed size, and
+bytes past it were appended by a roll that crashed before writing the index.
+They are ignored when reading and cut off before the next append, and those
+turns, still in the hot file, are archived again exactly once.
+
+Rolling only moves the boundary between archive and hot file, so archived
+days followed by the hot history are one append-only sequence of turns
+(ConversationLog), which is what the recall index is built over.
+"""
+
+import bisect
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import persistence
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ECHO_ARCHIVE_DAYS", "30"))
+INDEX_FILE = "index.json"
+# Decompressed days a ConversationLog keeps for random access
+CACHED_DAYS = 4
+
+def archive_dir(path):
+    return os.path.splitext(path)[0] + ".archive"
+
+def load_index(path):
+    """{'YYYY-MM-DD': {'file', 'turns', 'first', 'last'}} for the history file at path"""
+    return persistence.read_json(os.path.join(archive_dir(path), INDEX_FILE), {})
+
+def remove(path):
+    """Delete the archive of the history file at path, segments and index"""
+    shutil.rmtree(archive_dir(path), ignore_errors=True)
+
+def roll(history, path, now=None, after_days=ARCHIVE_AFTER_DAYS):
+    """Archive turns older than after_days, returns the turns to keep in the hot file"""
+    now = now or datetime.datetime.now()
+    cutoff = (now - datetime.timedelta(days=after_days)).isoformat()
+    # History is in time order, the common case (nothing old enough) is one comparison
+    split = 0
+    while split < len(history) and history[split].get("timestamp", cutoff) < cutoff:
+        split += 1
+    if split == 0:
+        return history
+
+    directory = archive_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    index = load_index(path)
+    by_day = {}
+    for turn in history[:split]:
+        by_day.setdefault(turn["timestamp"][:10], []).append(turn)
+    for day, turns in by_day.items():
+        entry = index.setdefault(day, {"file": f"{day}.jsonl.gz", "turns": 0, "first": turns[0]["timestamp"], "last": "",
+                                       "bytes": 0})
+        turns = [t for t in turns if t["timestamp"] > entry["last"]]
+        if not turns:
+            continue
+        segment = os.path.join(directory, entry["file"])
+        committed = entry.get("bytes")     # None: indexed before sizes were recorded
+        if committed is not None and os.path.exists(segment) and os.path.getsize(segment) > committed:
+            with open(segment, "r+b") as f:
+                f.truncate(committed)
+        with gzip.open(segment, "at", encoding="utf-8") as f:
+            for turn in turns:
+                f.write(json.dumps(turn) + "\n")
+        entry["bytes"] = os.path.getsize(segment)
+        entry["turns"] += len(turns)
+        entry["first"] = min(entry["first"], turns[0]["timestamp"])
+        entry["last"] = turns[-1]["timestamp"]
+    persistence.write_json(os.path.join(directory, INDEX_FILE), index)
+    return history[split:]
+
+def read_day(path, day):
+    """Archived turns from day (a date), decompressing only that day's segment"""
+    entry = load_index(path).get(day.isoformat())
+    if not entry:
+        return []
+    with open(os.path.join(archive_dir(path), entry["file"]), "rb") as f:
+        data = f.read(entry["bytes"]) if "bytes" in entry else f.read()
+    with gzip.open(io.BytesIO(data), "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class ConversationLog:
+    """
+    Archived turns of the history file at path followed by history (the hot
+    list, referenced, so turns appended to it show up here). Indexing an
+    archived turn decompresses only its day; slicing walks days in order.
+    """
+
+    def __init__(self, path, history):
+        self.path = path
+        self.history = history
+        index = load_index(path)
+        self.days = sorted(index)
+        self.ends = []          # cumulative turn count at the end of each day
+        total = 0
+        for day in self.days:
+            total += index[day]["turns"]
+            self.ends.append(total)
+        self.archived = total
+        self.cache = OrderedDict()
+
+    def __len__(self):
+        return self.archived + len(self.history)
+
+    def _day(self, position):
+        day = self.days[position]
+        turns = self.cache.get(day)
+        if turns is None:
+            turns = self.cache[day] = read_day(self.path, datetime.date.fromisoformat(day))
+            if len(self.cache) > CACHED_DAYS:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(day)
+        return turns
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, _ = item.indices(len(self))
+            return list(self._iter(start, stop))
+        if item < 0:
+            item += len(self)
+        if item >= self.archived:
+            return self.history[item - self.archived]
+        position = bisect.bisect_right(self.ends, item)
+        first = self.ends[position - 1] if position else 0
+        return self._day(position)[item - first]
+
+    def _iter(self, start, stop):
+        position = bisect.bisect_right(self.ends, start)
+        while start < min(stop, self.archived):
+            first = self.ends[position - 1] if position else 0
+            turns = read_day(self.path, datetime.date.fromisoformat(self.days[position]))
+            end = min(stop, self.ends[position])
+            yield from turns[start - first:end - first]
+            start = end
+            position += 1
+        if stop > self.archived:
+            yield from self.history[max(0, start - self.archived):stop - self.archived]
@@ -0,0 +1,107 @@
+"""
+ECHO AI - Static Assets and Compression
+The UI's stylesheet and script live in static/ and are served under
+content-hashed names (echo.css -> /assets/echo.3f9c2a1b7d40.css), so browsers
+can cache them for a year and a changed file simply gets a new URL. Each
+asset is read, hashed and compressed once at startup; a request only picks
+the variant matching its Accept-Encoding.
+
+Dynamic responses (HTML, JSON, CSS, JS) above COMPRESS_MIN_BYTES are
+compressed on the way out. Brotli is used when the brotli package is
+installed and the client accepts it, gzip otherwise.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSET_PREFIX = "/assets/"
+HASH_LENGTH = 12
+# Smaller bodies do not shrink enough to pay for the extra header and CPU
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = {"text/html", "text/css", "text/plain", "application/json", "application/javascript", "text/javascript"}
+
+def negotiate(accept_encoding):
+    """Best encoding the client accepts: 'br', 'gzip' or None"""
+    accepted = set()
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip())
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def compress(data, encoding, static=False):
+    """data compressed with encoding; static assets get the slowest, smallest settings"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 5)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+    return data
+
+class Variants:
+    """One body with its compressed forms, built once"""
+
+    def __init__(self, data, mimetype, static=True):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        self.bodies = {None: data}
+        for encoding in ("gzip", "br") if BROTLI_AVAILABLE else ("gzip",):
+            compressed = compress(data, encoding, static)
+            if len(compressed) < len(data):
+                self.bodies[encoding] = compressed
+
+    def pick(self, accept_encoding):
+        """(encoding or None, body, etag) for a request's Accept-Encoding"""
+        encoding = negotiate(accept_encoding)
+        if encoding not in self.bodies:
+            encoding = None
+        # Each encoding is a different representation and needs its own ETag
+        etag = f"{self.etag}-{encoding}" if encoding else self.etag
+        return encoding, self.bodies[encoding], etag
+
+class AssetManifest:
+    """Logical name (echo.css) -> hashed URL and pre-compressed variants"""
+
+    def __init__(self, directory=STATIC_DIR):
+        self.urls = {}
+        self.files = {}
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if mimetype.startswith("text/") or mimetype == "application/javascript":
+                mimetype += "; charset=utf-8"
+            variants = Variants(data, mimetype)
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{variants.etag}{ext}"
+            self.urls[name] = ASSET_PREFIX + hashed
+            self.files[hashed] = variants
+
+    def url(self, name):
+        """Hashed URL of a static file, for templates"""
+        return self.urls[name]
+
+    def get(self, hashed_name):
+        return self.files.get(hashed_name)
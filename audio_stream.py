@@ -0,0 +1,130 @@
+"""
+ECHO AI - Incremental Audio Upload Decoding
+Turns an uploaded audio stream into 16 kHz mono 16-bit PCM blocks as the bytes
+arrive, so a recording never has to be held in memory before recognition
+starts. WAV is parsed directly; Opus (Ogg or WebM, as browsers record it) and
+WAV in other formats are piped through ffmpeg when it is installed.
+"""
+
+import shutil
+import struct
+import subprocess
+import threading
+
+from recognizers import SAMPLE_RATE, SAMPLE_WIDTH
+
+READ_SIZE = 16384
+FFMPEG = shutil.which("ffmpeg")
+
+class UnsupportedAudio(Exception):
+    """Upload format that cannot be decoded on this server"""
+
+def _read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            break
+        data += block
+    return data
+
+def read_wav_header(stream, head=b""):
+    """
+    Read RIFF chunks up to the start of the data chunk. Returns
+    ((format, channels, rate, bits), data_size, header_bytes) where header_bytes
+    is everything consumed, so the upload can still be handed to ffmpeg.
+    """
+    consumed = head + _read_exact(stream, 12 - len(head))
+    if len(consumed) < 12 or consumed[:4] != b"RIFF" or consumed[8:12] != b"WAVE":
+        raise UnsupportedAudio("Not a WAV file.")
+
+    fmt = None
+    while True:
+        chunk_header = _read_exact(stream, 8)
+        consumed += chunk_header
+        if len(chunk_header) < 8:
+            raise UnsupportedAudio("WAV file has no data chunk.")
+        chunk_id, size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+        if chunk_id == b"data":
+            return fmt, size, consumed
+        body = _read_exact(stream, size + size % 2)
+        consumed += body
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            fmt = (audio_format, channels, rate, bits)
+
+def iter_wav_pcm(stream, size):
+    """
+    Yield PCM from the data chunk of a WAV stream without seeking. Streaming
+    writers put 0 or 0xFFFFFFFF in the data size, in that case read until EOF.
+    """
+    remaining = None if size in (0, 0xFFFFFFFF) else size
+    carry = b""
+    while remaining is None or remaining > 0:
+        block = stream.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+        if not block:
+            break
+        if remaining is not None:
+            remaining -= len(block)
+        block = carry + block
+        # Keep whole samples only
+        cut = len(block) - len(block) % SAMPLE_WIDTH
+        carry = block[cut:]
+        if cut:
+            yield block[:cut]
+
+def iter_ffmpeg_pcm(stream, head=b""):
+    """Yield PCM decoded by ffmpeg while the upload is still being copied into it"""
+    if not FFMPEG:
+        raise UnsupportedAudio("This audio format needs ffmpeg on the server.")
+    process = subprocess.Popen(
+        [FFMPEG, "-loglevel", "error", "-i", "pipe:0", "-f", "s16le",
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+
+    def pump():
+        try:
+            if head:
+                process.stdin.write(head)
+            while True:
+                block = stream.read(READ_SIZE)
+                if not block:
+                    break
+                process.stdin.write(block)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=pump, name="ffmpeg-feed", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            block = process.stdout.read(READ_SIZE)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        feeder.join(timeout=5)
+        if process.wait(timeout=5) != 0:
+            raise UnsupportedAudio("ffmpeg could not decode the upload.")
+
+def iter_upload_pcm(stream, content_type=""):
+    """Pick a decoder from the stream header, yields 16 kHz mono 16-bit PCM blocks"""
+    head = _read_exact(stream, 12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        fmt, size, consumed = read_wav_header(stream, head)
+        if fmt == (1, 1, SAMPLE_RATE, SAMPLE_WIDTH * 8):
+            yield from iter_wav_pcm(stream, size)
+            return
+        # Other sample rates, stereo or float WAV: let ffmpeg convert it
+        yield from iter_ffmpeg_pcm(stream, consumed)
+        return
+    if "wav" in (content_type or "").lower():
+        raise UnsupportedAudio("Upload is not a valid WAV file.")
+    yield from iter_ffmpeg_pcm(stream, head)
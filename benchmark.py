@@ -0,0 +1,1127 @@
+#!/usr/bin/env python3
+"""
+ECHO AI - Offline Benchmark Suite
+Measures the command pipeline without touching the network, the browser,
+the microphone or the real data files, and saves the results as JSON so
+runs can be compared over time.
+
+Usage:
+    python benchmark.py                      # run every suite
+    python benchmark.py --suite routing      # run selected suites
+    python benchmark.py --quick              # smaller sizes, fewer repeats
+    python benchmark.py --compare bench_results/bench_20250101_120000.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, "bench_results")
+# Recorded 16-bit mono WAV utterances for the speech recognition suite
+STT_FIXTURES_DIR = os.getenv("ECHO_STT_FIXTURES", os.path.join(BASE_DIR, "bench_fixtures", "stt"))
+
+SUITES = {}
+
+def suite(name):
+    """Register a benchmark suite under the given name"""
+    def register(func):
+        SUITES[name] = func
+        return func
+    return register
+
+# ==================== TIMING HELPERS ====================
+
+def measure(func, repeat=5, number=1):
+    """Run func `number` times per sample, `repeat` samples, return per-call stats in ms"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "repeat": repeat,
+        "number": number,
+    }
+
+# ==================== NETWORK STUBS ====================
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+    def __init__(self, status_code=200, payload=None, content=b""):
+        self.status_code = status_code
+        self._payload = payload
+        self.content = content
+        self.text = json.dumps(payload) if payload is not None else ""
+
+    def json(self):
+        return self._payload
+
+def fake_get(url, *args, **kwargs):
+    """Canned responses for every outbound integration used by main.py"""
+    if "pollinations" in url:
+        return FakeResponse(content=b"\x89PNG\r\n\x1a\n" + b"\0" * 2048)
+    if "exchangerate" in url:
+        return FakeResponse(payload={"base": "USD", "rates": {"USD": 1.0, "INR": 83.2, "EUR": 0.92, "GBP": 0.79, "JPY": 149.5}})
+    if "dictionaryapi" in url:
+        return FakeResponse(payload=[{"word": "echo", "meanings": [{"partOfSpeech": "noun", "definitions": [{"definition": "A sound or sounds caused by the reflection of sound waves."}]}]}])
+    if "openweathermap" in url:
+        return FakeResponse(payload={"cod": 200, "main": {"temp": 31.4, "pressure": 1008, "humidity": 52}, "wind": {"speed": 3.1}, "weather": [{"description": "haze"}]})
+    return FakeResponse(status_code=404, payload={})
+
+def install_groq_stub():
+    """Replace the groq package with an in-process fake chat completion client"""
+    reply = (
+        "**Sure!** Here is a quick answer.\n\n"
+        "- The first point is `simple`.\n"
+        "- The second point is *also* simple.\n\n\n\n"
+        "1. Done | finished ---"
+    )
+
+    class _Completions:
+        def create(self, **kwargs):
+            message = types.SimpleNamespace(content=reply)
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    class Groq:
+        def __init__(self, *args, **kwargs):
+            self.chat = types.SimpleNamespace(completions=_Completions())
+
+    sys.modules["groq"] = types.SimpleNamespace(Groq=Groq)
+    os.environ.setdefault("GROQ_API_KEY", "benchmark-key")
+    # Every benchmark request comes from one address, measure the handlers and not the rate limiter
+    os.environ.setdefault("ECHO_RATE_LIMIT", "0")
+
+def prepare_environment(workdir):
+    """Import main.py with every side effect stubbed and data files redirected to workdir"""
+    install_groq_stub()
+    os.chdir(workdir)
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+
+    import main
+    import webbrowser
+    import subprocess
+
+    main.http_client.session.get = fake_get
+    webbrowser.open = lambda *args, **kwargs: True
+    main.webbrowser.open = webbrowser.open
+    main.subprocess.run = lambda *args, **kwargs: subprocess.CompletedProcess(args, 0)
+    main.SCREENSHOT_AVAILABLE = False
+    main.CAMERA_AVAILABLE = False
+    main.CONVERSATION_FILE = os.path.join(workdir, "conversation_history.json")
+    main.NOTES_FILE = os.path.join(workdir, "echo_notes.json")
+    if main.PSUTIL_AVAILABLE:
+        main.psutil.cpu_percent = lambda interval=None: 12.5
+    return main
+
+def load_contacts_module(workdir):
+    """Contacts only exist in the test.py fork, load it as a separate module"""
+    path = os.path.join(BASE_DIR, "test.py")
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location("echo_contacts_fork", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.CONTACTS_FILE = os.path.join(workdir, "echo_contacts.json")
+    return module
+
+# ==================== COMMAND SAMPLES ====================
+
+ROUTING_COMMANDS = [
+    "what time is it", "what's the date today", "tell me a joke", "weather",
+    "battery status", "calculate 12*(3+4)/7", "what is 10*5", "convert 100 usd to inr",
+    "convert 10 km to miles", "convert 30 celsius to fahrenheit", "define serendipity",
+    "note buy milk tomorrow", "list notes", "open youtube", "search python decorators",
+    "play believer", "give me a quote", "help", "system info",
+    "generate image of a sunset over mountains",
+    "why is the sky blue", "explain quantum computing simply", "who wrote hamlet",
+]
+
+# Phrasings that miss every keyword, the intent classifier should still place them
+PARAPHRASE_COMMANDS = [
+    "how's it looking outside", "what's my charge at", "is it gonna rain today",
+    "what can you do", "how is my computer doing", "make me laugh", "do i have any reminders",
+]
+
+# Help-text examples and the start of the answer each must get; the classifier must not
+# talk a keyword out of them ('set timer for 5 minutes' is not a request for the time)
+HELP_EXAMPLES = {
+    "time": "The time is", "date": "Today's date is", "weather": "Weather in",
+    "calculate 2+2": "The result is", "what is 10*5": "The result is",
+    "set timer for 5 minutes": "Timer set for", "start a 3 minute timer": "Timer set for",
+    "timer for 2 minutes": "Timer set for", "remind me to stretch in 10 minutes": "Okay, reminder",
+    "remind me to stretch at 5 pm": "Okay, reminder", "list timers": "Your timers",
+    "cancel timer": "Cancelled timer", "cancel all reminders": "Cancelled",
+    "convert 100 usd to inr": "100.0 USD", "tell me a joke": "",
+}
+
+# Reminders and how the reply must end: the task keeps its own words, and an explicit
+# clock time beats a duration that is part of the task
+REMINDER_REPLIES = {
+    "remind me to buy a day pass at 5 pm": "05:00 PM: buy a day pass.",
+    "remind me to take a 5 minute break at 3 pm": "03:00 PM: take a 5 minute break.",
+    "remind me to buy a day pass in 10 minutes": ": buy a day pass.",
+    "remind me in an hour and 30 minutes to stretch": ": stretch.",
+}
+
+# Commands safe to execute end to end with the stubs above
+EXECUTE_COMMANDS = [
+    "what time is it", "what's the date today", "tell me a joke", "weather",
+    "calculate 12*(3+4)/7", "convert 100 usd to inr", "convert 10 km to miles",
+    "define echo", "open youtube", "give me a quote", "help",
+    "why is the sky blue",
+]
+
+def make_markdown_response(size):
+    """Build an LLM-style markdown answer of roughly `size` characters"""
+    block = (
+        "## Overview\n"
+        "**ECHO** is a *voice* assistant that runs `python main.py` locally.\n"
+        "- It answers questions | fast\n"
+        "* It opens websites\n"
+        "1. Step one costs $5 and takes 10km\n"
+        "2. Step two --- done\n\n\n\n"
+    )
+    return (block * (size // len(block) + 1))[:size]
+
+def make_conversation(count):
+    now = datetime.datetime.now().isoformat()
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message number {i} about topic {i % 97} with some extra words to pad it out.",
+            "timestamp": now,
+        }
+        for i in range(count)
+    ]
+
+def legacy_clean_response_for_voice(text):
+    """The original multi-pass clean_response_for_voice, kept as a baseline"""
+    import re
+    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = re.sub(r'`(.+?)`', r'\1', text)
+    text = re.sub(r'#+\s+', '', text)
+    text = re.sub(r'^\s*[-*•]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = text.replace('|', '')
+    text = text.replace('---', '')
+    return text.strip()
+
+# ==================== SUITES ====================
+
+@suite("routing")
+def bench_routing(main, workdir, quick):
+    results = {}
+    results["is_system_command"] = measure(
+        lambda: [main.is_system_command(c) for c in ROUTING_COMMANDS],
+        repeat=5 if quick else 20, number=50,
+    )
+    results["is_system_command"]["commands_per_call"] = len(ROUTING_COMMANDS)
+    results["intent_predict"] = measure(
+        lambda: [main.intent_classifier.predict(c) for c in ROUTING_COMMANDS],
+        repeat=5 if quick else 20, number=50,
+    )
+    results["intent_predict"]["commands_per_call"] = len(ROUTING_COMMANDS)
+    # Phrasings no keyword matches, answered locally instead of by the LLM
+    results["paraphrases_kept_local"] = {
+        command: main.intent_classifier.predict(command).name for command in PARAPHRASE_COMMANDS
+    }
+    misrouted = {}
+    for command, expected in HELP_EXAMPLES.items():
+        text = main.execute_command(command, session_id="help-examples")["text"]
+        if not text.startswith(expected):
+            misrouted[command] = text
+    if misrouted:
+        raise AssertionError(f"help examples answered by the wrong handler: {misrouted}")
+    for command in EXECUTE_COMMANDS:
+        results[f"execute_command[{command}]"] = measure(
+            lambda: main.execute_command(command), repeat=3 if quick else 10, number=5,
+        )
+    return results
+
+@suite("bulkheads")
+def bench_bulkheads(main, workdir, quick):
+    import bulkheads
+
+    stall = 1.0 if quick else 3.0
+    real_weather = main.get_weather
+    real_network = bulkheads.BULKHEADS["network"]
+    release = threading.Event()
+
+    # Same signature as main.get_weather, which the weather intent calls with the command
+    def stalled_weather(command=None):
+        release.wait(stall)
+        return {"text": "late weather"}
+
+    # Small network bulkhead so the stall saturates it
+    main.get_weather = stalled_weather
+    bulkheads.BULKHEADS["network"] = bulkheads.Bulkhead("network", "online", 4, stall / 2)
+    results = {}
+    try:
+        stuck = [threading.Thread(target=main.execute_command, args=("weather",)) for _ in range(4)]
+        stuck_start = time.perf_counter()
+        for thread in stuck:
+            thread.start()
+        time.sleep(0.05)
+        # Local commands keep answering while every network slot is stuck
+        results["time_while_network_stalled"] = measure(lambda: main.execute_command("time"), repeat=10, number=5)
+        results["date_while_network_stalled"] = measure(lambda: main.execute_command("date"), repeat=10, number=5)
+        start = time.perf_counter()
+        rejected = main.execute_command("weather")
+        results["rejected_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        results["rejected_action"] = rejected.get("action")
+        # Anything else means the stub was never reached and nothing above was measured
+        if rejected.get("action") != "busy":
+            raise AssertionError(f"weather was not rejected by the full network bulkhead: {rejected}")
+        for thread in stuck:
+            thread.join()
+        # The stuck requests get a timeout answer instead of waiting out the stall
+        results["stalled_answer_ms"] = round((time.perf_counter() - stuck_start) * 1000, 1)
+        results["stall_ms"] = round(stall * 1000)
+        results["network"] = bulkheads.BULKHEADS["network"].snapshot()
+    finally:
+        release.set()
+        main.get_weather = real_weather
+        bulkheads.BULKHEADS["network"] = real_network
+    return results
+
+@suite("weather")
+def bench_weather(main, workdir, quick):
+    import resilience
+
+    results = {}
+    index = main.geo.cities
+    results["lookup_exact"] = measure(lambda: index.lookup("Mumbai"), repeat=5, number=200)
+    results["lookup_fuzzy"] = measure(lambda: index.lookup("banglore"), repeat=5, number=50)
+    results["resolve[3 cities]"] = measure(lambda: index.resolve("weather in delhi, mumbai and pune"), repeat=5, number=200)
+    # Time and vague places are not city names: these get the home city's weather
+    named = {}
+    for command in ("what's the weather at the moment", "weather for the next 3 days", "weather in my area"):
+        found = index.resolve(command)
+        if found != ([], []):
+            named[command] = found
+    if named:
+        raise AssertionError(f"filler read as a city: {named}")
+
+    # Upstream with a fixed round trip, counting calls
+    latency = 0.05
+    calls = []
+    real_get = main.http_client.session.get
+
+    def slow_get(url, *args, **kwargs):
+        calls.append(url)
+        time.sleep(latency)
+        return fake_get(url, *args, **kwargs)
+
+    command = "weather in Delhi, Mumbai, Pune, Chennai and Kolkata"
+    cities, _ = index.resolve(command)
+
+    def forget():
+        with resilience._cache_lock:
+            for city in cities:
+                resilience._cache.pop(main.weather_cache_key(city), None)
+
+    main.http_client.session.get = slow_get
+    try:
+        def sequential():
+            forget()
+            for city in cities:
+                main.city_weather(city)
+
+        def concurrent():
+            forget()
+            main.get_weather(command)
+
+        results["cities"] = len(cities)
+        results["upstream_latency_ms"] = latency * 1000
+        results["cold_sequential"] = measure(sequential, repeat=3)
+        results["cold_concurrent"] = measure(concurrent, repeat=3)
+        del calls[:]
+        results["warm_cached"] = measure(lambda: main.get_weather(command), repeat=5, number=10)
+        results["warm_upstream_calls"] = len(calls)
+    finally:
+        main.http_client.session.get = real_get
+    return results
+
+@suite("voice_clean")
+def bench_voice_clean(main, workdir, quick):
+    results = {}
+    sizes = [1_000, 10_000, 100_000] if quick else [1_000, 10_000, 100_000, 1_000_000]
+    for size in sizes:
+        text = make_markdown_response(size)
+        results[f"clean_response_for_voice[{size}]"] = measure(
+            lambda: main.clean_response_for_voice(text), repeat=3 if quick else 7,
+        )
+    return results
+
+@suite("voice_normalizer")
+def bench_voice_normalizer(main, workdir, quick):
+    from voice_text import normalize_for_voice
+    results = {}
+    sizes = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        text = make_markdown_response(size)
+        repeat = 3 if quick else 7
+        results[f"legacy[{size}]"] = measure(lambda: legacy_clean_response_for_voice(text), repeat=repeat)
+        results[f"normalize_for_voice[{size}]"] = measure(lambda: normalize_for_voice(text), repeat=repeat)
+        results[f"normalize_for_voice_ssml[{size}]"] = measure(lambda: normalize_for_voice(text, ssml=True), repeat=repeat)
+    # Plain prose, the common case: ordinary text between markup is skipped by the gate
+    prose = "The quick brown fox jumps over the lazy dog, and then it rests for a while. " * (sizes[-1] // 76)
+    results["legacy[prose]"] = measure(lambda: legacy_clean_response_for_voice(prose), repeat=3)
+    results["normalize_for_voice[prose]"] = measure(lambda: normalize_for_voice(prose), repeat=3)
+    for text, expected in (("Python 3.11.7 is out", "Python three point eleven point seven is out"),
+                           ("Step two --- done | fast", "Step two done fast")):
+        if normalize_for_voice(text) != expected:
+            raise AssertionError(f"normalized {text!r} as {normalize_for_voice(text)!r}")
+    # Runs of blank lines and '#' make the legacy ^\s* and #+\s+ patterns quadratic
+    for label, text in (("blank_lines_5k", "\n" * 5_000 + "end"), ("hashes_5k", "#" * 5_000)):
+        results[f"legacy[{label}]"] = measure(lambda: legacy_clean_response_for_voice(text), repeat=1)
+        results[f"normalize_for_voice[{label}]"] = measure(lambda: normalize_for_voice(text), repeat=3)
+    small, large = sizes[0], sizes[-1]
+    results["growth_ratio"] = round(
+        results[f"normalize_for_voice[{large}]"]["median_ms"] / results[f"normalize_for_voice[{small}]"]["median_ms"], 2
+    )
+    results["size_ratio"] = large // small
+    return results
+
+@suite("conversation")
+def bench_conversation(main, workdir, quick):
+    results = {}
+    sizes = [100, 1_000, 10_000] if quick else [100, 1_000, 10_000, 100_000]
+    for size in sizes:
+        conversation = make_conversation(size)
+        repeat = 3 if size >= 10_000 else 10
+        results[f"save_conversation[{size}]"] = measure(lambda: main.save_conversation(conversation), repeat=repeat)
+        results[f"load_conversation[{size}]"] = measure(main.load_conversation, repeat=repeat)
+        results[f"file_bytes[{size}]"] = os.path.getsize(main.CONVERSATION_FILE)
+    main.clear_conversation()
+    return results
+
+@suite("archive")
+def bench_archive(main, workdir, quick):
+    import archive
+
+    days, per_day = (365, 50) if quick else (730, 150)
+    now = datetime.datetime.now()
+    history = []
+    for day in range(days, -1, -1):
+        for i in range(per_day):
+            history.append({
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": f"Message {i} of day {day} with some extra words to pad it out to a normal length.",
+                "timestamp": (now - datetime.timedelta(days=day, seconds=per_day - i)).isoformat(),
+            })
+    path = os.path.join(workdir, "archive_history.json")
+    main.save_conversation(history, path)
+    full_bytes = os.path.getsize(path)
+
+    start = time.perf_counter()
+    hot = main.load_conversation(path)
+    roll_ms = (time.perf_counter() - start) * 1000
+    archived_bytes = sum(
+        os.path.getsize(os.path.join(archive.archive_dir(path), name)) for name in os.listdir(archive.archive_dir(path))
+    )
+    day = (now - datetime.timedelta(days=days // 2)).date()
+    results = {
+        "turns": len(history),
+        "hot_turns": len(hot),
+        "history_bytes_before": full_bytes,
+        "hot_bytes_after": os.path.getsize(path),
+        "archive_bytes": archived_bytes,
+        "first_load_with_roll_ms": round(roll_ms, 1),
+        "load_hot": measure(lambda: main.load_conversation(path), repeat=5),
+        "read_archived_day": measure(lambda: archive.read_day(path, day), repeat=10),
+    }
+    return results
+
+@suite("sessions")
+def bench_sessions(main, workdir, quick):
+    from concurrent.futures import ThreadPoolExecutor
+    from sessions import SessionStore
+
+    results = {}
+    history_size = 2_000 if quick else 10_000
+    question = "why is the sky blue"
+
+    # Before: every AI turn read and rewrote the whole history file
+    def file_turn():
+        history = main.load_conversation()
+        main.get_ai_response(question, history)
+        main.save_conversation(history)
+
+    main.save_conversation(make_conversation(history_size))
+    results[f"file_turn[{history_size}]"] = measure(file_turn, repeat=5)
+    main.clear_conversation()
+
+    # After: the history stays in the session LRU between turns
+    store = SessionStore(main.load_conversation, main.write_conversation, directory=os.path.join(workdir, "sessions"))
+    main.save_conversation(make_conversation(history_size), store.path_for("bench"))
+
+    def session_turn():
+        with store.history("bench") as history:
+            main.get_ai_response(question, history)
+
+    results[f"session_turn[{history_size}]"] = measure(session_turn, repeat=5)
+    results["speedup"] = round(
+        results[f"file_turn[{history_size}]"]["median_ms"] / results[f"session_turn[{history_size}]"]["median_ms"], 2
+    )
+
+    # Many users at once through a small LRU: evicted histories are written behind
+    users, turns, capacity = (200, 3, 50) if quick else (1_000, 5, 200)
+    store = SessionStore(main.load_conversation, main.write_conversation,
+                         directory=os.path.join(workdir, "sessions_lru"), capacity=capacity)
+
+    def user_turns(user):
+        for _ in range(turns):
+            with store.history(f"user-{user}") as history:
+                main.get_ai_response(question, history)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(user_turns, range(users)))
+    elapsed = time.perf_counter() - start
+    store.flush()
+    lost = sum(len(main.load_conversation(store.path_for(f"user-{u}"))) != 2 * turns for u in range(users))
+    results["concurrent"] = {
+        "users": users,
+        "turns_per_user": turns,
+        "capacity": capacity,
+        "turns_per_s": round(users * turns / elapsed, 1),
+        "histories_with_lost_turns": lost,
+        **store.stats(),
+    }
+    if lost:
+        raise AssertionError(f"{lost} session histories lost turns under LRU eviction")
+
+    # A session evicted mid-turn must come back as the same object, not reloaded from the old file
+    store = SessionStore(main.load_conversation, main.write_conversation,
+                         directory=os.path.join(workdir, "sessions_pinned"), capacity=1)
+    for turn in range(3):
+        with store.history("pinned") as history:
+            if turn == 1:
+                store.get("other")
+            history.append({"role": "user", "content": f"turn {turn}"})
+    store.flush()
+    kept = [entry["content"] for entry in main.load_conversation(store.path_for("pinned"))]
+    if kept != ["turn 0", "turn 1", "turn 2"]:
+        raise AssertionError(f"turn lost when its session was evicted mid-turn: {kept}")
+    results["evicted_mid_turn_kept"] = True
+    return results
+
+@suite("retrieval")
+def bench_retrieval(main, workdir, quick):
+    import random
+    import archive
+    from retrieval import ConversationIndex
+
+    turns = 20_000 if quick else 100_000
+    rng = random.Random(5)
+    # Zipf-like vocabulary so common words have long posting lists
+    vocabulary = [f"w{i}" for i in range(20_000)]
+    ranks = [1 / (i + 1) for i in range(len(vocabulary))]
+    history = []
+    now = datetime.datetime.now().isoformat()
+    for i in range(turns):
+        words = rng.choices(vocabulary, weights=ranks, k=rng.randint(8, 40))
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": " ".join(words), "timestamp": now})
+    # A fact mentioned once, early on
+    history[10] = {"role": "user", "content": "my sister priya lives in bangalore and works as a pediatrician", "timestamp": now}
+
+    index = ConversationIndex()
+    start = time.perf_counter()
+    index.sync(history)
+    build_s = time.perf_counter() - start
+
+    queries = [" ".join(rng.choices(vocabulary, weights=ranks, k=rng.randint(3, 12))) for _ in range(50)]
+    query_iter = iter(queries * 10)
+    results = {
+        "turns": turns,
+        "add_us_per_turn": round(build_s / turns * 1e6, 2),
+        "search": measure(lambda: index.search(next(query_iter), before=turns - 10), repeat=50),
+        "recall": measure(lambda: index.recall("what does my sister do in bangalore", before=turns - 10), repeat=20),
+    }
+
+    def add_one_turn():
+        history.append({"role": "user", "content": "one more turn about w5 and w17", "timestamp": now})
+        index.sync(history)
+
+    results["add_one_turn"] = measure(add_one_turn, repeat=20)
+    recalled = index.recall("what does my sister do in bangalore", before=turns - 10) or ""
+    results["planted_fact_recalled"] = "pediatrician" in recalled
+
+    # A restart reopens the saved index instead of indexing every turn again
+    path = os.path.join(workdir, "recall.npz")
+    results["save"] = measure(lambda: index.save(path), repeat=3)
+    results["reopen"] = measure(lambda: ConversationIndex.load(path, history), repeat=3)
+    results["rebuild_ms"] = round(build_s * 1000, 1)
+
+    # Turns rolled into the archive stay recallable
+    old = (datetime.datetime.now() - datetime.timedelta(days=90)).isoformat()
+    rolled = [{**turn, "timestamp": old} for turn in history[:1000]] + history[1000:1100]
+    history_path = os.path.join(workdir, "recall_history.json")
+    hot = archive.roll(rolled, history_path)
+    log = archive.ConversationLog(history_path, hot)
+    archived_index = ConversationIndex(log)
+    archived_index.sync()
+    recalled = archived_index.recall("what does my sister do in bangalore", before=len(log) - 10) or ""
+    results["archived_fact_recalled"] = "pediatrician" in recalled
+    return results
+
+@suite("notes")
+def bench_notes(main, workdir, quick):
+    import persistence
+
+    results = {}
+    for existing in ([100, 1_000] if quick else [100, 1_000, 10_000]):
+        notes = [{"id": i + 1, "text": f"note {i}", "timestamp": datetime.datetime.now().isoformat()} for i in range(existing)]
+        with open(main.NOTES_FILE, "w") as f:
+            json.dump(notes, f)
+        results[f"add_note[{existing}]"] = measure(lambda: main.add_note("note benchmark entry"), repeat=5)
+        results[f"list_notes[{existing}]"] = measure(main.list_notes, repeat=5)
+
+        # A burst of notes is coalesced into one write of the file
+        def burst():
+            for i in range(50):
+                main.add_note(f"note burst entry {i}")
+            persistence.flusher.flush()
+
+        results[f"add_note_burst50_flushed[{existing}]"] = measure(burst, repeat=3)
+    os.remove(main.NOTES_FILE)
+    return results
+
+@suite("contacts")
+def bench_contacts(main, workdir, quick):
+    fork = load_contacts_module(workdir)
+    if fork is None or not hasattr(fork, "save_contacts"):
+        return {"skipped": "contacts are not available in this tree"}
+    results = {}
+    for existing in ([100, 1_000] if quick else [100, 1_000, 10_000]):
+        contacts = {f"Contact {i}": f"+91{9000000000 + i}" for i in range(existing)}
+        results[f"save_contacts[{existing}]"] = measure(lambda: fork.save_contacts(contacts), repeat=5)
+        results[f"load_contacts[{existing}]"] = measure(fork.load_contacts, repeat=5)
+        results[f"list_contacts[{existing}]"] = measure(fork.list_contacts, repeat=5)
+        results[f"search_contact[{existing}]"] = measure(lambda: fork.search_contact(f"Contact {existing // 2}"), repeat=5)
+    os.remove(fork.CONTACTS_FILE)
+    return results
+
+@suite("stt")
+def bench_stt(main, workdir, quick):
+    """Real-time factor (decode time / audio duration) of each offline backend"""
+    import glob
+    import wave
+    import recognizers
+
+    fixtures = sorted(glob.glob(os.path.join(STT_FIXTURES_DIR, "*.wav")))
+    if not fixtures:
+        return {"skipped": f"no WAV fixtures in {STT_FIXTURES_DIR}"}
+    backends = [name for name in recognizers.available_backends() if recognizers.BACKENDS[name][0].offline]
+    if not backends:
+        return {"skipped": "no offline speech backend installed (vosk or pocketsphinx)"}
+
+    clips = []
+    for path in fixtures:
+        with wave.open(path, "rb") as wav:
+            frames = wav.readframes(wav.getnframes())
+            clips.append((os.path.basename(path), recognizers.sr.AudioData(frames, wav.getframerate(), wav.getsampwidth()),
+                          wav.getnframes() / wav.getframerate()))
+
+    results = {}
+    for name in backends:
+        start = time.perf_counter()
+        try:
+            backend = recognizers.get_backend(name)
+        except Exception as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        backend_results = {"load_ms": round((time.perf_counter() - start) * 1000, 2), "clips": {}}
+        total_audio = total_decode = total_stream = 0.0
+        for clip_name, audio, duration in clips:
+            start = time.perf_counter()
+            text = backend.recognize(audio)
+            decode = time.perf_counter() - start
+
+            # Streaming in 64ms chunks, as the live listener feeds it
+            pcm = recognizers.pcm_from_audio(audio)
+            chunk = 1024 * recognizers.SAMPLE_WIDTH
+            start = time.perf_counter()
+            session = backend.stream()
+            for i in range(0, len(pcm), chunk):
+                session.feed(pcm[i:i + chunk])
+            session.finish()
+            stream = time.perf_counter() - start
+
+            backend_results["clips"][clip_name] = {
+                "duration_s": round(duration, 3),
+                "rtf": round(decode / duration, 4),
+                "streaming_rtf": round(stream / duration, 4),
+                "text": text,
+            }
+            total_audio += duration
+            total_decode += decode
+            total_stream += stream
+        backend_results["rtf"] = round(total_decode / total_audio, 4)
+        backend_results["streaming_rtf"] = round(total_stream / total_audio, 4)
+        results[name] = backend_results
+    return results
+
+def synthetic_session(seconds=60, sample_rate=16000, seed=7):
+    """Room noise with a 1.5s voiced burst every 6s and a 10ms click every 2s"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 30, seconds * sample_rate)
+    t = np.arange(int(1.5 * sample_rate)) / sample_rate
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    voiced = envelope * sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 280, 420, 560)))
+    bursts = 0
+    for start in range(1, seconds - 2, 6):
+        i = start * sample_rate
+        audio[i:i + voiced.size] += 2500 * voiced
+        bursts += 1
+    click = int(0.01 * sample_rate)
+    for start in range(0, seconds, 2):
+        i = start * sample_rate + sample_rate // 2
+        audio[i:i + click] += rng.normal(0, 6000, click)
+    return np.clip(audio, -32768, 32767).astype(np.int16).tobytes(), bursts
+
+def count_segments(decisions, pause_chunks=13, min_chunks=5):
+    """Segments the listener would hand to the recognizer for a per-chunk speech decision stream"""
+    sent = rejected = 0
+    in_phrase, voiced, silent = False, 0, 0
+    for speech in decisions:
+        if not in_phrase:
+            if speech:
+                in_phrase, voiced, silent = True, 1, 0
+            continue
+        if speech:
+            voiced, silent = voiced + 1, 0
+        else:
+            silent += 1
+        if silent >= pause_chunks:
+            if voiced >= min_chunks:
+                sent += 1
+            else:
+                rejected += 1
+            in_phrase = False
+    return sent, rejected
+
+@suite("vad")
+def bench_vad(main, workdir, quick):
+    try:
+        from vad import EnergyVAD
+        from listener import rms
+    except ImportError as e:
+        return {"skipped": f"NumPy VAD not available: {e}"}
+
+    seconds = 20 if quick else 60
+    pcm, bursts = synthetic_session(seconds)
+    chunk = 1024 * 2
+    chunks = [pcm[i:i + chunk] for i in range(0, len(pcm), chunk)]
+
+    # Baseline: one energy threshold per chunk, like speech_recognition's listen()
+    threshold = 4 * rms(chunks[0])
+    energy_decisions = [rms(c) > threshold for c in chunks]
+
+    vad = EnergyVAD()
+    vad.calibrate(b"".join(chunks[:8]))
+    start = time.perf_counter()
+    vad_decisions = [vad.is_speech(c) for c in chunks]
+    elapsed = time.perf_counter() - start
+
+    energy_sent, energy_short = count_segments(energy_decisions)
+    vad_sent, vad_short = count_segments(vad_decisions)
+    stats = vad.stats.as_dict()
+    return {
+        "audio_seconds": seconds,
+        "speech_bursts": bursts,
+        "chunks_total": len(chunks),
+        "chunks_forwarded": sum(vad_decisions),
+        "chunks_never_decoded": len(chunks) - sum(vad_decisions),
+        "energy_gate": {"segments_sent": energy_sent, "segments_too_short": energy_short},
+        "vad": {
+            "segments_sent": vad_sent,
+            "segments_too_short": vad_short,
+            "onsets_rejected": stats["recognition_calls_avoided"],
+        },
+        "vad_wall_ms": round(elapsed * 1000, 2),
+        "vad_cpu_percent_of_realtime": stats["vad_cpu_percent"],
+        "per_chunk_us": round(elapsed / len(chunks) * 1e6, 2),
+    }
+
+@suite("scheduler")
+def bench_scheduler(main, workdir, quick):
+    import random
+    from scheduler import Scheduler
+
+    count = 20000 if quick else 100000
+    rng = random.Random(3)
+    scheduler = Scheduler(lambda item: None, path=None)
+    now = time.time()
+    threads_before = threading.active_count()
+
+    start = time.perf_counter()
+    items = [scheduler.schedule(now + 3600 + rng.random() * 86400, f"timer {i}", "timer") for i in range(count)]
+    insert_s = time.perf_counter() - start
+
+    victims = rng.sample(items, count // 2)
+    start = time.perf_counter()
+    for item in victims:
+        scheduler.cancel(item["id"])
+    cancel_s = time.perf_counter() - start
+
+    # Everything left comes due at once: how fast does the single thread drain it
+    fired = []
+    done = threading.Event()
+    remaining = len(scheduler)
+
+    def on_fire(item):
+        fired.append(item)
+        if len(fired) == remaining:
+            done.set()
+
+    drain = Scheduler(on_fire, path=None)
+    for item in scheduler.pending():
+        drain.schedule(now - 1, item["text"], "timer")
+    start = time.perf_counter()
+    drain.start()
+    done.wait(timeout=60)
+    drain_s = time.perf_counter() - start
+    threads_added = threading.active_count() - threads_before
+    drain.stop()
+
+    wrong = {}
+    for command, ending in REMINDER_REPLIES.items():
+        reply = main.set_reminder(command, "bench")["text"]
+        if not reply.endswith(ending):
+            wrong[command] = reply
+    if wrong:
+        raise AssertionError(f"reminders parsed wrong: {wrong}")
+
+    return {
+        "pending_timers": count,
+        "insert_us_per_timer": round(insert_s / count * 1e6, 2),
+        "cancel_us_per_timer": round(cancel_s / len(victims) * 1e6, 2),
+        "fired": len(fired),
+        "fire_us_per_timer": round(drain_s / max(1, len(fired)) * 1e6, 2),
+        "threads_added": threads_added,
+    }
+
+@suite("calculator")
+def bench_calculator(main, workdir, quick):
+    import calculator
+
+    expressions = ["12*(3+4)/7", "sqrt(16) + log(8, 2)", "2**10 - 1", "(1.5 + 2.25) * 4"]
+    calculator.compile_expression.cache_clear()
+    cold = measure(lambda: [calculator.compile_expression.cache_clear() or calculator.evaluate(e) for e in expressions])
+    cached = measure(lambda: [calculator.evaluate(e) for e in expressions], number=100)
+
+    start = time.perf_counter()
+    result = main.safe_calculate("calculate 9**9**9**9")
+    hostile_ms = (time.perf_counter() - start) * 1000
+
+    count = 2000 if quick else 20000
+    batch = [f"sqrt({i}) * sin({i % 90}) + log({i + 1}, 2) - {i % 7} / 3" for i in range(count)]
+    for expression in batch:
+        calculator.compile_expression(expression)
+    vectorized = measure(lambda: calculator.evaluate_many(batch), repeat=3)
+    scalar = measure(lambda: [calculator._evaluate_result(e) for e in batch], repeat=3)
+
+    return {
+        "evaluate_cold_ms": cold,
+        "evaluate_cached_ms": cached,
+        "hostile_expression": {"result": result, "ms": round(hostile_ms, 3)},
+        "batch_size": count,
+        "batch_vectorized_ms": vectorized,
+        "batch_scalar_loop_ms": scalar,
+    }
+
+@suite("units")
+def bench_units(main, workdir, quick):
+    import units
+
+    pairs = [(a, b) for (a, b) in units.CONVERSIONS]
+    lookup = measure(lambda: [units.convert(1.5, a, b) for a, b in pairs], number=20)
+    commands = ["convert 10 km to miles", "convert 5 km to feet", "convert 98.6 f to c",
+                "convert 5 pounds to kg", "convert 1 gb to mib", "convert 3 cups to ml"]
+    handled = measure(lambda: [main.convert_unit(c) for c in commands], number=20)
+    return {
+        "units": len(units.UNITS),
+        "precomputed_pairs": len(pairs),
+        "convert_us_per_pair": round(lookup["median_ms"] * 1000 / len(pairs), 3),
+        "convert_unit_command_us": round(handled["median_ms"] * 1000 / len(commands), 2),
+    }
+
+@suite("http")
+def bench_http(main, workdir, quick):
+    """Per-call requests.get against the shared keep-alive session, on the local fake upstreams"""
+    import requests
+    import http_client
+    from concurrent.futures import ThreadPoolExecutor
+    from fake_upstreams import DEFAULT_PAYLOADS, SERVICES, ServiceConfig, start_servers
+
+    # No added latency, so the difference is connection setup alone
+    configs = {name: ServiceConfig(latency=0, jitter=0, payload=DEFAULT_PAYLOADS[name]) for name in SERVICES}
+    servers = start_servers(configs=configs, ports={name: 0 for name in SERVICES})
+    urls = [
+        servers["exchangerate"][1] + "/v4/latest/USD",
+        servers["dictionary"][1] + "/api/v2/entries/en/echo",
+        servers["weather"][1] + "/data/2.5/weather?q=Kanpur",
+    ]
+    calls = 60 if quick else 300
+    session = http_client.create_session()
+
+    # Count TCP connections the fake servers accept
+    accepted = [0]
+    for server, _ in servers.values():
+        def counting_accept(original=server.get_request):
+            accepted[0] += 1
+            return original()
+        server.get_request = counting_accept
+
+    def connections(func):
+        accepted[0] = 0
+        func()
+        return accepted[0]
+    try:
+        def fresh():
+            for i in range(calls):
+                requests.get(urls[i % len(urls)], timeout=10).content
+
+        def pooled(client=session):
+            for i in range(calls):
+                client.get(urls[i % len(urls)], timeout=10).content
+
+        def concurrent(fetch):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lambda url: fetch(url, timeout=10).content, urls * (calls // len(urls))))
+
+        results = {
+            "calls": calls,
+            "sequential_new_connection_ms": measure(fresh, repeat=3),
+            "sequential_shared_session_ms": measure(pooled, repeat=3),
+            "concurrent_new_connection_ms": measure(lambda: concurrent(requests.get), repeat=3),
+            "concurrent_shared_session_ms": measure(lambda: concurrent(session.get), repeat=3),
+        }
+        results["connections_opened"] = {"new_connection": connections(fresh), "shared_session": connections(lambda: pooled(http_client.create_session()))}
+        results["sequential_speedup"] = round(
+            results["sequential_new_connection_ms"]["median_ms"] / results["sequential_shared_session_ms"]["median_ms"], 2)
+        results["concurrent_speedup"] = round(
+            results["concurrent_new_connection_ms"]["median_ms"] / results["concurrent_shared_session_ms"]["median_ms"], 2)
+        return results
+    finally:
+        session.close()
+        for server, _ in servers.values():
+            server.shutdown()
+            server.server_close()
+
+@suite("flask")
+def bench_flask(main, workdir, quick):
+    try:
+        import app as echo_app
+    except ImportError as e:
+        return {"skipped": f"Flask app not importable: {e}"}
+    client = echo_app.app.test_client()
+    results = {}
+    results["GET /status"] = measure(lambda: client.get("/status"), repeat=5 if quick else 20, number=10)
+    for command in EXECUTE_COMMANDS:
+        results[f"POST /command[{command}]"] = measure(
+            lambda: client.post("/command", json={"command": command}), repeat=3 if quick else 10, number=5,
+        )
+    return results
+
+@suite("page_weight")
+def bench_page_weight(main, workdir, quick):
+    import gzip
+    import re
+    try:
+        import app as echo_app
+    except ImportError as e:
+        return {"skipped": f"Flask app not importable: {e}"}
+    client = echo_app.app.test_client()
+    browser = {"Accept-Encoding": "gzip, deflate, br"}
+
+    # Before: one page with the CSS and JS inline, re-rendered, uncompressed and
+    # re-downloaded on every visit
+    page = client.get("/", headers=browser)
+    html = gzip.decompress(page.data) if page.headers.get("Content-Encoding") == "gzip" else page.data
+    asset_urls = re.findall(r'/assets/[^"\']+', html.decode("utf-8"))
+    static_bytes = sum(
+        os.path.getsize(os.path.join(BASE_DIR, "static", name)) for name in os.listdir(os.path.join(BASE_DIR, "static"))
+    )
+    inline_bytes = len(html) + static_bytes
+    results = {"before": {"first_load_bytes": inline_bytes, "repeat_load_bytes": inline_bytes, "requests": 1}}
+
+    # After: hashed assets cached forever, the page revalidated with its ETag
+    first = [page] + [client.get(url, headers=browser) for url in asset_urls]
+    repeat = client.get("/", headers={**browser, "If-None-Match": page.headers["ETag"]})
+    results["after"] = {
+        "first_load_bytes": sum(len(response.data) for response in first),
+        "repeat_load_bytes": len(repeat.data),
+        "repeat_status": repeat.status_code,
+        "requests": len(first),
+        "encoding": page.headers.get("Content-Encoding"),
+    }
+    results["first_load_saving_pct"] = round(100 * (1 - results["after"]["first_load_bytes"] / inline_bytes), 1)
+
+    with echo_app.app.test_request_context("/"):
+        results["render_template"] = measure(
+            lambda: echo_app.render_template("index.html", asset_url=echo_app.asset_manifest.url), repeat=5, number=20,
+        )
+    results["GET / (cached render)"] = measure(lambda: client.get("/", headers=browser), repeat=5, number=20)
+    help_text = client.post("/command", json={"command": "help"}, headers=browser)
+    results["help_json_bytes"] = {
+        "raw": len(gzip.decompress(help_text.data)) if help_text.headers.get("Content-Encoding") == "gzip" else len(help_text.data),
+        "sent": len(help_text.data),
+    }
+    return results
+
+@suite("admission")
+def bench_admission(main, workdir, quick):
+    from concurrent.futures import ThreadPoolExecutor
+    from admission import Admission, Rejected, LOCAL, HEAVY
+
+    results = {}
+    commands = ["what time is it", "weather", "calculate 12*(3+4)/7", "why is the sky blue",
+                "generate image of a lighthouse", "what is love", "what is 10*5", "how's it looking outside"]
+    results["command_cost"] = {command: main.command_cost(command) for command in commands}
+    results["command_cost_time"] = measure(lambda: [main.command_cost(c) for c in commands], repeat=5, number=20)
+    results["command_cost_time"]["commands_per_call"] = len(commands)
+
+    # A spike of slow LLM answers mixed with local commands, arriving faster than a
+    # 16 thread server can answer them; without admission everything queues
+    llm_s, local_s = 0.2, 0.002
+    rps, duration = 200, (1.5 if quick else 5.0)
+
+    def spike(gate):
+        server = ThreadPoolExecutor(max_workers=16)
+        lock = threading.Lock()
+        outcomes = {kind: {"ok": 0, "rejected": 0, "latencies": []} for kind in (LOCAL, HEAVY)}
+
+        def serve(kind, arrived, admitted):
+            time.sleep(llm_s if kind == HEAVY else local_s)
+            if admitted:
+                admitted.__exit__(None, None, None)
+            with lock:
+                outcomes[kind]["ok"] += 1
+                outcomes[kind]["latencies"].append((time.perf_counter() - arrived) * 1000)
+
+        begin = time.perf_counter()
+        for i in range(int(rps * duration)):
+            delay = begin + i / rps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = HEAVY if i % 2 else LOCAL
+            admitted = None
+            if gate:
+                admitted = gate.enter(kind)
+                try:
+                    admitted.__enter__()
+                except Rejected:
+                    outcomes[kind]["rejected"] += 1
+                    continue
+            server.submit(serve, kind, time.perf_counter(), admitted)
+        server.shutdown(wait=True)
+        report = {}
+        for kind, outcome in outcomes.items():
+            values = sorted(outcome.pop("latencies"))
+            outcome["p95_ms"] = round(values[max(0, int(len(values) * 0.95) - 1)], 1) if values else None
+            report[kind] = outcome
+        return report
+
+    results["spike_without_admission"] = spike(None)
+    gate = Admission(rate=0, max_inflight=16, max_heavy=10, local_reserve=4)
+    results["spike_with_admission"] = spike(gate)
+
+    # One client bursting: the bucket lets the burst through, then answers 429 at once
+    limiter = Admission(rate=2, burst=10)
+    statuses = []
+    for _ in range(30):
+        try:
+            limiter.check_rate("burst-client", LOCAL)
+            statuses.append(200)
+        except Rejected as e:
+            statuses.append(e.status)
+            retry_after = e.retry_after
+    results["single_client_burst"] = {"ok": statuses.count(200), "rate_limited": statuses.count(429),
+                                      "retry_after_s": retry_after}
+    results["gate"] = gate.snapshot()
+    return results
+
+# ==================== RUNNER ====================
+
+def compare(current, baseline_path):
+    """Print median deltas against a previous results file"""
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {baseline_path}:")
+    for suite_name, metrics in current["suites"].items():
+        old_metrics = baseline.get("suites", {}).get(suite_name, {})
+        for metric, value in metrics.items():
+            old = old_metrics.get(metric)
+            if not isinstance(value, dict) or not isinstance(old, dict) or "median_ms" not in value:
+                continue
+            if old["median_ms"]:
+                change = (value["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+                print(f"  {suite_name}.{metric}: {old['median_ms']:.3f}ms -> {value['median_ms']:.3f}ms ({change:+.1f}%)")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="ECHO offline benchmark suite")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats")
+    parser.add_argument("--output", help="results file (default: bench_results/bench_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    output = os.path.abspath(output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix="echo_bench_")
+    main = prepare_environment(workdir)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": f"{platform.system()} {platform.release()}",
+        "quick": args.quick,
+        "suites": {},
+    }
+
+    for name in args.suite or list(SUITES):
+        print(f"Running suite: {name}")
+        start = time.perf_counter()
+        # Handlers print progress for every command, keep that out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report["suites"][name] = SUITES[name](main, workdir, args.quick)
+        print(f"✓ {name} finished in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if baseline:
+        compare(report, baseline)
+
+if __name__ == "__main__":
+    main_cli()
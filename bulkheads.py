@@ -0,0 +1,114 @@
+"""
+ECHO AI - Handler Bulkheads
+Handlers are grouped by what they wait on, and each group runs on its own
+small pool with its own concurrency limit and hard timeout. A stalled image
+download or a hung camera then only ties up its own group's slots, and time,
+date and the other instant commands keep answering. When a group is full,
+new requests for it are refused straight away instead of queueing behind
+the stuck ones. A request that times out gets an answer at once, but its
+slot stays taken until the handler really returns.
+
+Limits are configurable per group as ECHO_BULKHEAD_<GROUP>=<max concurrent>:<timeout seconds>,
+e.g. ECHO_BULKHEAD_NETWORK=16:35.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+class BulkheadFull(Exception):
+    """Every slot of the handler group is busy"""
+
+    def __init__(self, bulkhead):
+        self.bulkhead = bulkhead
+        super().__init__(f"{bulkhead.name} bulkhead is full ({bulkhead.max_concurrent} running)")
+
+class BulkheadTimeout(Exception):
+    """The handler did not finish within the group's timeout"""
+
+    def __init__(self, bulkhead):
+        self.bulkhead = bulkhead
+        super().__init__(f"{bulkhead.name} handler timed out after {bulkhead.timeout:g}s")
+
+class Bulkhead:
+    def __init__(self, name, label, max_concurrent, timeout):
+        self.name = name
+        self.label = label                  # how the group is described to the user
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        # Exactly one worker per slot, so the pool itself never queues
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix=f"bulkhead-{name}")
+        self.lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def run(self, func, *args):
+        """func(*args) on this group's pool; raises BulkheadFull or BulkheadTimeout"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise BulkheadFull(self)
+        with self.lock:
+            self.active += 1
+        try:
+            future = self.pool.submit(func, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self.lock:
+                self.timed_out += 1
+            raise BulkheadTimeout(self)
+
+    def _release(self, _future):
+        with self.lock:
+            self.active -= 1
+            self.completed += 1
+        self.slots.release()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "active": self.active,
+                "max_concurrent": self.max_concurrent,
+                "timeout_s": self.timeout,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+def _limits(name, max_concurrent, timeout):
+    setting = os.getenv(f"ECHO_BULKHEAD_{name.upper()}")
+    if setting:
+        limit, _, seconds = setting.partition(":")
+        max_concurrent = int(limit)
+        timeout = float(seconds) if seconds else timeout
+    return max_concurrent, timeout
+
+# name: (user-facing label, max concurrent, timeout seconds). 'instant' handlers run inline.
+BULKHEAD_DEFAULTS = {
+    "network": ("online", 16, 35.0),        # upstream APIs, LLM, image downloads
+    "ui": ("desktop", 2, 10.0),             # browser, apps, screenshots
+    "camera": ("camera", 1, 15.0),
+    "cpu": ("system", max(2, os.cpu_count() or 2), 5.0),
+}
+
+BULKHEADS = {
+    name: Bulkhead(name, label, *_limits(name, limit, timeout))
+    for name, (label, limit, timeout) in BULKHEAD_DEFAULTS.items()
+}
+
+def dispatch(kind, func, *args):
+    """Run a handler in its group's bulkhead ('instant' runs inline on the caller's thread)"""
+    if kind == "instant":
+        return func(*args)
+    return BULKHEADS[kind].run(func, *args)
+
+def bulkhead_status():
+    return {name: bulkhead.snapshot() for name, bulkhead in BULKHEADS.items()}
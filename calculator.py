@@ -0,0 +1,342 @@
+"""
+ECHO AI - Calculator Engine
+Evaluates arithmetic without eval(). Expressions are parsed with ast, checked
+against a whitelist of nodes and functions, and compiled into closures that
+are cached, so repeated questions skip parsing. Limits on expression size,
+integer size and exponents keep a request like 9**9**9**9 from pinning a core.
+
+evaluate_many() is the batch mode: expressions with the same shape (e.g.
+'a * b + c' with different numbers) are evaluated together as NumPy arrays.
+"""
+
+import ast
+import math
+import operator
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+MAX_EXPRESSION_LENGTH = 256
+MAX_STEPS = 100              # AST nodes; each is evaluated exactly once, so this bounds the work
+MAX_EXPONENT = 10000
+MAX_BITS = 4096              # largest integer result (~1200 digits)
+MAX_FACTORIAL = 300
+VECTOR_MIN_BATCH = 8         # smaller groups are cheaper on the scalar path
+
+class CalculationError(ValueError):
+    """Expression that is not allowed or whose result is out of bounds"""
+
+# Batch results: value is None when error is set
+Result = namedtuple("Result", ["value", "error"])
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+# ==================== NORMALIZATION ====================
+
+SPOKEN_OPERATORS = [
+    (r"\bto the power of\b", "**"),
+    (r"\bmultiplied by\b", "*"),
+    (r"\bdivided by\b", "/"),
+    (r"\bsquare root of\s+(\d+(?:\.\d+)?)", r"sqrt(\1)"),
+    (r"\bsquared\b", "**2"),
+    (r"\bcubed\b", "**3"),
+    (r"\bplus\b", "+"),
+    (r"\bminus\b", "-"),
+    (r"\btimes\b", "*"),
+    (r"\bover\b", "/"),
+    (r"\bmod(?:ulo)?\b", "%"),
+    (r"(?<=\d)\s*x\s*(?=[\d(])", "*"),
+    (r"[×∗]", "*"),
+    (r"÷", "/"),
+    (r"\^", "**"),
+]
+SPOKEN_PATTERNS = [(re.compile(pattern), replacement) for pattern, replacement in SPOKEN_OPERATORS]
+COMMAND_WORDS = re.compile(r"^\s*(?:calculate|compute|evaluate|what is|what's|whats)\b", re.IGNORECASE)
+
+def normalize_expression(text):
+    """Turn a typed or spoken question into a Python arithmetic expression"""
+    expression = COMMAND_WORDS.sub("", text.lower()).strip().rstrip("?=. ")
+    for pattern, replacement in SPOKEN_PATTERNS:
+        expression = pattern.sub(replacement, expression)
+    if "(" not in expression:
+        # Thousands separators, unless commas could be separating function arguments
+        expression = re.sub(r"(?<=\d),(?=\d{3}\b)", "", expression)
+    return expression.strip()
+
+# ==================== SCALAR OPERATIONS ====================
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > MAX_BITS:
+        raise CalculationError("Number too large")
+    return value
+
+def _check_float(value):
+    if isinstance(value, float) and math.isinf(value):
+        raise CalculationError("Number too large")
+    return value
+
+def _mul(a, b):
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > MAX_BITS + 1:
+        raise CalculationError("Number too large")
+    return _check_float(a * b)
+
+def _pow(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        if b > MAX_EXPONENT or (b > 0 and abs(a) > 1 and (a.bit_length() - 1) * b > MAX_BITS):
+            raise CalculationError("Number too large")
+        return _check_int(a ** b)
+    if abs(b) > MAX_EXPONENT and abs(a) > 1:
+        raise CalculationError("Number too large")
+    try:
+        return math.pow(a, b)
+    except OverflowError:
+        raise CalculationError("Number too large")
+
+def _factorial(n):
+    if n != int(n) or n < 0:
+        raise CalculationError("Factorial needs a whole number")
+    if n > MAX_FACTORIAL:
+        raise CalculationError(f"Factorial is limited to {MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+def _log(x, base=None):
+    return math.log(x) if base is None else math.log(x, base)
+
+def _round(x, digits=0):
+    return round(x, int(digits)) if digits else round(x)
+
+SCALAR_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+# name -> (function, min args, max args)
+SCALAR_FUNCTIONS = {
+    "sqrt": (math.sqrt, 1, 1), "abs": (abs, 1, 1), "round": (_round, 1, 2),
+    "floor": (math.floor, 1, 1), "ceil": (math.ceil, 1, 1),
+    "sin": (math.sin, 1, 1), "cos": (math.cos, 1, 1), "tan": (math.tan, 1, 1),
+    "asin": (math.asin, 1, 1), "acos": (math.acos, 1, 1), "atan": (math.atan, 1, 1),
+    "log": (_log, 1, 2), "ln": (math.log, 1, 1), "log10": (math.log10, 1, 1), "log2": (math.log2, 1, 1),
+    "exp": (math.exp, 1, 1), "radians": (math.radians, 1, 1), "degrees": (math.degrees, 1, 1),
+    "factorial": (_factorial, 1, 1),
+}
+
+class ScalarOps:
+    @staticmethod
+    def binary(op, a, b):
+        return SCALAR_BINARY[op](a, b)
+
+    @staticmethod
+    def negate(a):
+        return -a
+
+    @staticmethod
+    def call(name, args):
+        try:
+            return _check_float(SCALAR_FUNCTIONS[name][0](*args))
+        except OverflowError:
+            raise CalculationError("Number too large")
+
+# ==================== VECTOR OPERATIONS ====================
+
+if NUMPY_AVAILABLE:
+    VECTOR_BINARY = {
+        ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+        ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power,
+    }
+    VECTOR_FUNCTIONS = {
+        "sqrt": np.sqrt, "abs": np.abs, "round": lambda x, d=0: np.round(x, int(np.max(d))),
+        "floor": np.floor, "ceil": np.ceil,
+        "sin": np.sin, "cos": np.cos, "tan": np.tan,
+        "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+        "log": lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base),
+        "ln": np.log, "log10": np.log10, "log2": np.log2,
+        "exp": np.exp, "radians": np.radians, "degrees": np.degrees,
+    }
+
+    class VectorOps:
+        # Out-of-range elements come back as inf/nan and are redone on the scalar path
+        @staticmethod
+        def binary(op, a, b):
+            return VECTOR_BINARY[op](a, b)
+
+        @staticmethod
+        def negate(a):
+            return np.negative(a)
+
+        @staticmethod
+        def call(name, args):
+            return VECTOR_FUNCTIONS[name](*args)
+
+# ==================== COMPILER ====================
+
+# Numeric literals are lifted out of the text, so '3 * 4' and '5 * 6' share the
+# 'shape' '0 * 0' and one compiled closure
+NUMBER = re.compile(r"(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?(?![\w.])")
+
+Template = namedtuple("Template", ["evaluate", "functions", "arity"])
+Compiled = namedtuple("Compiled", ["shape", "constants", "template"])
+
+def _compile_node(node, constants, functions):
+    """Closure evaluating node; numeric literals are read from the values list in visit order"""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculationError("Only numbers are allowed")
+        index = len(constants)
+        constants.append(node.value)
+        return lambda values, ops: values[index]
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS:
+            raise CalculationError(f"Unknown name '{node.id}'")
+        value = CONSTANTS[node.id]
+        return lambda values, ops: value
+
+    if isinstance(node, ast.BinOp):
+        op = type(node.op)
+        if op not in SCALAR_BINARY:
+            raise CalculationError("Operator not allowed")
+        left = _compile_node(node.left, constants, functions)
+        right = _compile_node(node.right, constants, functions)
+        return lambda values, ops: ops.binary(op, left(values, ops), right(values, ops))
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile_node(node.operand, constants, functions)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return lambda values, ops: ops.negate(operand(values, ops))
+
+    if isinstance(node, ast.Call):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name not in SCALAR_FUNCTIONS or node.keywords:
+            raise CalculationError(f"Unknown function '{name or ast.unparse(node.func)}'")
+        _, min_args, max_args = SCALAR_FUNCTIONS[name]
+        if not min_args <= len(node.args) <= max_args:
+            raise CalculationError(f"Wrong number of arguments for {name}()")
+        functions.add(name)
+        args = [_compile_node(arg, constants, functions) for arg in node.args]
+        return lambda values, ops: ops.call(name, [arg(values, ops) for arg in args])
+
+    raise CalculationError("Invalid mathematical expression")
+
+@lru_cache(maxsize=256)
+def compile_template(shape):
+    """Parse and validate an expression shape once, returns its Template"""
+    try:
+        tree = ast.parse(shape, mode="eval")
+    except SyntaxError:
+        raise CalculationError("Invalid mathematical expression")
+    if sum(1 for _ in ast.walk(tree)) > MAX_STEPS:
+        raise CalculationError("Expression is too complex")
+    constants, functions = [], set()
+    evaluate = _compile_node(tree.body, constants, functions)
+    return Template(evaluate, frozenset(functions), len(constants))
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression):
+    """Split an expression into its shape's Template and its numbers; both levels are cached"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError("Expression is too long")
+    numbers = NUMBER.findall(expression)
+    shape = NUMBER.sub("0", expression)
+    template = compile_template(shape)
+    # Literals the pattern does not lift (hex, 1_000) would be baked into the template
+    if template.arity != len(numbers):
+        raise CalculationError("Invalid mathematical expression")
+    constants = tuple(int(n) if n.isdigit() else float(n) for n in numbers)
+    return Compiled(shape, constants, template)
+
+# ==================== EVALUATION ====================
+
+def tidy(value):
+    """Whole floats become ints so '2 ** 0.5 * 2 ** 0.5' style answers read naturally"""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return int(value)
+    return value
+
+def evaluate(expression):
+    """Value of an arithmetic expression; raises CalculationError or ZeroDivisionError"""
+    compiled = compile_expression(expression.strip())
+    try:
+        return tidy(compiled.template.evaluate(compiled.constants, ScalarOps))
+    except (ValueError, TypeError) as e:
+        if isinstance(e, CalculationError):
+            raise
+        raise CalculationError(str(e))
+
+def _evaluate_result(expression):
+    try:
+        return Result(evaluate(expression), None)
+    except (CalculationError, ZeroDivisionError) as e:
+        return Result(None, e)
+
+def evaluate_many(expressions):
+    """
+    Batch mode: list of Result(value, error) in input order. Expressions that
+    share a shape are evaluated in one NumPy pass; anything NumPy cannot do
+    exactly (factorials, big integers, errors) falls back to evaluate().
+    """
+    results = [None] * len(expressions)
+    groups = {}
+    for position, expression in enumerate(expressions):
+        try:
+            compiled = compile_expression(expression.strip())
+        except CalculationError as e:
+            results[position] = Result(None, e)
+            continue
+        groups.setdefault(compiled.shape, []).append((position, compiled))
+
+    for members in groups.values():
+        template = members[0][1].template
+        if not NUMPY_AVAILABLE or len(members) < VECTOR_MIN_BATCH or template.functions - set(VECTOR_FUNCTIONS):
+            for position, _ in members:
+                results[position] = _evaluate_result(expressions[position])
+            continue
+
+        columns = [np.array(column, dtype=np.float64) for column in zip(*(c.constants for _, c in members))]
+        with np.errstate(all="ignore"):
+            values = np.broadcast_to(template.evaluate(columns, VectorOps), (len(members),))
+        for (position, _), value in zip(members, values.tolist()):
+            if math.isfinite(value) and abs(value) < 2 ** 53:
+                results[position] = Result(tidy(value), None)
+            else:
+                results[position] = _evaluate_result(expressions[position])
+    return results
+
+def is_expression(text):
+    """True if text reads as arithmetic rather than a lone number or prose, a cheap routing check"""
+    if not any(char.isdigit() for char in text):
+        return False
+    try:
+        compiled = compile_expression(normalize_expression(text.split(";")[0]))
+    except CalculationError:
+        return False
+    return compiled.shape != "0"
+
+def format_result(value):
+    if isinstance(value, float):
+        return f"{value:.10g}"
+    return str(value)
+
+def calculate(text):
+    """Answer text for a calculator command; several expressions can be separated by ';'"""
+    parts = [normalize_expression(part) for part in text.split(";")]
+    parts = [part for part in parts if part]
+    if not parts:
+        raise CalculationError("Invalid mathematical expression")
+    if len(parts) == 1:
+        return format_result(evaluate(parts[0]))
+    answers = []
+    for part, result in zip(parts, evaluate_many(parts)):
+        answers.append(f"{part} = {format_result(result.value) if result.error is None else f'error ({result.error})'}")
+    return "; ".join(answers)
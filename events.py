@@ -0,0 +1,86 @@
+"""
+ECHO AI - Event Broker
+In-process publish/subscribe used to push work that finishes after the request
+that started it (generated images, reminders) to the UI clients of the session
+that asked for it. Each subscriber gets its own bounded queue, and a short
+backlog lets a client that reconnects pick up the events it missed.
+
+A subscriber registered without a session (the standalone console) receives
+every event, and an event published for ALL_SESSIONS reaches every subscriber.
+"""
+
+import json
+import queue
+import threading
+from collections import deque, namedtuple
+
+Event = namedtuple("Event", ["id", "type", "data", "session_id"])
+
+# Session id of an event meant for everyone, e.g. a reminder set from the console
+ALL_SESSIONS = "*"
+
+def to_sse(event):
+    """Format an event as a Server-Sent Events message"""
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+def to_message(event):
+    """Format an event as a WebSocket JSON message"""
+    return json.dumps({"type": "event", "id": event.id, "event": event.type, "data": event.data})
+
+class EventBroker:
+    """Fan-out of published events to subscriber queues"""
+
+    def __init__(self, backlog=100, queue_size=256):
+        self.lock = threading.Lock()
+        self.subscribers = {}       # queue -> session id, None for every session
+        self.backlog = deque(maxlen=backlog)
+        self.queue_size = queue_size
+        self.next_id = 1
+
+    @staticmethod
+    def _wants(subscription, event):
+        return subscription is None or event.session_id in (subscription, ALL_SESSIONS)
+
+    def publish(self, event_type, data, session_id=None):
+        """Send an event to the session's subscribers, returns how many received it"""
+        with self.lock:
+            event = Event(self.next_id, event_type, data, session_id)
+            self.next_id += 1
+            self.backlog.append(event)
+            subscribers = [s for s, subscription in self.subscribers.items() if self._wants(subscription, event)]
+        for subscriber in subscribers:
+            self._deliver(subscriber, event)
+        return len(subscribers)
+
+    def _deliver(self, subscriber, event):
+        try:
+            subscriber.put_nowait(event)
+        except queue.Full:
+            # A stalled client loses its oldest event rather than blocking publishers
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            subscriber.put_nowait(event)
+
+    def subscribe(self, last_id=None, session_id=None):
+        """New subscriber queue for session_id, pre-filled with its backlog events after last_id"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            if last_id is not None:
+                for event in self.backlog:
+                    if event.id > last_id and self._wants(session_id, event):
+                        self._deliver(subscriber, event)
+            self.subscribers[subscriber] = session_id
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.pop(subscriber, None)
+
+    def has_subscribers(self, session_id=None):
+        """Whether an event for session_id would reach anyone"""
+        with self.lock:
+            return any(subscription is None or subscription == session_id for subscription in self.subscribers.values())
+
+broker = EventBroker()
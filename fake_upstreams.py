@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+ECHO AI - Local Stand-in Upstream Servers
+Fake Groq, Pollinations, exchangerate-api, dictionaryapi and OpenWeatherMap
+servers for offline load testing. Latency, error rate and payload size are
+configurable per service.
+
+Usage:
+    python fake_upstreams.py                           # defaults for every service
+    python fake_upstreams.py --latency 80 --jitter 30 --error-rate 0.02
+    python fake_upstreams.py --set groq.latency=900 --set pollinations.payload=500000
+
+Then start the assistant with the printed environment variables, e.g.
+    GROQ_BASE_URL=http://127.0.0.1:8101 ... python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Service name -> (default port, environment variable read by main.py)
+SERVICES = {
+    "groq": (8101, "GROQ_BASE_URL"),
+    "pollinations": (8102, "POLLINATIONS_BASE_URL"),
+    "exchangerate": (8103, "EXCHANGE_RATE_BASE_URL"),
+    "dictionary": (8104, "DICTIONARY_BASE_URL"),
+    "weather": (8105, "WEATHER_BASE_URL"),
+}
+
+# Default payload size per service: reply words, image bytes, currency count,
+# definition count and weather condition entries respectively
+DEFAULT_PAYLOADS = {
+    "groq": 60,
+    "pollinations": 150_000,
+    "exchangerate": 160,
+    "dictionary": 3,
+    "weather": 1,
+}
+
+class ServiceConfig:
+    """Behaviour knobs for one fake service"""
+    def __init__(self, latency=50.0, jitter=10.0, error_rate=0.0, payload=1):
+        self.latency = latency        # mean added latency in ms
+        self.jitter = jitter          # +/- uniform jitter in ms
+        self.error_rate = error_rate  # probability of a 500 response
+        self.payload = payload        # service-specific payload size
+
+    def delay(self):
+        ms = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        time.sleep(ms / 1000)
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+# ==================== PAYLOAD BUILDERS ====================
+
+WORDS = ("echo assistant voice answer quick local server latency simple clear "
+         "helpful friendly response question idea detail example").split()
+
+CURRENCIES = ["USD", "INR", "EUR", "GBP", "JPY", "AUD", "CAD", "CHF", "CNY", "SGD", "AED", "NZD"]
+
+def groq_payload(config, body):
+    model = body.get("model", "llama-3.3-70b-versatile")
+    content = " ".join(random.choice(WORDS) for _ in range(config.payload)).capitalize() + "."
+    return {
+        "id": f"chatcmpl-{random.getrandbits(48):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 50, "completion_tokens": config.payload, "total_tokens": 50 + config.payload},
+    }
+
+def groq_models_payload():
+    # Only what warmup's models.list() call needs to succeed
+    return {
+        "object": "list",
+        "data": [{"id": "llama-3.3-70b-versatile", "object": "model", "created": 0, "owned_by": "fake", "active": True}],
+    }
+
+def png_payload(size):
+    header = b"\x89PNG\r\n\x1a\n"
+    return header + bytes(max(0, size - len(header)))
+
+def exchange_payload(config, base):
+    rates = {code: round(random.uniform(0.5, 150), 4) for code in CURRENCIES}
+    rates[base] = 1.0
+    for i in range(max(0, config.payload - len(rates))):
+        rates[f"X{i:02d}"] = round(random.uniform(0.5, 150), 4)
+    return {"base": base, "date": time.strftime("%Y-%m-%d"), "time_last_updated": int(time.time()), "rates": rates}
+
+def dictionary_payload(config, word):
+    definitions = [
+        {"definition": f"Sense {i + 1} of the word {word}, used for load testing.", "synonyms": [], "antonyms": []}
+        for i in range(max(1, config.payload))
+    ]
+    return [{
+        "word": word,
+        "phonetics": [],
+        "meanings": [{"partOfSpeech": "noun", "definitions": definitions}],
+    }]
+
+def weather_payload(config, query):
+    # Looked up by name (q=) or by coordinates (lat= and lon=) like the real API
+    lat = float(query.get("lat", ["26.47"])[0])
+    lon = float(query.get("lon", ["80.35"])[0])
+    city = query.get("q", [f"{lat:.2f},{lon:.2f}" if "lat" in query else "Kanpur"])[0]
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": 721, "main": "Haze", "description": "haze", "icon": "50d"}] * max(1, config.payload),
+        "main": {
+            "temp": round(random.uniform(15, 38), 2),
+            "pressure": random.randint(995, 1020),
+            "humidity": random.randint(20, 90),
+        },
+        "wind": {"speed": round(random.uniform(0, 8), 2)},
+        "name": city,
+        "cod": 200,
+    }
+
+# ==================== REQUEST HANDLER ====================
+
+def make_handler(service, config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; with Nagle on, keep-alive
+        # clients would stall on delayed ACKs that real servers never cause
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status, body, content_type="application/json"):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def fail(self):
+            self.send_body(500, {"cod": 500, "message": f"fake {service} error", "error": "internal"})
+
+        def do_GET(self):
+            config.delay()
+            if config.should_fail():
+                return self.fail()
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.split("/") if p]
+
+            if service == "groq" and url.path.rstrip("/").endswith("/models"):
+                return self.send_body(200, groq_models_payload())
+            if service == "pollinations" and parts[:1] == ["prompt"]:
+                return self.send_body(200, png_payload(config.payload), "image/png")
+            if service == "exchangerate" and parts[:2] == ["v4", "latest"] and len(parts) == 3:
+                return self.send_body(200, exchange_payload(config, parts[2].upper()))
+            if service == "dictionary" and parts[:4] == ["api", "v2", "entries", "en"] and len(parts) == 5:
+                return self.send_body(200, dictionary_payload(config, parts[4]))
+            if service == "weather" and url.path.rstrip("/") == "/data/2.5/weather":
+                return self.send_body(200, weather_payload(config, parse_qs(url.query)))
+            self.send_body(404, {"cod": "404", "message": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length) if length else b"{}"
+            config.delay()
+            if config.should_fail():
+                return self.fail()
+            if service == "groq" and self.path.rstrip("/").endswith("/chat/completions"):
+                try:
+                    body = json.loads(raw or b"{}")
+                except ValueError:
+                    body = {}
+                return self.send_body(200, groq_payload(config, body))
+            self.send_body(404, {"error": {"message": "not found"}})
+
+    return Handler
+
+def start_servers(host="127.0.0.1", configs=None, ports=None):
+    """Start every fake service on a daemon thread, return {service: (server, base_url)}"""
+    configs = configs or {}
+    ports = ports or {}
+    running = {}
+    for service, (default_port, _) in SERVICES.items():
+        config = configs.get(service) or ServiceConfig(payload=DEFAULT_PAYLOADS[service])
+        server = ThreadingHTTPServer((host, ports.get(service, default_port)), make_handler(service, config))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"fake-{service}", daemon=True).start()
+        running[service] = (server, f"http://{host}:{server.server_address[1]}")
+    return running
+
+def parse_overrides(items, configs):
+    """Apply --set service.field=value overrides"""
+    for item in items or []:
+        key, _, value = item.partition("=")
+        service, _, field = key.partition(".")
+        if service not in configs or field not in ("latency", "jitter", "error_rate", "payload"):
+            raise SystemExit(f"Invalid override: {item}")
+        setattr(configs[service], field, int(value) if field == "payload" else float(value))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake upstream servers for ECHO load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--latency", type=float, default=50.0, help="mean added latency in ms")
+    parser.add_argument("--jitter", type=float, default=10.0, help="uniform latency jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500 response")
+    parser.add_argument("--set", action="append", metavar="SERVICE.FIELD=VALUE",
+                        help="per-service override, fields: latency, jitter, error_rate, payload")
+    args = parser.parse_args()
+
+    configs = {
+        service: ServiceConfig(args.latency, args.jitter, args.error_rate, DEFAULT_PAYLOADS[service])
+        for service in SERVICES
+    }
+    parse_overrides(args.set, configs)
+
+    running = start_servers(args.host, configs)
+    print("Fake upstream servers running. Point ECHO at them with:")
+    for service, (_, base_url) in running.items():
+        print(f"  export {SERVICES[service][1]}={base_url}")
+    print("  export GROQ_API_KEY=fake-key")
+    print("Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nStopping fake servers.")
+        for server, _ in running.values():
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+ECHO AI - Offline City Index
+Resolves city names in a command to coordinates from the bundled
+data/cities.json (names, aliases, country, coordinates, population), so the
+weather lookup never needs a geocoding round trip. Exact names and aliases
+are one dictionary lookup; misspellings ("banglore", "hydrabad") are
+matched through a trigram index and scored with difflib. When several
+cities share a name the most populous wins.
+
+ECHO_HOME_CITY (default Kanpur) is used when a command names no city.
+"""
+
+import difflib
+import json
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+CITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cities.json")
+HOME_CITY_NAME = os.getenv("ECHO_HOME_CITY", "Kanpur")
+FUZZY_THRESHOLD = 0.8
+# Shorter names are only matched exactly, 'la' is not a typo of 'lima'
+MIN_FUZZY_LENGTH = 4
+MAX_NAME_WORDS = 4
+MAX_CITIES = 8
+
+City = namedtuple("City", ["name", "country", "lat", "lon", "population"])
+
+# "weather in A, B and C", "forecast for A", "at A"
+PLACE_PATTERN = re.compile(r"\b(?:in|for|at)\s+(.+)$")
+SEPARATOR_PATTERN = re.compile(r"\s*(?:,|&|\band\b|\bplus\b)\s*")
+FILLER_PATTERN = re.compile(
+    r"\b(?:today|tonight|tomorrow|this|morning|afternoon|evening|week|weekend|right now|now|currently"
+    r"|moment|next|coming|upcoming|few|couple of|\d+|one|two|three|four|five|six|seven|ten|days?|hours?|weeks?"
+    r"|my|area|location|around|here|nearby|outside|local"
+    r"|please|weather|forecast|like|the|a|an)\b"
+)
+
+def normalize(text):
+    """Lowercase ASCII words: 'São Paulo!' -> 'sao paulo'"""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CityIndex:
+    def __init__(self, cities):
+        self.by_key = {}        # normalized name or alias -> [City], most populous first
+        self.grams = {}         # trigram -> keys containing it
+        for city in cities:
+            for key in {normalize(name) for name in [city[0], *city[-1]]}:
+                self.by_key.setdefault(key, []).append(City(*city[:5]))
+        for key, matches in self.by_key.items():
+            matches.sort(key=lambda c: -c.population)
+            if len(key) >= MIN_FUZZY_LENGTH:
+                for gram in trigrams(key):
+                    self.grams.setdefault(gram, set()).add(key)
+
+    @classmethod
+    def load(cls, path=CITIES_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        return cls([
+            (e["name"], e["country"], e["lat"], e["lon"], e.get("population", 0), e.get("aliases", []))
+            for e in entries
+        ])
+
+    def lookup(self, name):
+        """Best City for a name or a near miss of one, or None"""
+        key = normalize(name)
+        if key in self.by_key:
+            return self.by_key[key][0]
+        if len(key) < MIN_FUZZY_LENGTH:
+            return None
+        # Only keys sharing a trigram with the query are worth scoring
+        shared = {}
+        for gram in trigrams(key):
+            for candidate in self.grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        candidates = sorted(shared, key=lambda candidate: -shared[candidate])[:20]
+        scored = [(difflib.SequenceMatcher(None, key, candidate).ratio(), candidate) for candidate in candidates]
+        score, best = max(scored, default=(0.0, None))
+        return self.by_key[best][0] if score >= FUZZY_THRESHOLD else None
+
+    def scan(self, text):
+        """Cities named anywhere in text, exact names only, longest names first"""
+        words = normalize(text).split()
+        found = []
+        i = 0
+        while i < len(words):
+            for size in range(min(MAX_NAME_WORDS, len(words) - i), 0, -1):
+                matches = self.by_key.get(" ".join(words[i:i + size]))
+                if matches:
+                    found.append(matches[0])
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def resolve(self, text, limit=MAX_CITIES):
+        """
+        ([City], [names not found]) for the places a command mentions, in
+        order and without repeats; both empty when it names none ('at the
+        moment', 'for the next 3 days' and 'in my area' name none)
+        """
+        text = text.lower()
+        match = PLACE_PATTERN.search(text)
+        cities, unknown = [], []
+        if match:
+            for part in SEPARATOR_PATTERN.split(match.group(1)):
+                part = " ".join(FILLER_PATTERN.sub(" ", normalize(part)).split())
+                if not part:
+                    continue
+                city = self.lookup(part)
+                found = [city] if city else self.scan(part)
+                if found:
+                    cities.extend(found)
+                elif len(part.split()) <= MAX_NAME_WORDS:
+                    # Longer leftovers are a sentence, not a place name to apologize for
+                    unknown.append(part)
+        else:
+            cities = self.scan(text)
+        cities = list(dict.fromkeys(cities))
+        return cities[:limit], unknown
+
+cities = CityIndex.load()
+HOME_CITY = cities.lookup(HOME_CITY_NAME) or cities.lookup("Kanpur")
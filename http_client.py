@@ -0,0 +1,93 @@
+"""
+ECHO AI - Shared HTTP Client
+One requests.Session for every outbound integration, so connections to each
+upstream host are pooled and kept alive instead of paying TCP and TLS setup
+on every command. Idempotent GETs are retried on connection failures and
+throttling/gateway responses with exponential backoff and full jitter. Read
+timeouts are not retried, a slow upstream should not be waited out twice.
+
+Tuning (environment variables):
+    ECHO_HTTP_POOL_HOSTS        number of per-host pools kept (default 10)
+    ECHO_HTTP_POOL_SIZE         keep-alive connections per host (default 10)
+    ECHO_HTTP_CONNECT_TIMEOUT   seconds to establish a connection (default 3.05)
+    ECHO_HTTP_READ_TIMEOUT      default seconds to wait for a response (default 10)
+    ECHO_HTTP_RETRIES           extra attempts for a failed GET (default 2)
+    ECHO_HTTP_BACKOFF           base backoff in seconds (default 0.25)
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_HOSTS = int(os.getenv("ECHO_HTTP_POOL_HOSTS", "10"))
+POOL_SIZE = int(os.getenv("ECHO_HTTP_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.getenv("ECHO_HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("ECHO_HTTP_READ_TIMEOUT", "10"))
+RETRIES = int(os.getenv("ECHO_HTTP_RETRIES", "2"))
+BACKOFF = float(os.getenv("ECHO_HTTP_BACKOFF", "0.25"))
+MAX_BACKOFF = 4.0
+
+# Worth another attempt: throttled or a gateway in front of the service failed
+RETRY_STATUSES = {429, 502, 503, 504}
+
+class HTTPStats:
+    """Request, retry and failure counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    def add(self, field, amount=1):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def as_dict(self):
+        with self.lock:
+            return {"requests": self.requests, "retries": self.retries, "failures": self.failures}
+
+def create_session(pool_hosts=POOL_HOSTS, pool_size=POOL_SIZE):
+    """Session whose adapters keep up to pool_size idle connections per host"""
+    session = requests.Session()
+    # block=False: a burst beyond pool_size still gets (short-lived) connections
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=False)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "ECHO-AI"
+    return session
+
+session = create_session()
+stats = HTTPStats()
+
+def backoff_delay(attempt, base=BACKOFF):
+    """Full jitter: uniform between 0 and the exponential ceiling for this attempt"""
+    return random.uniform(0, min(MAX_BACKOFF, base * (2 ** attempt)))
+
+def get(url, timeout=None, retries=None, **kwargs):
+    """
+    GET through the shared session. timeout is the read timeout in seconds
+    (the connect timeout stays short); failed attempts are retried with
+    jittered backoff, and the last response or exception is returned/raised.
+    """
+    retries = RETRIES if retries is None else retries
+    timeout = (CONNECT_TIMEOUT, timeout or READ_TIMEOUT)
+    stats.add("requests")
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+        except requests.ConnectionError:
+            # Includes ConnectTimeout
+            if attempt == retries:
+                stats.add("failures")
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            response.close()
+        stats.add("retries")
+        time.sleep(backoff_delay(attempt))
@@ -0,0 +1,237 @@
+"""
+ECHO AI - Local Intent Classifier
+A multinomial naive Bayes model over character n-grams (plus whole words),
+trained at startup from the trigger phrases below and from the command log.
+It catches phrasings the keyword router misses ("how's it looking outside")
+and tells the router when a keyword hit is really a question for the AI
+("what is the time complexity of quicksort"), in a fraction of a millisecond
+instead of a multi-second LLM call.
+
+Commands routed to a local handler, by keyword or by the classifier, are
+appended to a JSON Lines log (ECHO_COMMAND_LOG, empty to turn it off) with
+the intent they went to; ones routed by an exact keyword are used as extra
+training examples on the next start. Chat messages for the AI are never
+logged. When the log outgrows its size limit it is rotated to '<log>.1',
+so at most two files are kept.
+
+Tuning: ECHO_INTENT_THRESHOLD (default 0.7) is the confidence below which the
+classifier's guess is ignored, ECHO_COMMAND_LOG_MB (default 5) the log size limit.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import deque, namedtuple
+
+import numpy as np
+
+INTENT_THRESHOLD = float(os.getenv("ECHO_INTENT_THRESHOLD", "0.7"))
+# A keyword that also appears in ordinary questions is overridden by a weaker 'chat' guess
+CHAT_OVERRIDE_THRESHOLD = 0.5
+# Sending a keyword hit to a different local handler needs a surer guess than routing
+# a command no keyword caught: a wrong override breaks a command that used to work
+KEYWORD_OVERRIDE_THRESHOLD = 0.9
+COMMAND_LOG = os.getenv("ECHO_COMMAND_LOG", "echo_command_log.jsonl")
+MAX_LOG_BYTES = int(float(os.getenv("ECHO_COMMAND_LOG_MB", "5")) * 1024 * 1024)
+MAX_LOGGED_EXAMPLES = 5000
+NGRAM_SIZES = (2, 3, 4, 5)
+SMOOTHING = 0.3
+# Naive Bayes log-odds grow with the number of features; scores are averaged
+# per feature and scaled by this before the softmax so confidences stay usable
+SHARPNESS = 6.0
+
+Intent = namedtuple("Intent", ["name", "confidence"])
+
+# Intents whose handlers need nothing from the command text, plus 'chat' for the AI
+TRAINING_PHRASES = {
+    "time": [
+        "time", "what time is it", "tell me the time", "current time", "what's the time",
+        "what's the time now", "do you know what time it is", "time please", "what does the clock say",
+        "check the clock", "what hour is it", "got the time", "time right now", "is it late",
+    ],
+    "date": [
+        "date", "what's the date", "what is the date today", "today's date", "what day is it",
+        "what day is it today", "which date is it", "what's today", "what day of the week is it",
+        "tell me the date", "current date", "what is today",
+    ],
+    "weather": [
+        "weather", "how's the weather", "what's the weather like", "is it going to rain",
+        "how's it looking outside", "what's it like outside", "what's the temperature outside",
+        "is it hot outside", "is it cold outside", "do i need an umbrella", "do i need a jacket",
+        "weather forecast", "how hot is it", "is it raining", "is it sunny today", "humidity outside",
+    ],
+    "battery": [
+        "battery", "battery status", "battery level", "how much battery do i have", "what's my charge at",
+        "how much charge is left", "is my laptop charging", "am i plugged in", "power level",
+        "check battery", "how long will my battery last", "is the charger connected", "charge level",
+    ],
+    "joke": [
+        "tell me a joke", "joke", "make me laugh", "say something funny", "know any jokes",
+        "i need a laugh", "cheer me up with a joke", "another joke", "tell me something funny",
+        "got any jokes", "crack a joke",
+    ],
+    "news": [
+        "news", "latest news", "headlines", "latest headlines", "what's happening in the world",
+        "read me an article", "give me the news", "any news today", "top stories", "news update",
+        "what's in the news", "read the headlines",
+    ],
+    "quote": [
+        "quote", "give me a quote", "motivate me", "inspire me", "say something inspirational",
+        "motivational quote", "inspirational quote", "quote of the day", "i need some motivation",
+    ],
+    "system_info": [
+        "system info", "system status", "how's my computer doing", "cpu usage", "how much memory is used",
+        "check disk space", "how is my pc performing", "ram usage", "how busy is the processor",
+        "computer stats", "how full is my disk",
+    ],
+    "list_notes": [
+        "list notes", "show notes", "show my notes", "my notes", "what are my notes", "read my notes",
+        "what did i note down", "read back my notes", "what notes do i have",
+    ],
+    "list_reminders": [
+        "list reminders", "show reminders", "my reminders", "what are my reminders",
+        "do i have any reminders", "show my timers", "list timers", "what reminders are set",
+        "any timers running", "what's on my reminder list",
+    ],
+    "help": [
+        "help", "help please", "what can you do", "what are your features", "show me the commands",
+        "how do i use you", "list your commands", "what commands do you know", "help me use echo",
+        "what can you help me with", "how can you help me", "show help", "help menu",
+    ],
+    "chat": [
+        "why is the sky blue", "who wrote hamlet", "explain quantum computing simply",
+        "what is the capital of france", "what is love", "what is machine learning",
+        "what is the time complexity of quicksort", "how much time does it take to learn piano",
+        "what is the best time to visit goa", "what date did world war two end",
+        "when was the date of independence of india", "help me write an email to my boss",
+        "can you help me plan a trip", "help me understand recursion", "tell me about the history of rome",
+        "what's the difference between a virus and bacteria", "write a poem about the sea",
+        "how do airplanes fly", "what should i cook for dinner", "give me ideas for a birthday party",
+        "explain how the news media shapes opinions", "summarize this article for me",
+        "why do people find cats funny", "what makes a joke funny", "how does a battery work",
+        "how do lithium batteries store energy", "what causes the weather to change",
+        "how do meteorologists predict the weather", "what's a good name for a dog",
+        "translate good morning to spanish", "how many planets are in the solar system",
+        "who is the prime minister of india", "recommend a good book", "how do i learn python",
+        "what is the meaning of life", "can you explain inflation", "is coffee bad for you",
+        "how tall is mount everest", "tell me a story about a dragon", "what do you think about ai",
+        "how are you", "hello", "good morning", "thank you", "what's your name",
+        "who made you", "i'm feeling sad today", "what is photosynthesis", "how far is the moon",
+        "what happened in 1947", "explain the theory of relativity", "give me tips for an interview",
+        "how to make tea", "what is a black hole", "why do we dream", "compare python and java",
+        "draw a comparison between cats and dogs", "what time zone is tokyo in",
+        "who won the cricket world cup in 2011", "who is the richest person in the world",
+        "when did the first man land on the moon", "what's the population of india",
+        "how old is the universe", "which is the largest ocean", "where is the eiffel tower",
+        "help me with my homework", "i need help choosing a laptop",
+        "how can i manage my time better", "is it a good time to buy a house", "when is diwali this year",
+        "what date is easter next year",
+    ],
+}
+
+def normalize(text):
+    text = text.lower().replace("’", "'")
+    return " ".join(re.findall(r"[a-z0-9']+", text))
+
+def grams(text):
+    """Character n-grams of the padded text plus its words"""
+    padded = f" {normalize(text)} "
+    features = {padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)}
+    features.update(f"w:{word}" for word in padded.split())
+    return features
+
+class IntentClassifier:
+    def __init__(self, labels, vocabulary, log_probs, exact=None):
+        self.labels = labels
+        self.vocabulary = vocabulary    # gram -> column
+        self.log_probs = log_probs      # (labels, columns) log P(gram | intent)
+        self.exact = exact or {}        # normalized training phrase -> intent
+
+    @classmethod
+    def train(cls, examples, smoothing=SMOOTHING):
+        """examples: iterable of (text, intent)"""
+        examples = list(examples)
+        labels = sorted({intent for _, intent in examples})
+        label_index = {label: i for i, label in enumerate(labels)}
+        vocabulary = {}
+        rows, columns = [], []
+        for text, intent in examples:
+            for gram in grams(text):
+                rows.append(label_index[intent])
+                columns.append(vocabulary.setdefault(gram, len(vocabulary)))
+        counts = np.zeros((len(labels), len(vocabulary)), dtype=np.float64)
+        np.add.at(counts, (rows, columns), 1.0)
+        # Uniform priors: 'chat' has the most examples but should not win by default
+        log_probs = np.log(counts + smoothing) - np.log(counts.sum(axis=1, keepdims=True) + smoothing * len(vocabulary))
+        exact = {normalize(text): intent for text, intent in examples}
+        return cls(labels, vocabulary, log_probs.astype(np.float32), exact)
+
+    def predict(self, text):
+        """Most likely Intent for text; unknown text gets a low confidence"""
+        if normalize(text) in self.exact:
+            return Intent(self.exact[normalize(text)], 1.0)
+        columns = [self.vocabulary[g] for g in grams(text) if g in self.vocabulary]
+        if not columns:
+            return Intent("chat", 0.0)
+        scores = self.log_probs[:, columns].sum(axis=1) * (SHARPNESS / len(columns))
+        scores = np.exp(scores - scores.max())
+        scores /= scores.sum()
+        best = int(scores.argmax())
+        return Intent(self.labels[best], float(scores[best]))
+
+# ==================== COMMAND LOG ====================
+
+_log_lock = threading.Lock()
+
+def log_command(command, intent, source, path=None):
+    """
+    Append a command a local handler answered; intent names that handler, source
+    is 'keyword' or 'classifier' for what routed it there
+    """
+    path = COMMAND_LOG if path is None else path
+    if not path:
+        return
+    line = json.dumps({"command": command, "intent": intent, "source": source, "dispatched": True}) + "\n"
+    try:
+        with _log_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+                full = f.tell() >= MAX_LOG_BYTES
+            if full:
+                os.replace(path, path + ".1")
+    except OSError as e:
+        print(f"Error logging command: {e}")
+
+def logged_examples(path=None, limit=MAX_LOGGED_EXAMPLES):
+    """
+    (command, intent) pairs from the log that an exact keyword routed to a known intent.
+    Rows without 'dispatched' were logged before routing, with the first keyword seen
+    rather than the handler that answered, and are not trusted
+    """
+    path = COMMAND_LOG if path is None else path
+    if not path:
+        return []
+    examples = deque(maxlen=limit)
+    # The rotated log first, so the newest examples are the ones kept
+    for log in (path + ".1", path):
+        if not os.path.exists(log):
+            continue
+        with open(log, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if (entry.get("dispatched") and entry.get("source") == "keyword"
+                        and entry.get("intent") in TRAINING_PHRASES):
+                    examples.append((entry["command"], entry["intent"]))
+    return list(examples)
+
+def build_classifier(log_path=None):
+    examples = [(phrase, intent) for intent, phrases in TRAINING_PHRASES.items() for phrase in phrases]
+    try:
+        examples += logged_examples(log_path)
+    except OSError as e:
+        print(f"Error reading command log: {e}")
+    return IntentClassifier.train(examples)
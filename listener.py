@@ -0,0 +1,222 @@
+"""
+ECHO AI - Microphone Input
+Persistent capture pipeline used by the standalone voice loop in main.py, so
+listening overlaps speech playback and no time is lost reopening the device.
+"""
+
+import array
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+try:
+    import speech_recognition as sr
+    SPEECH_RECOGNITION_AVAILABLE = True
+except ImportError:
+    SPEECH_RECOGNITION_AVAILABLE = False
+
+try:
+    from vad import EnergyVAD
+    VAD_AVAILABLE = True
+except ImportError:
+    VAD_AVAILABLE = False
+
+# While ECHO is talking the mic also hears the speakers, so barge-in needs
+# noticeably more energy than the normal speech threshold
+BARGE_IN_FACTOR = float(os.getenv("ECHO_BARGE_IN_FACTOR", "1.5"))
+
+def rms(data):
+    """Root mean square energy of 16-bit little-endian PCM"""
+    samples = array.array('h', data[:len(data) - len(data) % 2])
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+# text is the streamed transcript, or None when the phrase still needs recognizing
+Phrase = namedtuple("Phrase", ["audio", "text"])
+
+class ContinuousListener:
+    """
+    Long-lived capture pipeline for standalone mode.
+
+    The microphone is opened and calibrated once, then a background thread
+    reads it continuously. Quiet chunks go into a short ring buffer that is
+    prepended when speech starts, so the first syllable is never clipped even
+    if take_command() was not waiting yet. The energy threshold keeps adapting
+    to the room between phrases. Finished phrases are queued as Phrase tuples.
+
+    When NumPy is installed, speech/silence decisions come from the frame-level
+    VAD in vad.py instead of a single chunk energy threshold, so only real
+    speech segments ever reach the recognizer.
+
+    With a stream_factory (e.g. a recognizer backend's stream method) each
+    phrase is also decoded while it is being spoken, partial hypotheses go to
+    on_partial, and the queued Phrase already carries the final text.
+    """
+
+    def __init__(self, on_speech_start=None, threshold_factor=None, pre_roll=0.5,
+                 pause_threshold=0.8, min_phrase=0.3, phrase_time_limit=10, calibration=1.0,
+                 sample_rate=16000, stream_factory=None, on_partial=None, use_vad=True):
+        self.recognizer = sr.Recognizer()
+        self.on_speech_start = on_speech_start
+        self.sample_rate = sample_rate
+        self.stream_factory = stream_factory
+        self.on_partial = on_partial
+        # Callable so the factor can follow whether ECHO is currently talking
+        self.threshold_factor = threshold_factor or (lambda: 1.0)
+        self.pre_roll = pre_roll
+        self.pause_threshold = pause_threshold
+        self.min_phrase = min_phrase
+        self.phrase_time_limit = phrase_time_limit
+        self.calibration = calibration
+        self.phrases = queue.Queue()
+        self.vad = EnergyVAD(sample_rate) if use_vad and VAD_AVAILABLE else None
+        self.idle_cpu_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.source = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """Open the microphone, calibrate once and start the capture thread"""
+        if self.running:
+            return
+        self.source = sr.Microphone(sample_rate=self.sample_rate)
+        self.source.__enter__()
+        if self.vad:
+            chunks = int(math.ceil(self.calibration * self.source.SAMPLE_RATE / self.source.CHUNK))
+            self.vad.calibrate(b"".join(self.source.stream.read(self.source.CHUNK) for _ in range(chunks)))
+        else:
+            self.recognizer.adjust_for_ambient_noise(self.source, duration=self.calibration)
+        self.running = True
+        self.thread = threading.Thread(target=self._capture, name="mic-capture", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+        if self.source:
+            self.source.__exit__(None, None, None)
+        self.source = None
+        self.thread = None
+
+    def _adapt_threshold(self, energy, seconds_per_chunk):
+        # Same exponential moving average speech_recognition uses in listen()
+        damping = self.recognizer.dynamic_energy_adjustment_damping ** seconds_per_chunk
+        target = energy * self.recognizer.dynamic_energy_ratio
+        self.recognizer.energy_threshold = self.recognizer.energy_threshold * damping + target * (1 - damping)
+
+    def _is_speech(self, data, in_phrase, seconds_per_chunk):
+        factor = 1.0 if in_phrase else self.threshold_factor()
+        if self.vad:
+            return self.vad.is_speech(data, factor)
+        energy = rms(data)
+        if in_phrase:
+            return energy > self.recognizer.energy_threshold
+        if energy > self.recognizer.energy_threshold * factor:
+            return True
+        self._adapt_threshold(energy, seconds_per_chunk)
+        return False
+
+    def report(self):
+        """Idle CPU and VAD counters for the session so far"""
+        idle = (
+            f"Idle listening CPU: {self.idle_cpu_seconds:.3f}s over {self.idle_seconds:.1f}s "
+            f"({100 * self.idle_cpu_seconds / self.idle_seconds if self.idle_seconds else 0:.2f}%)"
+        )
+        return f"{idle}\n{self.vad.stats.report()}" if self.vad else idle
+
+    def _capture(self):
+        source = self.source
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        ring = deque(maxlen=max(1, int(math.ceil(self.pre_roll / seconds_per_chunk))))
+        pause_chunks = int(math.ceil(self.pause_threshold / seconds_per_chunk))
+        min_chunks = int(math.ceil(self.min_phrase / seconds_per_chunk))
+        limit_chunks = int(math.ceil(self.phrase_time_limit / seconds_per_chunk))
+        frames = None
+        session = None
+        silent = 0
+
+        while self.running:
+            try:
+                data = source.stream.read(source.CHUNK)
+            except Exception as e:
+                print(f"Microphone read error: {e}")
+                continue
+
+            if frames is None:
+                cpu_start = time.thread_time()
+                if self._is_speech(data, False, seconds_per_chunk):
+                    frames = list(ring) + [data]
+                    ring.clear()
+                    silent = 0
+                    if self.on_speech_start:
+                        self.on_speech_start()
+                    session = self._start_session(frames)
+                else:
+                    ring.append(data)
+                    self.idle_cpu_seconds += time.thread_time() - cpu_start
+                    self.idle_seconds += seconds_per_chunk
+                continue
+
+            frames.append(data)
+            self._feed_session(session, data)
+            silent = 0 if self._is_speech(data, True, seconds_per_chunk) else silent + 1
+            if silent >= pause_chunks or len(frames) >= limit_chunks:
+                voiced = len(frames) - silent
+                # Always close the stream, an open session holds the recognizer
+                text = self._finish_session(session)
+                if voiced >= min_chunks:
+                    # Keep a little trailing silence, recognizers like a soft ending
+                    keep = len(frames) - silent + min(silent, ring.maxlen)
+                    audio = sr.AudioData(b"".join(frames[:keep]), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    self.phrases.put(Phrase(audio, text))
+                    if self.vad:
+                        self.vad.stats.segments += 1
+                elif self.vad:
+                    # Too short to be a command: never sent to the recognizer
+                    self.vad.stats.rejected_segments += 1
+                frames = None
+                session = None
+
+    def _start_session(self, frames):
+        if not self.stream_factory:
+            return None
+        try:
+            session = self.stream_factory()
+            for chunk in frames:
+                self._feed_session(session, chunk)
+            return session
+        except Exception as e:
+            print(f"Streaming recognition error: {e}")
+            return None
+
+    def _feed_session(self, session, data):
+        if session is None:
+            return
+        try:
+            partial = session.feed(data)
+            if partial and self.on_partial:
+                self.on_partial(partial)
+        except Exception as e:
+            print(f"Streaming recognition error: {e}")
+
+    def _finish_session(self, session):
+        if session is None:
+            return None
+        try:
+            return session.finish()
+        except Exception as e:
+            print(f"Streaming recognition error: {e}")
+            return None
+
+    def listen(self, timeout=None):
+        """Next captured Phrase(audio, text), or None if nothing arrives within timeout"""
+        try:
+            return self.phrases.get(timeout=timeout)
+        except queue.Empty:
+            return None
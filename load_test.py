@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+ECHO AI - /command Load Generator
+Drives POST /command at a fixed arrival rate with a realistic command mix and
+reports latency percentiles and throughput. Run it against an instance that
+points at fake_upstreams.py so capacity planning never touches real APIs.
+
+Usage:
+    python fake_upstreams.py &
+    python app.py &                      # with the exported *_BASE_URL variables
+    python load_test.py --rps 20 --duration 60
+    python load_test.py --rps 50 --duration 30 --output load_results.json
+
+Each worker thread is one virtual user with its own requests.Session, and so
+its own echo_session cookie: chats from different users do not queue on one
+conversation's lock the way they would if every request shared a session.
+
+Every request comes from one address, so start the instance with
+ECHO_RATE_LIMIT=0 to measure capacity rather than the per-client rate limit;
+429 and 503 answers show up in the status codes.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# (weight, command) - roughly what a voice session looks like. Commands that
+# open the browser or grab the screen on the server are left out on purpose.
+COMMAND_MIX = [
+    (14, "what time is it"),
+    (8, "what's the date today"),
+    (12, "weather"),
+    (8, "convert 100 usd to inr"),
+    (4, "convert 10 km to miles"),
+    (6, "define serendipity"),
+    (6, "tell me a joke"),
+    (8, "calculate 12*(3+4)/7"),
+    (4, "give me a quote"),
+    (2, "help"),
+    (24, "why is the sky blue"),
+    (2, "generate image of a lighthouse at dusk"),
+    (2, "battery status"),
+]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(latencies):
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p90_ms": round(percentile(values, 90), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(values[-1], 2),
+        "mean_ms": round(statistics.fmean(values), 2),
+    }
+
+class LoadGenerator:
+    """Open-loop generator: requests are issued on schedule even if earlier ones are still running"""
+
+    def __init__(self, url, rps, duration, workers, timeout):
+        self.url = url
+        self.rps = rps
+        self.duration = duration
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.local = threading.local()  # one requests.Session per worker thread, a virtual user
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.by_command = defaultdict(list)
+        self.statuses = defaultdict(int)
+        self.errors = 0
+        self.weights = [w for w, _ in COMMAND_MIX]
+        self.commands = [c for _, c in COMMAND_MIX]
+
+    def user_session(self):
+        """This worker's session: its own cookies (server-side conversation) and connection"""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def fire(self, command, scheduled):
+        status = "error"
+        try:
+            response = self.user_session().post(self.url, json={"command": command}, timeout=self.timeout)
+            status = response.status_code
+        except requests.RequestException:
+            pass
+        # Measured from the scheduled start so queueing in the generator is not hidden
+        elapsed = (time.perf_counter() - scheduled) * 1000
+        with self.lock:
+            self.statuses[str(status)] += 1
+            if status == 200:
+                self.latencies.append(elapsed)
+                self.by_command[command].append(elapsed)
+            else:
+                self.errors += 1
+
+    def run(self):
+        interval = 1.0 / self.rps
+        total = int(self.rps * self.duration)
+        start = time.perf_counter()
+        futures = []
+        for i in range(total):
+            scheduled = start + i * interval
+            wait = scheduled - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            command = random.choices(self.commands, weights=self.weights)[0]
+            futures.append(self.executor.submit(self.fire, command, scheduled))
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        self.executor.shutdown()
+        return self.report(total, elapsed)
+
+    def report(self, sent, elapsed):
+        return {
+            "target_rps": self.rps,
+            "duration_s": round(elapsed, 2),
+            "sent": sent,
+            "succeeded": len(self.latencies),
+            "failed": self.errors,
+            "throughput_rps": round(len(self.latencies) / elapsed, 2) if elapsed else 0.0,
+            "status_codes": dict(self.statuses),
+            "latency": summarize(self.latencies),
+            "per_command": {command: summarize(values) for command, values in sorted(self.by_command.items())},
+        }
+
+def print_report(report):
+    latency = report["latency"]
+    print(f"\nSent {report['sent']} requests in {report['duration_s']}s "
+          f"(target {report['target_rps']} rps, achieved {report['throughput_rps']} rps)")
+    print(f"Succeeded: {report['succeeded']}  Failed: {report['failed']}  Status codes: {report['status_codes']}")
+    if latency.get("count"):
+        print(f"Latency p50 {latency['p50_ms']}ms | p90 {latency['p90_ms']}ms | p95 {latency['p95_ms']}ms | "
+              f"p99 {latency['p99_ms']}ms | max {latency['max_ms']}ms")
+    print("\nPer command:")
+    for command, stats in report["per_command"].items():
+        print(f"  {command:<40} n={stats['count']:<5} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for ECHO /command")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/command")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="test length in seconds")
+    parser.add_argument("--workers", type=int, default=64,
+                        help="max concurrent in-flight requests, one virtual user each")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.url, args.rps, args.duration, args.workers, args.timeout)
+    report = generator.run()
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,36 @@ import random
 import json
 from pathlib import Path
 import base64
+import threading
+import itertools
+import time
+import atexit
+import calendar
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from voice_text import normalize_for_voice
+from events import broker, ALL_SESSIONS
+from scheduler import Scheduler
+from calculator import calculate, CalculationError, is_expression
+from units import parse_conversion, convert, format_quantity, ConversionError
+from resilience import fetch, describe_age, UpstreamError, BreakerOpen, cached
+from sessions import SessionStore
+from retrieval import ConversationIndex, index_path
+import archive
+from warmup import Warmup
+from intents import build_classifier, log_command, INTENT_THRESHOLD, CHAT_OVERRIDE_THRESHOLD, KEYWORD_OVERRIDE_THRESHOLD
+from bulkheads import dispatch, BulkheadFull, BulkheadTimeout
+from admission import LOCAL, HEAVY
+import persistence
+import geo
 
 # Optional imports with error handling
+# Only checked here: the engine is created and owned by the TTS worker thread (tts.py)
 try:
     import pyttsx3
-    engine = pyttsx3.init()
     TTS_AVAILABLE = True
-    print("Text-to-speech module loaded (but will not be used by server for responses).")
+    print("Text-to-speech module available")
 except Exception as e:
     print(f"TTS not available: {e}")
     TTS_AVAILABLE = False
@@ -56,33 +79,194 @@ except ImportError:
     print("Camera functionality not available")
     CAMERA_AVAILABLE = False
 
+# ==================== UPSTREAM ENDPOINTS ====================
+# Point these at local stand-in servers (see fake_upstreams.py) for offline load testing
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # None uses the Groq client default
+POLLINATIONS_BASE_URL = os.getenv("POLLINATIONS_BASE_URL", "https://image.pollinations.ai")
+EXCHANGE_RATE_BASE_URL = os.getenv("EXCHANGE_RATE_BASE_URL", "https://api.exchangerate-api.com")
+DICTIONARY_BASE_URL = os.getenv("DICTIONARY_BASE_URL", "https://api.dictionaryapi.dev")
+WEATHER_BASE_URL = os.getenv("WEATHER_BASE_URL", "http://api.openweathermap.org")
+
+# Last-known-good cache lifetimes in seconds: (served as fresh, then served while refreshing)
+RATES_CACHE = (600, 3600)
+DEFINITION_CACHE = (86400, 86400)
+WEATHER_CACHE = (600, 1800)
+
 # ==================== CONVERSATION HISTORY ====================
 CONVERSATION_FILE = "conversation_history.json"
 
-def load_conversation():
-    """Load conversation history from file"""
-    if os.path.exists(CONVERSATION_FILE):
+def load_conversation(path=None):
+    """Load conversation history from file, moving turns older than ECHO_ARCHIVE_DAYS to the archive"""
+    path = path or CONVERSATION_FILE
+    if os.path.exists(path):
         try:
-            with open(CONVERSATION_FILE, 'r') as f:
-                return json.load(f)
+            with open(path, 'r') as f:
+                conversation = json.load(f)
         except:
             return []
+        try:
+            recent = archive.roll(conversation, path)
+        except Exception as e:
+            print(f"Error archiving conversation: {e}")
+            return conversation
+        if len(recent) < len(conversation):
+            save_conversation(recent, path)
+        return recent
     return []
 
-def save_conversation(conversation):
+def write_conversation(conversation, path=None):
+    """Write conversation history to file, errors are raised"""
+    persistence.write_json(path or CONVERSATION_FILE, conversation)
+
+def save_conversation(conversation, path=None):
     """Save conversation history to file"""
     try:
-        with open(CONVERSATION_FILE, 'w') as f:
-            json.dump(conversation, f, indent=2)
+        write_conversation(conversation, path)
     except Exception as e:
         print(f"Error saving conversation: {e}")
 
-def clear_conversation():
-    """Clear conversation history"""
-    if os.path.exists(CONVERSATION_FILE):
+# Messages sent to the model verbatim, older turns are only recalled when relevant
+RECENT_MESSAGES = 10
+# Turns indexed on the spot when a session's recall index is opened; a longer
+# backlog (first use of a big history) is indexed in the background
+RECALL_SYNC_INLINE = 2000
+# The recall index is saved again after this many new turns; turns indexed
+# since the last save are simply indexed again after a restart
+RECALL_SAVE_TURNS = int(os.getenv("ECHO_RECALL_SAVE_TURNS", "50"))
+
+# One history per browser session or API token, the default session (None) is CONVERSATION_FILE
+conversations = SessionStore(load_conversation, write_conversation)
+atexit.register(conversations.flush)
+
+def clear_conversation(session_id=None):
+    """Clear conversation history, archived days included"""
+    conversations.clear(session_id)
+    if session_id is None and os.path.exists(CONVERSATION_FILE):
         os.remove(CONVERSATION_FILE)
+    path = conversations.path_for(session_id) or CONVERSATION_FILE
+    archive.remove(path)
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
     return {"text": "Conversation history cleared. Starting fresh!"}
 
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+WEEKDAYS = [name.lower() for name in calendar.day_name]
+SHOW_CONVERSATION_PATTERN = re.compile(r'\b(?:conversation|chat)s? (?:from|on|of)\b')
+DAY_MONTH_PATTERNS = (
+    re.compile(r'(\d{1,2})(?:st|nd|rd|th)? (?:of )?([a-z]+),? ?(\d{4})?'),
+    re.compile(r'([a-z]+) (\d{1,2})(?:st|nd|rd|th)?,? ?(\d{4})?'),
+)
+MAX_SHOWN_TURNS = 20
+
+def parse_day(text, today=None):
+    """Date for 'today', 'yesterday', '3 days ago', 'last monday', '2025-03-12', '12 march', 'march 12 2025'"""
+    today = today or datetime.date.today()
+    text = text.lower()
+    if 'yesterday' in text:
+        return today - datetime.timedelta(days=1)
+    if 'today' in text:
+        return today
+    match = re.search(r'(\d+) days? ago', text)
+    if match:
+        return today - datetime.timedelta(days=int(match.group(1)))
+    for number, name in enumerate(WEEKDAYS):
+        if name in text:
+            return today - datetime.timedelta(days=(today.weekday() - number) % 7 or 7)
+    try:
+        match = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', text)
+        if match:
+            return datetime.date(*map(int, match.groups()))
+        for pattern in DAY_MONTH_PATTERNS:
+            for match in pattern.finditer(text):
+                first, second, year = match.groups()
+                day, month = (first, second) if first.isdigit() else (second, first)
+                if month not in MONTHS:
+                    continue
+                date = datetime.date(int(year) if year else today.year, MONTHS[month], int(day))
+                # Without a year, the most recent such date
+                if not year and date > today:
+                    date = date.replace(year=today.year - 1)
+                return date
+    except ValueError:
+        return None
+    return None
+
+def show_conversation(command, session_id=None):
+    """The conversation from one day, only that day's archive segment is read"""
+    day = parse_day(command)
+    if day is None:
+        return {"text": "Which day? Try 'show conversation from yesterday' or 'show conversation from 12 march'."}
+    path = conversations.path_for(session_id) or CONVERSATION_FILE
+    # The history first: loading it is what rolls old turns into the archive
+    with conversations.history(session_id, readonly=True) as history:
+        recent = [turn for turn in history if turn.get('timestamp', '').startswith(day.isoformat())]
+    try:
+        turns = archive.read_day(path, day) + recent
+    except Exception as e:
+        print(f"Error reading conversation archive: {e}")
+        turns = recent
+    when = day.strftime('%B %d, %Y')
+    if not turns:
+        return {"text": f"No conversation found from {when}."}
+    lines = [f"Conversation from {when} ({len(turns)} messages):"]
+    for turn in turns[:MAX_SHOWN_TURNS]:
+        speaker = "You" if turn.get('role') == 'user' else "ECHO"
+        content = turn.get('content', '')
+        if len(content) > 150:
+            content = content[:150].rsplit(' ', 1)[0] + "..."
+        lines.append(f"{turn.get('timestamp', '')[11:16]} {speaker}: {content}")
+    if len(turns) > MAX_SHOWN_TURNS:
+        lines.append(f"...and {len(turns) - MAX_SHOWN_TURNS} more.")
+    return {"text": "\n".join(lines)}
+
+# ==================== BACKGROUND JOBS ====================
+_job_ids = itertools.count(1)
+
+def publish_event(event_type, data, session_id=None):
+    """Push an event to the session's connected UI clients, returns how many received it"""
+    return broker.publish(event_type, data, session_id)
+
+def run_job(name, func, *args, session_id=None, pending_text="Working on it..."):
+    """
+    Run slow work in the background when a UI client of the requesting session
+    is connected to receive the result as a 'job' event, otherwise run it inline
+    and return the result
+    """
+    if not broker.has_subscribers(session_id):
+        return func(*args)
+
+    job_id = next(_job_ids)
+
+    def worker():
+        try:
+            result = func(*args)
+        except Exception as e:
+            print(f"Job {name} failed: {e}")
+            result = {"text": f"Sorry, the {name} job failed."}
+        publish_event("job", {"job_id": job_id, "name": name, "result": result}, session_id)
+
+    threading.Thread(target=worker, name=f"job-{name}-{job_id}", daemon=True).start()
+    return {"text": pending_text, "action": "job_started", "job_id": job_id}
+
+# ==================== BULKHEADS ====================
+
+def run_handler(kind, func, *args):
+    """
+    Run a command handler in its bulkhead ('network', 'ui', 'camera', 'cpu' or
+    'instant'), so a stalled upstream or device cannot hold up the other commands
+    """
+    try:
+        return dispatch(kind, func, *args)
+    except BulkheadFull as e:
+        print(f"Bulkhead full: {e}")
+        return {"text": f"I'm already handling too many {e.bulkhead.label} requests. Please try again in a moment.",
+                "action": "busy"}
+    except BulkheadTimeout as e:
+        print(f"Bulkhead timeout: {e}")
+        return {"text": f"That took too long to answer, so I gave up after {e.bulkhead.timeout:g} seconds. Please try again.",
+                "action": "timeout"}
+
 # ==================== AI IMAGE GENERATION ====================
 def generate_image(prompt):
     """
@@ -101,19 +285,30 @@ def generate_image(prompt):
         # Using Pollinations AI - FREE image generation
         # Encode prompt for URL
         encoded_prompt = requests.utils.quote(clean_prompt)
-        image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1024&height=1024&nologo=true"
+        image_url = f"{POLLINATIONS_BASE_URL}/prompt/{encoded_prompt}?width=1024&height=1024&nologo=true"
+        
+        # Download the image (fails fast while the image service's breaker is open)
+        def download():
+            response = http_client.get(image_url, timeout=30)
+            if response.status_code != 200:
+                raise UpstreamError(f"HTTP {response.status_code}")
+            return response.content
         
-        # Download the image
-        response = requests.get(image_url, timeout=30)
+        try:
+            content = fetch("pollinations", None, download).value
+        except BreakerOpen as e:
+            return {"text": f"Image generation is unavailable right now. Please try again in {e.breaker.retry_in():.0f} seconds."}
+        except UpstreamError:
+            content = None
         
-        if response.status_code == 200:
+        if content is not None:
             # Save the image
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"generated_{timestamp}.png"
             filepath = os.path.join("captures", filename)
             
             with open(filepath, 'wb') as f:
-                f.write(response.content)
+                f.write(content)
             
             return {
                 "text": f"Image generated successfully! Prompt: '{prompt}'",
@@ -131,33 +326,27 @@ def generate_image(prompt):
 
 # ==================== AI CONVERSATION HANDLER ====================
 def clean_response_for_voice(text):
-    """Clean AI response to be voice-friendly"""
-    # Remove markdown formatting
-    text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)  # Bold
-    text = re.sub(r'\*(.+?)\*', r'\1', text)      # Italic
-    text = re.sub(r'`(.+?)`', r'\1', text)        # Code
-    text = re.sub(r'#+\s+', '', text)             # Headers
-    
-    # Remove bullet points and list markers
-    text = re.sub(r'^\s*[-*•]\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-    
-    # Clean up excessive newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Remove any remaining special characters that sound weird
-    text = text.replace('|', '')
-    text = text.replace('---', '')
-    
-    return text.strip()
+    """Clean AI response to be voice-friendly (markdown stripped, numbers and units spelled out)"""
+    return normalize_for_voice(text)
 
-def get_ai_response(user_message, conversation_history):
+_groq_clients = {}
+_groq_lock = threading.Lock()
+
+def get_groq_client(api_key):
+    """One Groq client per key, so its connection pool stays warm between requests"""
+    with _groq_lock:
+        client = _groq_clients.get(api_key)
+        if client is None:
+            from groq import Groq
+            client = _groq_clients[api_key] = Groq(api_key=api_key, base_url=GROQ_BASE_URL)
+        return client
+
+def get_ai_response(user_message, conversation_history, index=None):
     """
     Get AI response using Groq API (FREE with generous limits)
+    index: ConversationIndex whose entries end with conversation_history, used to recall relevant older turns
     """
     try:
-        from groq import Groq
-        
         # Get API key
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
@@ -166,7 +355,7 @@ def get_ai_response(user_message, conversation_history):
                 "action": "error"
             }
         
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key)
         
         # Build conversation history for context
         messages = [
@@ -184,8 +373,15 @@ CRITICAL RULES:
             }
         ]
         
+        # Older turns relevant to this message, within the recall budget
+        if index is not None:
+            index.sync()
+            recalled = index.recall(user_message, before=len(index) - RECENT_MESSAGES)
+            if recalled:
+                messages.append({"role": "system", "content": recalled})
+        
         # Add conversation history (last 5 exchanges)
-        for entry in conversation_history[-10:]:  # Last 10 messages (5 exchanges)
+        for entry in conversation_history[-RECENT_MESSAGES:]:  # Last 10 messages (5 exchanges)
             messages.append({
                 "role": entry["role"],
                 "content": entry["content"]
@@ -223,8 +419,6 @@ CRITICAL RULES:
             "timestamp": datetime.datetime.now().isoformat()
         })
         
-        save_conversation(conversation_history)
-        
         return {"text": ai_response, "action": "ai_response"}
         
     except Exception as e:
@@ -248,6 +442,9 @@ def is_system_command(command):
         'play music', 'play ',
         'screenshot', 'take picture', 'photo',
         'generate image', 'create image', 'draw', 'make image',
+        # Before 'time': 'set timer for 5 minutes' is a timer, not the time
+        'remind me', 'list reminders', 'show reminders',
+        'timer', 'set timer', 'cancel reminder', 'cancel timer', 'reminder',
         'time', 'date',
         'weather',
         'battery',
@@ -255,8 +452,6 @@ def is_system_command(command):
         'system info', 'system status',
         'create file', 'read file',
         'note ', 'list notes', 'show notes',
-        'remind me', 'list reminders', 'show reminders',
-        'timer', 'set timer',
         'convert', 'calculate', 'what is',
         'define', 'meaning of',
         'joke', 'funny',
@@ -272,6 +467,23 @@ def is_system_command(command):
     
     return False, None
 
+# Trained once at startup from the built-in phrases and the command log
+intent_classifier = build_classifier()
+
+# Keywords that also turn up inside ordinary questions ('what is the time complexity
+# of quicksort'), for these the classifier can override the keyword
+AMBIGUOUS_KEYWORDS = {'time', 'date', 'funny', 'joke', 'news', 'article', 'help'}
+
+# Keyword -> classifier intent, commands routed by these are logged as training examples
+KEYWORD_INTENTS = {
+    'time': 'time', 'date': 'date', 'weather': 'weather', 'battery': 'battery',
+    'joke': 'joke', 'funny': 'joke', 'news': 'news', 'article': 'news',
+    'system info': 'system_info', 'system status': 'system_info',
+    'list notes': 'list_notes', 'show notes': 'list_notes',
+    'list reminders': 'list_reminders', 'show reminders': 'list_reminders',
+    'help': 'help',
+}
+
 # ==================== ADVANCED FEATURES ====================
 
 def get_system_info():
@@ -353,21 +565,17 @@ def add_note(command):
         if not note_text:
             return {"text": "Please provide note content."}
         
-        notes = []
-        if os.path.exists(NOTES_FILE):
-            with open(NOTES_FILE, 'r') as f:
-                notes = json.load(f)
-        
-        note = {
-            "id": len(notes) + 1,
-            "text": note_text,
-            "timestamp": datetime.datetime.now().isoformat()
-        }
-        
-        notes.append(note)
-        
-        with open(NOTES_FILE, 'w') as f:
-            json.dump(notes, f, indent=2)
+        # Kept in memory and written behind, a burst of notes is one write
+        notes_file = persistence.document(NOTES_FILE)
+        with notes_file.lock:
+            notes = notes_file.load()
+            note = {
+                "id": len(notes) + 1,
+                "text": note_text,
+                "timestamp": datetime.datetime.now().isoformat()
+            }
+            notes.append(note)
+            notes_file.changed()
         
         response = f"Note added: '{note_text}'"
         return {"text": response}
@@ -376,17 +584,15 @@ def add_note(command):
 
 def list_notes():
     try:
-        if not os.path.exists(NOTES_FILE):
-            return {"text": "You have no notes yet."}
-        
-        with open(NOTES_FILE, 'r') as f:
-            notes = json.load(f)
+        notes_file = persistence.document(NOTES_FILE)
+        with notes_file.lock:
+            notes = notes_file.load()[-5:]
         
         if not notes:
             return {"text": "You have no notes yet."}
         
         response = "Your notes:\n"
-        for note in notes[-5:]:
+        for note in notes:
             time_str = datetime.datetime.fromisoformat(note['timestamp']).strftime("%m/%d %I:%M %p")
             response += f"{note['id']}. {note['text']} ({time_str})\n"
         
@@ -415,55 +621,44 @@ def convert_currency(command):
         from_curr = currency_map.get(from_curr, from_curr)
         to_curr = currency_map.get(to_curr, to_curr)
         
-        url = f"https://api.exchangerate-api.com/v4/latest/{from_curr}"
-        response = requests.get(url, timeout=10)
+        def fetch_rates():
+            response = http_client.get(f"{EXCHANGE_RATE_BASE_URL}/v4/latest/{from_curr}", timeout=10)
+            if response.status_code == 404:
+                return None  # unknown base currency, the service itself is fine
+            if response.status_code != 200:
+                raise UpstreamError(f"HTTP {response.status_code}")
+            return response.json()['rates']
         
-        if response.status_code == 200:
-            data = response.json()
-            rate = data['rates'].get(to_curr)
-            if rate:
-                result = amount * rate
-                response_text = f"{amount} {from_curr} = {result:.2f} {to_curr}"
-                return {"text": response_text}
-            else:
-                return {"text": f"Currency {to_curr} not found."}
-        else:
+        try:
+            rates = fetch("exchangerate", f"rates:{from_curr}", fetch_rates, *RATES_CACHE)
+        except (UpstreamError, BreakerOpen):
             return {"text": "Currency conversion service unavailable."}
+        
+        if rates.value is None:
+            return {"text": f"Currency {from_curr} not found."}
+        rate = rates.value.get(to_curr)
+        if rate:
+            result = amount * rate
+            response_text = f"{amount} {from_curr} = {result:.2f} {to_curr}"
+            if rates.stale:
+                response_text += f" (rates from {describe_age(rates.age)}, exchange service unavailable)"
+            return {"text": response_text, "stale": rates.stale}
+        else:
+            return {"text": f"Currency {to_curr} not found."}
     except Exception as e:
         return {"text": f"Currency conversion error: {str(e)}"}
 
 def convert_unit(command):
+    """Any pair of units in the same dimension, resolved from the precomputed table in units.py"""
     try:
-        match = re.search(r'(\d+(?:\.\d+)?)\s*(\w+)\s+to\s+(\w+)', command, re.IGNORECASE)
-        if not match:
+        parsed = parse_conversion(command)
+        if not parsed:
             return {"text": "Usage: convert <amount> <from_unit> to <to_unit>"}
-        
-        amount = float(match.group(1))
-        from_unit = match.group(2).lower()
-        to_unit = match.group(3).lower()
-        
-        distance_conversions = {
-            ('km', 'miles'): 0.621371,
-            ('miles', 'km'): 1.60934,
-            ('m', 'feet'): 3.28084,
-            ('feet', 'm'): 0.3048,
-            ('cm', 'inches'): 0.393701,
-            ('inches', 'cm'): 2.54
-        }
-        
-        if from_unit in ['celsius', 'c'] and to_unit in ['fahrenheit', 'f']:
-            result = (amount * 9/5) + 32
-            return {"text": f"{amount}°C = {result:.1f}°F"}
-        elif from_unit in ['fahrenheit', 'f'] and to_unit in ['celsius', 'c']:
-            result = (amount - 32) * 5/9
-            return {"text": f"{amount}°F = {result:.1f}°C"}
-        
-        conversion_key = (from_unit, to_unit)
-        if conversion_key in distance_conversions:
-            result = amount * distance_conversions[conversion_key]
-            return {"text": f"{amount} {from_unit} = {result:.2f} {to_unit}"}
-        
-        return {"text": f"Conversion from {from_unit} to {to_unit} not supported."}
+        amount, from_unit, to_unit = parsed
+        result = convert(amount, from_unit, to_unit)
+        return {"text": f"{format_quantity(amount, from_unit)} = {format_quantity(result, to_unit)}"}
+    except ConversionError as e:
+        return {"text": str(e)}
     except Exception as e:
         return {"text": f"Unit conversion error: {str(e)}"}
 
@@ -487,22 +682,184 @@ def define_word(command):
         if not word:
             return {"text": "Please specify a word to define."}
         
-        url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
-        response = requests.get(url, timeout=10)
+        def lookup():
+            response = http_client.get(f"{DICTIONARY_BASE_URL}/api/v2/entries/en/{word}", timeout=10)
+            if response.status_code == 404:
+                return None  # no such word
+            if response.status_code != 200:
+                raise UpstreamError(f"HTTP {response.status_code}")
+            meaning = response.json()[0]['meanings'][0]
+            return {"definition": meaning['definitions'][0]['definition'], "part_of_speech": meaning['partOfSpeech']}
         
-        if response.status_code == 200:
-            data = response.json()[0]
-            meaning = data['meanings'][0]
-            definition = meaning['definitions'][0]['definition']
-            part_of_speech = meaning['partOfSpeech']
-            
-            result = f"{word.capitalize()} ({part_of_speech}): {definition}"
-            return {"text": result}
+        try:
+            entry = fetch("dictionary", f"define:{word.lower()}", lookup, *DEFINITION_CACHE)
+        except (UpstreamError, BreakerOpen):
+            return {"text": "Dictionary service unavailable. Please try again later."}
+        
+        if entry.value:
+            result = f"{word.capitalize()} ({entry.value['part_of_speech']}): {entry.value['definition']}"
+            if entry.stale:
+                result += f" (from {describe_age(entry.age)}, dictionary service unavailable)"
+            return {"text": result, "stale": entry.stale}
         else:
             return {"text": f"Could not find definition for '{word}'."}
     except Exception as e:
         return {"text": f"Definition lookup error: {str(e)}"}
 
+# ==================== REMINDERS & TIMERS ====================
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5,
+    'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'fifteen': 15,
+    'twenty': 20, 'thirty': 30, 'forty five': 45, 'half an': 0.5, 'half a': 0.5,
+}
+DURATION_UNITS = {'second': 1, 'sec': 1, 'minute': 60, 'min': 60, 'hour': 3600, 'hr': 3600, 'day': 86400}
+DURATION_AMOUNT = r"\d+(?:\.\d+)?|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True))
+DURATION_UNIT = r"second|sec|minute|min|hour|hr|day"
+DURATION_PATTERN = re.compile(rf"\b({DURATION_AMOUNT})[\s-]*({DURATION_UNIT})s?\b")
+# 'in 10 minutes', 'after an hour and 30 minutes': without the lead-in 'a day' in
+# 'buy a day pass' would be a duration
+LEAD_IN_DURATION_PATTERN = re.compile(
+    rf"\b(?:in|for|after)\s+(?:{DURATION_AMOUNT})[\s-]*(?:{DURATION_UNIT})s?\b"
+    rf"(?:(?:\s*,\s*|\s+and\s+|\s+)(?:{DURATION_AMOUNT})[\s-]*(?:{DURATION_UNIT})s?\b)*"
+)
+CLOCK_PATTERN = re.compile(r"\bat (\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?")
+
+reminder_scheduler = None
+
+def parse_duration(text, lead_in=False):
+    """
+    Total seconds of every 'N unit' phrase in text and the text without them; with
+    lead_in only phrases after 'in', 'for' or 'after' count
+    """
+    pattern = LEAD_IN_DURATION_PATTERN if lead_in else DURATION_PATTERN
+    total = 0
+    for phrase in pattern.finditer(text):
+        for amount, unit in DURATION_PATTERN.findall(phrase.group()):
+            value = NUMBER_WORDS[amount] if amount in NUMBER_WORDS else float(amount)
+            total += value * DURATION_UNITS[unit]
+    return total, pattern.sub('', text)
+
+def parse_clock(text, now=None):
+    """Next datetime for an 'at 5pm' / 'at 17:30' phrase (tomorrow if asked), or None"""
+    match = CLOCK_PATTERN.search(text)
+    if not match:
+        return None, text
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or '').replace('.', '')
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None, text
+    now = now or datetime.datetime.now()
+    due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if 'tomorrow' in text or due <= now:
+        due += datetime.timedelta(days=1)
+    return due, CLOCK_PATTERN.sub('', text).replace('tomorrow', '')
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    parts = []
+    for name, size in (('day', 86400), ('hour', 3600), ('minute', 60), ('second', 1)):
+        count, seconds = divmod(seconds, size)
+        if count:
+            parts.append(f"{count} {name}{'s' if count != 1 else ''}")
+    return " ".join(parts) or "0 seconds"
+
+def reminder_text(rest):
+    """What is left of the command once the time phrase is gone is the reminder itself"""
+    words = re.sub(r"\bremind me\b", '', rest).split()
+    while words and words[-1] in ('in', 'at', 'after', 'for', 'and'):
+        words.pop()
+    while words and words[0] in ('in', 'at', 'after', 'to', 'about', 'that'):
+        words.pop(0)
+    return " ".join(words).strip(" .,")
+
+def deliver_reminder(item):
+    """Scheduler callback: push a due reminder or timer to connected clients"""
+    if item['kind'] == 'timer':
+        text = f"⏰ Time's up! Your {item['text']} is done."
+    else:
+        text = f"⏰ Reminder: {item['text']}"
+    late = time.time() - item['due']
+    if late > 60:
+        text += f" (due {format_duration(late)} ago)"
+    print(text)
+    # Set from the console (or saved before sessions): no one session owns it, show it everywhere
+    session_id = item.get('session')
+    publish_event("reminder", {"text": text, "action": "reminder", "reminder": item},
+                  ALL_SESSIONS if session_id is None else session_id)
+
+def start_reminders():
+    """Load saved reminders and start the scheduler thread; safe to call more than once"""
+    global reminder_scheduler
+    if reminder_scheduler is None:
+        reminder_scheduler = Scheduler(deliver_reminder)
+        count = reminder_scheduler.load()
+        if count:
+            print(f"Loaded {count} pending reminders")
+        reminder_scheduler.start()
+    return reminder_scheduler
+
+def set_reminder(command, session_id=None):
+    command_lower = command.lower()
+    # An explicit clock time wins: 'take a 5 minute break at 3 pm' is due at 3 pm
+    due, rest = parse_clock(command_lower)
+    if due is None:
+        seconds, rest = parse_duration(command_lower, lead_in=True)
+        if seconds:
+            due = datetime.datetime.now() + datetime.timedelta(seconds=seconds)
+    if due is None:
+        return {"text": "When should I remind you? Try 'remind me to call mom in 10 minutes' or 'at 5 pm'."}
+
+    text = reminder_text(rest) or "your reminder"
+    item = start_reminders().schedule(due.timestamp(), text, 'reminder', session_id)
+    return {"text": f"Okay, reminder {item['id']} set for {due.strftime('%I:%M %p')}: {text}."}
+
+def set_timer(command, session_id=None):
+    seconds, _ = parse_duration(command.lower())
+    if not seconds:
+        return {"text": "How long should the timer be? Try 'set timer for 5 minutes'."}
+    label = f"{format_duration(seconds)} timer"
+    item = start_reminders().schedule(time.time() + seconds, label, 'timer', session_id)
+    return {"text": f"Timer set for {format_duration(seconds)} (timer {item['id']})."}
+
+def list_reminders(session_id=None, kind=None):
+    scheduler = start_reminders()
+    items = scheduler.pending(kind, limit=10, session_id=session_id)
+    noun = f"{kind}s" if kind else "reminders or timers"
+    if not items:
+        return {"text": f"You have no pending {noun}."}
+    now = time.time()
+    response = f"Your {noun}:\n"
+    for item in items:
+        due = datetime.datetime.fromtimestamp(item['due']).strftime("%m/%d %I:%M %p")
+        response += f"{item['id']}. {item['text']} at {due} (in {format_duration(max(0, item['due'] - now))})\n"
+    total = len(scheduler.pending(kind, session_id=session_id))
+    if total > len(items):
+        response += f"...and {total - len(items)} more."
+    return {"text": response}
+
+def cancel_reminder(command, session_id=None):
+    command_lower = command.lower()
+    scheduler = start_reminders()
+    kind = 'timer' if 'timer' in command_lower else 'reminder'
+    if ' all ' in f" {command_lower} ":
+        count = scheduler.cancel_all(kind, session_id)
+        return {"text": f"Cancelled {count} {kind}{'s' if count != 1 else ''}."}
+
+    number = re.search(r"\d+", command_lower)
+    if number:
+        item = scheduler.cancel(int(number.group()), session_id)
+    else:
+        # No number given: cancel the one that is due soonest
+        upcoming = scheduler.pending(kind, limit=1, session_id=session_id)
+        item = scheduler.cancel(upcoming[0]['id'], session_id) if upcoming else None
+    if item is None:
+        return {"text": f"I couldn't find that {kind}."}
+    return {"text": f"Cancelled {item['kind']} {item['id']}: {item['text']}."}
+
 # ==================== EXISTING FUNCTIONS ====================
 
 def tell_time():
@@ -561,15 +918,31 @@ def google_search(query):
         error_msg = f"Error opening search: {str(e)}"
         return {"text": error_msg}
 
-def get_weather():
+def weather_cache_key(city):
+    return f"weather:{city.name.lower()},{city.country.lower()}"
+
+# Cities in one 'weather in A, B and C' command are fetched side by side
+weather_pool = ThreadPoolExecutor(max_workers=geo.MAX_CITIES, thread_name_prefix="weather")
+
+def city_weather(city):
+    """Weather report for one geo.City, from the weather cache while it is fresh"""
     try:
-        city_name = "Kanpur"
         api_key = os.getenv("WEATHER_API_KEY", "e978b3f1a04094cec994b3ad2757ece7")
-        base_url = "http://api.openweathermap.org/data/2.5/weather?"
-        complete_url = f"{base_url}q={city_name}&appid={api_key}&units=metric"
+        base_url = f"{WEATHER_BASE_URL}/data/2.5/weather?"
+        complete_url = f"{base_url}lat={city.lat}&lon={city.lon}&appid={api_key}&units=metric"
+
+        def fetch_weather():
+            response = http_client.get(complete_url, timeout=10)
+            if response.status_code != 200:
+                # Error payloads (bad key, unknown place) must not be cached as the last good report
+                raise UpstreamError(f"HTTP {response.status_code}: {response.text[:200]}")
+            return response.json()
 
-        response = requests.get(complete_url, timeout=10)
-        data = response.json()
+        try:
+            weather = fetch("weather", weather_cache_key(city), fetch_weather, *WEATHER_CACHE)
+        except (UpstreamError, BreakerOpen):
+            return {"text": f"Weather service unavailable for {city.name}. Please try again later."}
+        data = weather.value
 
         if data.get('cod') == 200:
             main_data = data['main']
@@ -583,18 +956,35 @@ def get_weather():
             wind_speed = wind_data.get('speed', 0)
 
             weather_report = (
-                f"Weather in {city_name}: {temperature}°C with {weather_description}. "
+                f"Weather in {city.name}: {temperature}°C with {weather_description}. "
                 f"Humidity: {humidity}%, Pressure: {pressure} hPa, Wind: {wind_speed} m/s."
             )
-            return {"text": weather_report}
+            if weather.stale:
+                weather_report += f" (Last updated {describe_age(weather.age)}, weather service unavailable.)"
+            return {"text": weather_report, "stale": weather.stale}
         else:
             error_message = data.get('message', 'Weather service unavailable')
-            response = f"Weather error: {error_message}"
+            response = f"Weather error for {city.name}: {error_message}"
             return {"text": response}
     except Exception as e:
         error_msg = f"Weather error: {str(e)}"
         return {"text": error_msg}
 
+def get_weather(command=None):
+    """Weather for the cities named in the command (resolved offline), or the home city"""
+    cities, unknown = geo.cities.resolve(command or "")
+    if unknown and not cities:
+        return {"text": f"Sorry, I don't know a city called '{unknown[0]}'."}
+    cities = cities or [geo.HOME_CITY]
+    if len(cities) == 1:
+        reports = [city_weather(cities[0])]
+    else:
+        reports = list(weather_pool.map(city_weather, cities))
+    text = "\n".join(report["text"] for report in reports)
+    if unknown:
+        text += "\nI couldn't find " + ", ".join(f"'{name}'" for name in unknown) + "."
+    return {"text": text, "stale": any(report.get("stale") for report in reports)}
+
 def get_article():
     try:
         webbrowser.open("https://news.google.com")
@@ -624,18 +1014,19 @@ def battery_status():
         return {"text": error_msg}
 
 def safe_calculate(expression):
+    """Evaluate a calculator command with the bounded AST engine in calculator.py (no eval)"""
     try:
-        expression = re.sub(r'\b(calculate|what is)\b', '', expression, flags=re.IGNORECASE).strip()
-        math_pattern = re.compile(r'^[\s0-9+\-*/.()]+$')
-        if not expression or not math_pattern.match(expression):
-            return "Invalid mathematical expression"
-        result = eval(expression, {"__builtins__": {}}, {})
-        return str(result)
+        return calculate(expression)
     except ZeroDivisionError:
         return "Error: Division by zero"
-    except Exception as e:
+    except CalculationError as e:
+        if str(e) == "Invalid mathematical expression":
+            return str(e)
         return f"Calculation error: {str(e)}"
 
+def calculate_command(command):
+    return {"text": f"The result is: {safe_calculate(command)}"}
+
 def open_application(app_name):
     try:
         system = platform.system().lower()
@@ -718,8 +1109,320 @@ def get_joke():
     
     return {"text": joke}
 
-def execute_command(command):
-    """Main command execution function with AI conversation support"""
+# Web shortcuts: trigger phrase -> (url, spoken response)
+WEB_APPS = {
+    'open google': ("https://www.google.co.in/", "Opening Google for you..."),
+    'open youtube': ("https://www.youtube.com/", "Opening YouTube..."),
+    'open chatgpt': ("https://chat.openai.com/", "Opening ChatGPT..."),
+    'open whatsapp': ("https://web.whatsapp.com/", "Opening WhatsApp Web..."),
+    'open github': ("https://github.com/", "Opening GitHub..."),
+    'open spotify': ("https://open.spotify.com/", "Opening Spotify..."),
+    'open gmail': ("https://mail.google.com/", "Opening Gmail..."),
+}
+
+def open_web_app(phrase):
+    url, response = WEB_APPS[phrase]
+    webbrowser.open(url)
+    return {"text": response, "action": "web_opened"}
+
+GOODBYE_MESSAGE = "Goodbye! ECHO signing off. Have a wonderful day!"
+
+# Responses that never change, pre-rendered by the TTS phrase cache at startup
+FIXED_RESPONSES = [response for _, response in WEB_APPS.values()] + [
+    GOODBYE_MESSAGE,
+    "Opening Google News for latest articles.",
+    "Conversation history cleared. Starting fresh!",
+    "Please provide a command.",
+    "Screenshot saved successfully",
+    "Picture captured successfully",
+    "Calculator opened successfully",
+    "Please specify what you want to search for.",
+    "Please provide a description for the image you want to generate.",
+] + [f"Opening {track} on YouTube..." for track in music]
+
+def show_help():
+    response = (
+        "I can help you with:\n\n"
+        "💬 CONVERSATIONAL AI:\n"
+        "- Ask me anything! I can answer questions, help with problems, write content, explain concepts, and have natural conversations.\n"
+        "- Just chat naturally - I remember our conversation context.\n\n"
+        "🎨 AI IMAGE GENERATION (NEW!):\n"
+        "- 'generate image of [description]'\n"
+        "- 'create image of a sunset over mountains'\n"
+        "- 'draw me a futuristic city'\n\n"
+        "🛠️ SYSTEM COMMANDS:\n"
+        "⏰ Time & Date: 'time', 'date'\n"
+        "🎵 Music: 'play [song name]'\n"
+        "🌐 Web: 'open google/youtube/github/spotify/gmail'\n"
+        "🔍 Search: 'search [query]'\n"
+        "📰 News: 'news', 'article', 'headlines'\n"
+        "🌤️ Weather: 'weather', 'weather in London', 'weather in Delhi, Mumbai and Pune'\n"
+        "🔋 Battery: 'battery status'\n"
+        "📸 Capture: 'screenshot', 'take picture'\n"
+        "🧮 Calculate: 'calculate 2+2', 'what is 10*5', 'calculate sqrt(16) + 2^3'\n"
+        "📝 Notes: 'note [text]', 'list notes'\n"
+        "⏰ Reminders: 'remind me to [task] in 10 minutes / at 5 pm', 'set timer for 5 minutes', 'list reminders', 'cancel reminder [number]'\n"
+        "💱 Convert: 'convert 100 usd to inr', 'convert 5 km to feet', 'convert 2 cups to ml'\n"
+        "📖 Dictionary: 'define [word]'\n"
+        "💻 System: 'system info'\n"
+        "📁 Files: 'create file [name] with [content]'\n"
+        "😂 Jokes: 'tell me a joke'\n"
+        "🗂️ History: 'show conversation from yesterday', 'show conversation from 12 march'\n"
+        "🔄 Clear Chat: 'clear conversation'"
+    )
+    return {"text": response}
+
+# Handlers reachable from the intent classifier, with the bulkhead each one runs in;
+# apart from PLACE_INTENTS they need nothing from the command text
+INTENT_HANDLERS = {
+    "time": ("instant", tell_time),
+    "date": ("instant", tell_date),
+    "weather": ("network", get_weather),
+    "battery": ("instant", battery_status),
+    "joke": ("instant", get_joke),
+    "news": ("ui", get_article),
+    "quote": ("instant", get_quote),
+    "system_info": ("cpu", get_system_info),
+    "list_notes": ("instant", list_notes),
+    "list_reminders": ("instant", list_reminders),
+    "help": ("instant", show_help),
+}
+
+IMAGE_TRIGGERS = ['generate image', 'create image', 'draw me', 'make image', 'generate picture']
+
+def command_cost(command):
+    """
+    'heavy' for commands that go to the LLM or generate an image, 'local' for
+    the rest; the same routing as execute_command, without running anything
+    """
+    command_lower = command.lower()
+    if SHOW_CONVERSATION_PATTERN.search(command_lower):
+        return LOCAL
+    is_command, command_type = is_system_command(command)
+    if command_type == 'what is' and not is_expression(command):
+        is_command = False  # 'what is love' is a question for the AI
+    if is_command and any(phrase in command_lower for phrase in IMAGE_TRIGGERS):
+        return HEAVY
+    if is_command and command_type not in AMBIGUOUS_KEYWORDS:
+        return LOCAL
+    intent = intent_classifier.predict(command)
+    if is_command:
+        # An ambiguous keyword only goes to the LLM when the classifier calls it chat
+        chat_override = intent.name == 'chat' and intent.confidence >= CHAT_OVERRIDE_THRESHOLD
+        return HEAVY if chat_override and not is_expression(command) else LOCAL
+    if intent.name in INTENT_HANDLERS and intent.confidence >= INTENT_THRESHOLD:
+        return LOCAL
+    return HEAVY
+
+# Intents whose handler also reads place names from the command
+PLACE_INTENTS = {"weather"}
+# Intents whose handler only sees the requesting session's data
+SESSION_INTENTS = {"list_reminders"}
+
+def run_intent(name, command, session_id=None):
+    kind, handler = INTENT_HANDLERS[name]
+    if name in PLACE_INTENTS:
+        return run_handler(kind, handler, command)
+    if name in SESSION_INTENTS:
+        return run_handler(kind, handler, session_id)
+    return run_handler(kind, handler)
+
+_recall_builds = set()     # session ids whose recall index is being built
+_recall_builds_lock = threading.Lock()
+
+def save_recall_index(session, index):
+    try:
+        index.save(index_path(session.path or CONVERSATION_FILE))
+    except Exception as e:
+        print(f"Error saving recall index: {e}")
+
+def build_recall_index(session, index):
+    """Background: index the backlog off the session lock, then hand the index to the session"""
+    try:
+        index.sync()
+        with session.lock:
+            # Unless the conversation was cleared meanwhile
+            if session.index is None and index.entries.history is session.history:
+                save_recall_index(session, index)
+                session.index = index
+    except Exception as e:
+        print(f"Error building recall index: {e}")
+    finally:
+        with _recall_builds_lock:
+            _recall_builds.discard(session.id)
+
+def recall_index(session):
+    """
+    The session's recall index over its archived and current turns, or None
+    while a long backlog is still being indexed. Call with the session held.
+    """
+    if session.index is not None:
+        return session.index
+    path = session.path or CONVERSATION_FILE
+    log = archive.ConversationLog(path, session.history)
+    index = ConversationIndex.load(index_path(path), log) or ConversationIndex(log)
+    if len(log) - len(index) <= RECALL_SYNC_INLINE:
+        session.index = index
+        return index
+    with _recall_builds_lock:
+        if session.id in _recall_builds:
+            return None
+        _recall_builds.add(session.id)
+    threading.Thread(target=build_recall_index, args=(session, index), name="recall-index", daemon=True).start()
+    return None
+
+def chat(command, session_id=None):
+    """Answer with the AI, holding the session for the whole exchange"""
+    with conversations.session(session_id) as session:
+        index = recall_index(session)
+        response = get_ai_response(command, session.history, index)
+        if index is not None and len(index) - index.saved >= RECALL_SAVE_TURNS:
+            save_recall_index(session, index)
+        return response
+
+def run_system_command(command, session_id=None):
+    """
+    Run the handler a system command's keywords pick: (intent, response), where
+    intent names the handler that answered, or (None, None) when none matched
+    """
+    command_lower = command.lower()
+    
+    # Image Generation - NEW FEATURE
+    if any(phrase in command_lower for phrase in IMAGE_TRIGGERS):
+        # Extract the prompt
+        prompt = command_lower
+        for phrase in ['generate image of', 'create image of', 'draw me', 'make image of', 'generate picture of', 'generate image', 'create image', 'draw', 'make image']:
+            prompt = prompt.replace(phrase, '').strip()
+        
+        if not prompt:
+            return "image", {"text": "Please provide a description for the image you want to generate."}
+        
+        return "image", run_job("image", run_handler, "network", generate_image, prompt, session_id=session_id,
+                                pending_text=f"Generating an image of '{prompt}'. I'll show it as soon as it's ready.")
+    
+    # Calculations, also bare ones: '10 times 5' is only a command because it contains 'time'
+    elif is_expression(command):
+        return "calculate", run_handler("cpu", calculate_command, command)
+    
+    # Reminders and Timers (before time/date, 'timer' contains 'time')
+    elif 'cancel' in command_lower and ('reminder' in command_lower or 'timer' in command_lower):
+        return "cancel_reminder", cancel_reminder(command, session_id)
+    
+    elif any(phrase in command_lower for phrase in ['list reminders', 'show reminders', 'my reminders']):
+        return "list_reminders", list_reminders(session_id)
+    
+    elif any(phrase in command_lower for phrase in ['list timers', 'show timers', 'my timers']):
+        return "list_timers", list_reminders(session_id, 'timer')
+    
+    elif 'remind me' in command_lower:
+        return "set_reminder", set_reminder(command, session_id)
+    
+    elif 'timer' in command_lower:
+        return "set_timer", set_timer(command, session_id)
+    
+    # Explicit open and search requests first, 'search google for weather in paris' is a search
+    # Web Applications
+    elif any(phrase in command_lower for phrase in WEB_APPS):
+        phrase = next(phrase for phrase in WEB_APPS if phrase in command_lower)
+        return "open_app", run_handler("ui", open_web_app, phrase)
+    
+    # Calculator
+    elif 'open calculator' in command_lower:
+        return "open_app", run_handler("ui", lambda: {"text": open_application("calculator")})
+    
+    # Search
+    elif 'search' in command_lower:
+        search_query = command.replace('wikipedia', '').replace('wiki', '').replace('search', '').strip()
+        if search_query:
+            return "search", run_handler("ui", google_search, search_query)
+        else:
+            response = "Please specify what you want to search for."
+            return "search", {"text": response}
+    
+    # Weather (before news, time and date: 'weather in delhi today' is not the date)
+    elif 'weather' in command_lower:
+        return "weather", run_handler("network", get_weather, command)
+    
+    # News and Articles - FIXED
+    elif any(word in command_lower for word in ['news', 'article', 'headlines']):
+        return "news", run_handler("ui", get_article)
+    
+    # Time and Date
+    elif any(word in command_lower for word in ['time', 'clock']):
+        return "time", tell_time()
+    
+    elif any(word in command_lower for word in ['date', 'today']) and 'update' not in command_lower:
+        return "date", tell_date()
+    
+    # Music
+    elif 'play' in command_lower:
+        track_name = command.replace('play', '').strip()
+        return "play", run_handler("ui", play_music, track_name)
+    
+    # Battery
+    elif 'battery' in command_lower:
+        return "battery", battery_status()
+    
+    # Jokes
+    elif any(word in command_lower for word in ['joke', 'funny', 'humor']):
+        return "joke", get_joke()
+    
+    # Screenshots and Pictures
+    elif 'screenshot' in command_lower:
+        return "screenshot", run_handler("ui", take_screenshot)
+    
+    elif 'picture' in command_lower or 'photo' in command_lower:
+        return "picture", run_handler("camera", take_picture)
+    
+    # System Information
+    elif 'system info' in command_lower or 'system status' in command_lower:
+        return "system_info", run_handler("cpu", get_system_info)
+    
+    # File Operations
+    elif 'create file' in command_lower:
+        return "create_file", create_file(command)
+    
+    elif 'read file' in command_lower:
+        return "read_file", read_file(command)
+    
+    # Notes
+    elif command_lower.startswith('note '):
+        return "add_note", add_note(command)
+    
+    elif 'list notes' in command_lower or 'show notes' in command_lower or 'my notes' in command_lower:
+        return "list_notes", list_notes()
+    
+    # Unit Conversion: both sides must be units in the registry, so 'pounds to kg'
+    # is mass and 'pounds to dollars' falls through to currency
+    elif 'convert' in command_lower and parse_conversion(command_lower):
+        return "convert_unit", convert_unit(command)
+    
+    # Currency Conversion
+    elif 'convert' in command_lower and any(word in command_lower for word in ['usd', 'inr', 'eur', 'gbp', 'dollar', 'rupee', 'euro', 'pound']):
+        return "convert_currency", run_handler("network", convert_currency, command)
+    
+    # Quotes
+    elif 'quote' in command_lower or 'motivate me' in command_lower or 'inspire me' in command_lower:
+        return "quote", get_quote()
+    
+    # Dictionary
+    elif 'define' in command_lower or 'meaning of' in command_lower:
+        return "define", run_handler("network", define_word, command)
+    
+    # System commands
+    elif any(word in command_lower for word in ['exit', 'quit', 'goodbye', 'bye']):
+        return "exit", {"text": GOODBYE_MESSAGE, "action": "exit"}
+    
+    # Help
+    elif 'help' in command_lower:
+        return "help", show_help()
+    return None, None
+
+def execute_command(command, session_id=None):
+    """
+    Main command execution function with AI conversation support.
+    session_id selects whose conversation history the AI sees (None: the default one).
+    """
     if not command or not command.strip():
         response = "Please provide a command."
         return {"text": response}
@@ -733,241 +1436,172 @@ def execute_command(command):
         
         # Handle clear conversation
         if 'clear conversation' in command.lower() or 'reset chat' in command.lower():
-            return clear_conversation()
+            return clear_conversation(session_id)
         
+        # Past conversations, including archived days
+        if SHOW_CONVERSATION_PATTERN.search(command.lower()):
+            return show_conversation(command, session_id)
+        
+        # Local intent guess, well under a millisecond
+        intent = intent_classifier.predict(command)
+        confident = intent.confidence >= INTENT_THRESHOLD
+        keyword_intent = KEYWORD_INTENTS.get(command_type) if is_command else None
+        if keyword_intent and is_expression(command):
+            keyword_intent = None  # '10 times 5' is arithmetic, not the time
+        if keyword_intent and command_type in AMBIGUOUS_KEYWORDS:
+            if intent.name == 'chat' and intent.confidence >= CHAT_OVERRIDE_THRESHOLD:
+                is_command, keyword_intent = False, None
+            elif (intent.confidence >= KEYWORD_OVERRIDE_THRESHOLD and intent.name in INTENT_HANDLERS
+                  and intent.name != keyword_intent):
+                log_command(command, intent.name, "classifier")
+                return run_intent(intent.name, command, session_id)
         # If it's a system command, handle it with existing functions
         if is_command:
-            command_lower = command.lower()
-            
-            # Image Generation - NEW FEATURE
-            if any(phrase in command_lower for phrase in ['generate image', 'create image', 'draw me', 'make image', 'generate picture']):
-                # Extract the prompt
-                prompt = command_lower
-                for phrase in ['generate image of', 'create image of', 'draw me', 'make image of', 'generate picture of', 'generate image', 'create image', 'draw', 'make image']:
-                    prompt = prompt.replace(phrase, '').strip()
-                
-                if not prompt:
-                    return {"text": "Please provide a description for the image you want to generate."}
-                
-                return generate_image(prompt)
-            
-            # News and Articles - FIXED
-            elif any(word in command_lower for word in ['news', 'article', 'headlines']):
-                return get_article()
-            
-            # Time and Date
-            elif any(word in command_lower for word in ['time', 'clock']):
-                return tell_time()
-            
-            elif any(word in command_lower for word in ['date', 'today']) and 'update' not in command_lower:
-                return tell_date()
-            
-            # Music
-            elif 'play' in command_lower:
-                track_name = command.replace('play', '').strip()
-                return play_music(track_name)
-            
-            # Web Applications
-            elif 'open google' in command_lower:
-                webbrowser.open("https://www.google.co.in/")
-                response = "Opening Google for you..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open youtube' in command_lower:
-                webbrowser.open("https://www.youtube.com/")
-                response = "Opening YouTube..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open chatgpt' in command_lower:
-                webbrowser.open("https://chat.openai.com/")
-                response = "Opening ChatGPT..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open whatsapp' in command_lower:
-                webbrowser.open("https://web.whatsapp.com/")
-                response = "Opening WhatsApp Web..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open github' in command_lower:
-                webbrowser.open("https://github.com/")
-                response = "Opening GitHub..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open spotify' in command_lower:
-                webbrowser.open("https://open.spotify.com/")
-                response = "Opening Spotify..."
-                return {"text": response, "action": "web_opened"}
-            
-            elif 'open gmail' in command_lower:
-                webbrowser.open("https://mail.google.com/")
-                response = "Opening Gmail..."
-                return {"text": response, "action": "web_opened"}
-            
-            # Calculator
-            elif 'open calculator' in command_lower:
-                result = open_application("calculator")
-                return {"text": result}
-            
-            # Calculations
-            elif any(phrase in command_lower for phrase in ['calculate', 'what is', 'compute']) and any(char in command for char in '0123456789+-*/.'):
-                result = safe_calculate(command)
-                response = f"The result is: {result}"
-                return {"text": response}
-            
-            # Search
-            elif 'search' in command_lower:
-                search_query = command.replace('wikipedia', '').replace('wiki', '').replace('search', '').strip()
-                if search_query:
-                    return google_search(search_query)
-                else:
-                    response = "Please specify what you want to search for."
-                    return {"text": response}
-            
-            # Weather
-            elif 'weather' in command_lower:
-                return get_weather()
-            
-            # Battery
-            elif 'battery' in command_lower:
-                return battery_status()
-            
-            # Jokes
-            elif any(word in command_lower for word in ['joke', 'funny', 'humor']):
-                return get_joke()
-            
-            # Screenshots and Pictures
-            elif 'screenshot' in command_lower:
-                return take_screenshot()
-            
-            elif 'picture' in command_lower or 'photo' in command_lower:
-                return take_picture()
-            
-            # System Information
-            elif 'system info' in command_lower or 'system status' in command_lower:
-                return get_system_info()
-            
-            # File Operations
-            elif 'create file' in command_lower:
-                return create_file(command)
-            
-            elif 'read file' in command_lower:
-                return read_file(command)
-            
-            # Notes
-            elif command_lower.startswith('note '):
-                return add_note(command)
-            
-            elif 'list notes' in command_lower or 'show notes' in command_lower or 'my notes' in command_lower:
-                return list_notes()
-            
-            # Currency Conversion
-            elif 'convert' in command_lower and any(word in command_lower for word in ['usd', 'inr', 'eur', 'gbp', 'dollar', 'rupee', 'euro', 'pound']):
-                return convert_currency(command)
-            
-            # Unit Conversion
-            elif 'convert' in command_lower and any(word in command_lower for word in ['km', 'miles', 'celsius', 'fahrenheit', 'feet', 'meter']):
-                return convert_unit(command)
-            
-            # Quotes
-            elif 'quote' in command_lower or 'motivate me' in command_lower or 'inspire me' in command_lower:
-                return get_quote()
-            
-            # Dictionary
-            elif 'define' in command_lower or 'meaning of' in command_lower:
-                return define_word(command)
-            
-            # System commands
-            elif any(word in command_lower for word in ['exit', 'quit', 'goodbye', 'bye']):
-                response = "Goodbye! ECHO signing off. Have a wonderful day!"
-                return {"text": response, "action": "exit"}
-            
-            # Help
-            elif 'help' in command_lower:
-                response = (
-                    "I can help you with:\n\n"
-                    "💬 CONVERSATIONAL AI:\n"
-                    "- Ask me anything! I can answer questions, help with problems, write content, explain concepts, and have natural conversations.\n"
-                    "- Just chat naturally - I remember our conversation context.\n\n"
-                    "🎨 AI IMAGE GENERATION (NEW!):\n"
-                    "- 'generate image of [description]'\n"
-                    "- 'create image of a sunset over mountains'\n"
-                    "- 'draw me a futuristic city'\n\n"
-                    "🛠️ SYSTEM COMMANDS:\n"
-                    "⏰ Time & Date: 'time', 'date'\n"
-                    "🎵 Music: 'play [song name]'\n"
-                    "🌐 Web: 'open google/youtube/github/spotify/gmail'\n"
-                    "🔍 Search: 'search [query]'\n"
-                    "📰 News: 'news', 'article', 'headlines'\n"
-                    "🌤️ Weather: 'weather'\n"
-                    "🔋 Battery: 'battery status'\n"
-                    "📸 Capture: 'screenshot', 'take picture'\n"
-                    "🧮 Calculate: 'calculate 2+2', 'what is 10*5'\n"
-                    "📝 Notes: 'note [text]', 'list notes'\n"
-                    "💱 Convert: 'convert 100 usd to inr'\n"
-                    "📖 Dictionary: 'define [word]'\n"
-                    "💻 System: 'system info'\n"
-                    "📁 Files: 'create file [name] with [content]'\n"
-                    "😂 Jokes: 'tell me a joke'\n"
-                    "🔄 Clear Chat: 'clear conversation'"
-                )
-                return {"text": response}
+            dispatched, response = run_system_command(command, session_id)
+            if dispatched:
+                # Logged after the fact: the handler that answered, not the first keyword seen
+                log_command(command, dispatched, "keyword")
+                return response
+        
+        # Phrasings no keyword caught, answered locally when the classifier is sure
+        if confident and intent.name in INTENT_HANDLERS:
+            log_command(command, intent.name, "classifier")
+            return run_intent(intent.name, command, session_id)
         
         # If not a system command, use AI conversation
-        conversation_history = load_conversation()
-        return get_ai_response(command, conversation_history)
+        return run_handler("network", chat, command, session_id)
             
     except Exception as e:
         error_msg = f"An error occurred: {str(e)}"
         print(f"Error in execute_command: {error_msg}")
         return {"text": error_msg}
 
+# ==================== WARM-UP ====================
+
+def warm_llm():
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY not set")
+    # Builds the client and opens its connection
+    get_groq_client(api_key).models.list()
+
+def warm_exchange_rates():
+    response = convert_currency("convert 1 usd to inr")
+    if cached("rates:USD") is None:
+        raise RuntimeError(response["text"])
+
+def warm_weather():
+    response = get_weather()
+    if cached(weather_cache_key(geo.HOME_CITY)) is None:
+        raise RuntimeError(response["text"])
+
+def warmup_tasks():
+    """Cold paths in this module, for warmup.Warmup"""
+    return {
+        "llm": warm_llm,
+        "exchangerate": warm_exchange_rates,
+        "weather": warm_weather,
+        "jokes": get_joke,
+    }
+
 # Standalone mode for testing
 if __name__ == "__main__":
+    from tts import tts_worker
+    from listener import ContinuousListener, BARGE_IN_FACTOR
+    from recognizers import get_backend
+
     def speak(text):
-        """Text-to-speech function for standalone mode"""
-        if TTS_AVAILABLE:
-            try:
-                engine.say(text)
-                engine.runAndWait()
-                print(f"ECHO (Speaking): {text}")
-            except Exception as e:
-                print(f"TTS Error: {e}")
-                print(f"ECHO: {text}")
-        else:
-            print(f"ECHO: {text}")
+        """Queue text on the TTS worker and return immediately so listening can start"""
+        print(f"ECHO: {text}")
+        if TTS_AVAILABLE and tts_worker:
+            return tts_worker.speak(text)
+        return None
+
+    def barge_in():
+        """User started talking over ECHO, cut the current speech"""
+        if tts_worker and tts_worker.is_busy():
+            print("(interrupted)")
+            tts_worker.interrupt()
+
+    def show_partial(text):
+        print(f"  ... {text}", end="\r", flush=True)
+
+    # Recognizer backend picked by ECHO_STT_BACKEND, model loaded once and kept resident
+    stt_backend = None
+    if SPEECH_RECOGNITION_AVAILABLE:
+        try:
+            stt_backend = get_backend()
+            print(f"Speech backend: {stt_backend.name}")
+        except Exception as e:
+            print(f"Speech backend not available: {e}")
+
+    # Opened and calibrated once on first use, then kept running for the whole session
+    listener = ContinuousListener(
+        on_speech_start=barge_in,
+        threshold_factor=lambda: BARGE_IN_FACTOR if tts_worker and tts_worker.is_busy() else 1.0,
+        stream_factory=stt_backend.stream if stt_backend.streaming else None,
+        on_partial=show_partial,
+    ) if stt_backend else None
 
     def take_command():
         """Voice command recognition for standalone mode"""
-        if not SPEECH_RECOGNITION_AVAILABLE:
+        if listener is None:
             print("Voice recognition not available. Please type your command.")
-            return input("You: ")
+            command = input("You: ")
+            barge_in()
+            return command
         
         try:
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                print("Listening...")
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                audio = recognizer.listen(source, timeout=5, phrase_time_limit=5)
+            if not listener.running:
+                print("Calibrating microphone...")
+                listener.start()
+            print("Listening...")
+            phrase = listener.listen(timeout=5)
+            if phrase is None:
+                raise TimeoutError("No speech detected")
                 
-            command = recognizer.recognize_google(audio)
+            command = phrase.text if phrase.text is not None else stt_backend.recognize(phrase.audio)
+            if not command:
+                raise ValueError("Speech not understood")
             print(f"Voice Command: {command}")
             return command.lower()
         except Exception:
             print("Didn't catch that. Please type your command.")
-            return input("You: ")
+            command = input("You: ")
+            barge_in()
+            return command
             
     print("ECHO AI Assistant - Standalone Mode")
     print("Now with conversational AI and image generation! Ask me anything or use system commands.")
     speak("Hello! I'm ECHO with enhanced conversational abilities and AI image generation. How can I assist you today?")
     
+    # Reminders, timers and background jobs arrive as events, spoken as soon as they come in
+    def announce_events(events):
+        while True:
+            event = events.get()
+            result = event.data.get("result", event.data)
+            if result.get("text"):
+                speak(result["text"])
+
+    start_reminders()
+    Warmup(warmup_tasks()).start()
+    threading.Thread(target=announce_events, args=(broker.subscribe(),), name="announcer", daemon=True).start()
+    
     while True:
         try:
             command = take_command()
             if 'exit' in command.lower():
-                speak("Goodbye!")
+                goodbye = speak("Goodbye!")
+                if goodbye:
+                    goodbye.result(timeout=10)
                 break
             result_dict = execute_command(command)
             speak(result_dict.get('text', 'An unknown error occurred.'))
         except KeyboardInterrupt:
             print("\nGoodbye!")
             break
+
+    reminder_scheduler.stop()
+    if listener:
+        listener.stop()
+        print(listener.report())
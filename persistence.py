@@ -0,0 +1,186 @@
+"""
+ECHO AI - JSON State Files
+Every state file is written to a temporary file in the same directory and
+renamed over the old one, so a crash mid-write leaves the previous version
+instead of a truncated file. Files that change often are kept in memory as
+a JsonDocument: a burst of changes is written once, a short delay after the
+first one, by a single flusher thread, and everything pending is written
+when the process exits.
+
+Tuning:
+    ECHO_FSYNC          none: leave it to the OS, file (default): fsync the data
+                        before the rename, full: also fsync the directory so the
+                        rename itself survives a power cut
+    ECHO_FLUSH_DELAY    seconds a change may wait before it is written (default 0.5)
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+FSYNC_POLICY = os.getenv("ECHO_FSYNC", "file")
+FLUSH_DELAY = float(os.getenv("ECHO_FLUSH_DELAY", "0.5"))
+# A failed write is tried again after this many seconds
+RETRY_DELAY = 5.0
+
+def write_atomic(path, text, fsync=None):
+    """Replace path with text in one rename"""
+    fsync = fsync or FSYNC_POLICY
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync == "full" and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def write_json(path, data, indent=2):
+    write_atomic(path, json.dumps(data, indent=indent))
+
+def read_json(path, default=None):
+    """Parsed contents of path, or default if it is missing or unreadable"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return default
+
+class Flusher:
+    """
+    Calls target.write() once, delay seconds after the first of a burst of
+    changes. A write that raises is scheduled again after RETRY_DELAY.
+    """
+
+    def __init__(self, delay=FLUSH_DELAY):
+        self.delay = delay
+        self.condition = threading.Condition()
+        self.pending = {}       # target -> monotonic time it is due
+        self.thread = None
+
+    def schedule(self, target, delay=None):
+        with self.condition:
+            if target in self.pending:
+                return  # already queued, this change goes out with it
+            self.pending[target] = time.monotonic() + (self.delay if delay is None else delay)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="flusher", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def flush(self):
+        """Write everything pending now"""
+        with self.condition:
+            targets = list(self.pending)
+            self.pending.clear()
+        for target in targets:
+            self._write(target)
+
+    def _write(self, target):
+        try:
+            target.write()
+        except Exception as e:
+            print(f"Error writing {getattr(target, 'path', target)}: {e}")
+            self.schedule(target, RETRY_DELAY)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                due = [t for t, at in self.pending.items() if at <= now]
+                if not due:
+                    self.condition.wait(min(self.pending.values()) - now if self.pending else None)
+                    continue
+                for target in due:
+                    del self.pending[target]
+            for target in due:
+                self._write(target)
+
+flusher = Flusher()
+atexit.register(flusher.flush)
+
+class JsonDocument:
+    """
+    A JSON file kept in memory. Change the value returned by load() while
+    holding lock, then call changed(); the file is written behind. If the
+    file is edited by hand while nothing is pending, load() rereads it.
+    """
+
+    def __init__(self, path, default=list, indent=2):
+        self.path = path
+        self.default = default
+        self.indent = indent
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.data = None
+        self.dirty = False
+        self.stamp = None       # (mtime_ns, size) of the file as last read or written
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        with self.lock:
+            if self.data is None or (not self.dirty and self._file_stamp() != self.stamp):
+                self.stamp = self._file_stamp()
+                self.data = read_json(self.path, None)
+                if self.data is None:
+                    self.data = self.default()
+            return self.data
+
+    def changed(self):
+        with self.lock:
+            self.dirty = True
+        flusher.schedule(self)
+
+    def write(self):
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                text = json.dumps(self.data, indent=self.indent)
+                self.dirty = False
+            try:
+                write_atomic(self.path, text)
+            except BaseException:
+                with self.lock:
+                    self.dirty = True
+                raise
+            with self.lock:
+                if not self.dirty:
+                    self.stamp = self._file_stamp()
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+def document(path, default=list, indent=2):
+    """The shared JsonDocument for path"""
+    key = os.path.abspath(path)
+    with _documents_lock:
+        doc = _documents.get(key)
+        if doc is None:
+            doc = _documents[key] = JsonDocument(path, default, indent)
+        return doc
@@ -0,0 +1,210 @@
+"""
+ECHO AI - Speech Recognition Backends
+One interface over cloud and offline recognizers. Offline models are loaded
+once and stay resident for the life of the process, and backends that can
+decode incrementally expose a streaming session with partial hypotheses.
+
+Select a backend with ECHO_STT_BACKEND=google|vosk|sphinx (default: google).
+"""
+
+import json
+import os
+import threading
+
+try:
+    import speech_recognition as sr
+    SPEECH_RECOGNITION_AVAILABLE = True
+except ImportError:
+    SPEECH_RECOGNITION_AVAILABLE = False
+
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+try:
+    import pocketsphinx
+    SPHINX_AVAILABLE = True
+except ImportError:
+    SPHINX_AVAILABLE = False
+
+STT_BACKEND = os.getenv("ECHO_STT_BACKEND", "google").lower()
+VOSK_MODEL_PATH = os.getenv("ECHO_VOSK_MODEL", os.path.join("models", "vosk-model-small-en-us-0.15"))
+
+# Offline engines decode 16 kHz mono 16-bit PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+def pcm_from_audio(audio):
+    """Raw PCM at the rate the offline models expect from an sr.AudioData"""
+    return audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+
+class RecognizerBackend:
+    """Base class: load() once, then recognize() whole phrases or stream() chunks"""
+    name = "base"
+    offline = False
+    streaming = False
+
+    def load(self):
+        """Load models or clients; called once before first use"""
+
+    def recognize(self, audio):
+        """Transcribe an sr.AudioData, returns text ('' if nothing was understood)"""
+        raise NotImplementedError
+
+    def stream(self):
+        """Start an incremental session, see StreamSession"""
+        return BufferedSession(self)
+
+class StreamSession:
+    """feed(pcm) returns the current partial hypothesis, finish() the final text"""
+
+    def feed(self, pcm):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+class BufferedSession(StreamSession):
+    """Fallback for backends that can only decode whole phrases: no partials"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.chunks = []
+
+    def feed(self, pcm):
+        self.chunks.append(pcm)
+        return ""
+
+    def finish(self):
+        audio = sr.AudioData(b"".join(self.chunks), SAMPLE_RATE, SAMPLE_WIDTH)
+        return self.backend.recognize(audio)
+
+# ==================== GOOGLE (CLOUD) ====================
+
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+
+    def load(self):
+        self.recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return ""
+
+# ==================== VOSK (OFFLINE) ====================
+
+class VoskSession(StreamSession):
+    def __init__(self, model):
+        self.recognizer = vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        self.segments = []
+
+    def feed(self, pcm):
+        if self.recognizer.AcceptWaveform(pcm):
+            # Vosk closed an utterance segment inside the phrase
+            self.segments.append(json.loads(self.recognizer.Result()).get("text", ""))
+            return " ".join(filter(None, self.segments))
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(filter(None, self.segments + [partial]))
+
+    def finish(self):
+        self.segments.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return " ".join(filter(None, self.segments))
+
+class VoskBackend(RecognizerBackend):
+    name = "vosk"
+    offline = True
+    streaming = True
+
+    def load(self):
+        if not os.path.isdir(VOSK_MODEL_PATH):
+            raise RuntimeError(
+                f"Vosk model not found at {VOSK_MODEL_PATH}. Download one from "
+                "https://alphacephei.com/vosk/models and set ECHO_VOSK_MODEL."
+            )
+        vosk.SetLogLevel(-1)
+        # The model is shared by every session, only the small recognizers are per phrase
+        self.model = vosk.Model(VOSK_MODEL_PATH)
+
+    def stream(self):
+        return VoskSession(self.model)
+
+    def recognize(self, audio):
+        session = self.stream()
+        session.feed(pcm_from_audio(audio))
+        return session.finish()
+
+# ==================== POCKETSPHINX (OFFLINE) ====================
+
+class SphinxSession(StreamSession):
+    def __init__(self, backend):
+        self.backend = backend
+        self.backend.lock.acquire()
+        self.backend.decoder.start_utt()
+
+    def feed(self, pcm):
+        self.backend.decoder.process_raw(pcm, False, False)
+        hyp = self.backend.decoder.hyp()
+        return hyp.hypstr if hyp else ""
+
+    def finish(self):
+        try:
+            self.backend.decoder.end_utt()
+            hyp = self.backend.decoder.hyp()
+            return hyp.hypstr if hyp else ""
+        finally:
+            self.backend.lock.release()
+
+class SphinxBackend(RecognizerBackend):
+    """
+    Uses a resident pocketsphinx Decoder directly. speech_recognition's
+    recognize_sphinx() rebuilds the decoder, and reloads the model, on every call.
+    """
+    name = "sphinx"
+    offline = True
+    streaming = True
+
+    def load(self):
+        # One decoder, one utterance at a time
+        self.decoder = pocketsphinx.Decoder(samprate=SAMPLE_RATE)
+        self.lock = threading.Lock()
+
+    def stream(self):
+        return SphinxSession(self)
+
+    def recognize(self, audio):
+        session = self.stream()
+        session.feed(pcm_from_audio(audio))
+        return session.finish()
+
+# ==================== REGISTRY ====================
+
+BACKENDS = {
+    "google": (GoogleBackend, lambda: SPEECH_RECOGNITION_AVAILABLE),
+    "vosk": (VoskBackend, lambda: SPEECH_RECOGNITION_AVAILABLE and VOSK_AVAILABLE),
+    "sphinx": (SphinxBackend, lambda: SPEECH_RECOGNITION_AVAILABLE and SPHINX_AVAILABLE),
+}
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+def available_backends():
+    return [name for name, (_, available) in BACKENDS.items() if available()]
+
+def get_backend(name=None):
+    """The named backend (default ECHO_STT_BACKEND), loaded on first use and then kept resident"""
+    name = (name or STT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown speech backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    with _loaded_lock:
+        if name not in _loaded:
+            backend_class, available = BACKENDS[name]
+            if not available():
+                raise RuntimeError(f"Speech backend '{name}' is not installed.")
+            backend = backend_class()
+            backend.load()
+            _loaded[name] = backend
+        return _loaded[name]
@@ -0,0 +1,227 @@
+"""
+ECHO AI - Upstream Circuit Breakers
+Each external API gets a circuit breaker. Errors and responses slower than
+the upstream's latency budget count as failures; after enough of them in a
+row the breaker opens and calls fail fast instead of every request waiting
+out a 10-30s timeout. After a cool-down one trial call is let through
+(half-open) and its outcome closes or re-opens the breaker.
+
+fetch() pairs the breaker with a last-known-good cache: fresh values are
+served directly, slightly old ones are served while a background refresh
+runs (stale-while-revalidate), and when the upstream is failing or its
+breaker is open the last good value is returned marked as stale. Only
+successful values are cached: a fetcher that raises, or returns None for
+"nothing found", never becomes the last-known-good value. Keys come from user
+input ('define:<word>'), so the cache is an LRU of at most ECHO_CACHE_ENTRIES
+values, and a value older than ECHO_CACHE_MAX_AGE is dropped instead of served.
+
+Tuning: ECHO_BREAKER_FAILURES (default 3), ECHO_BREAKER_RESET seconds (default 30),
+ECHO_CACHE_ENTRIES (default 2000), ECHO_CACHE_MAX_AGE seconds (default 604800, a week).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+FAILURE_THRESHOLD = int(os.getenv("ECHO_BREAKER_FAILURES", "3"))
+RESET_TIMEOUT = float(os.getenv("ECHO_BREAKER_RESET", "30"))
+MAX_CACHE_ENTRIES = int(os.getenv("ECHO_CACHE_ENTRIES", "2000"))
+MAX_CACHE_AGE = float(os.getenv("ECHO_CACHE_MAX_AGE", str(7 * 86400)))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class UpstreamError(Exception):
+    """
+    Upstream failed: unreachable, timed out, or answered with something
+    unusable (bad status, bad payload). fetch() raises it for any fetcher error.
+    """
+
+class BreakerOpen(Exception):
+    """Call refused without trying because the upstream's breaker is open"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        super().__init__(f"{breaker.name} is unavailable, retrying in {breaker.retry_in():.0f}s")
+
+class CircuitBreaker:
+    def __init__(self, name, slow_ms, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.slow_ms = slow_ms
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.last_error = None
+        self.calls = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def retry_in(self):
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self):
+        """True if a call may go to the upstream now"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.trial_running:
+                # Exactly one trial call; everyone else keeps failing fast
+                self.trial_running = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self, elapsed_ms):
+        if elapsed_ms > self.slow_ms:
+            return self.record_failure(f"slow response ({elapsed_ms:.0f} ms)")
+        with self.lock:
+            self.calls += 1
+            self.consecutive_failures = 0
+            self.trial_running = False
+            self.state = CLOSED
+
+    def record_failure(self, error):
+        with self.lock:
+            self.calls += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"Circuit breaker for {self.name} opened: {self.last_error}")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_s": round(self.retry_in(), 1),
+                "calls": self.calls,
+                "failures": self.failures,
+                "short_circuited": self.short_circuited,
+                "last_error": self.last_error,
+            }
+
+# Latency budgets: a response slower than this counts against the upstream
+BREAKERS = {
+    "exchangerate": CircuitBreaker("exchangerate", slow_ms=3000),
+    "dictionary": CircuitBreaker("dictionary", slow_ms=3000),
+    "weather": CircuitBreaker("weather", slow_ms=3000),
+    "pollinations": CircuitBreaker("pollinations", slow_ms=25000),
+}
+
+def breaker_status():
+    return {name: breaker.snapshot() for name, breaker in BREAKERS.items()}
+
+# ==================== LAST-KNOWN-GOOD CACHE ====================
+
+# stale: served without a successful upstream call; age: seconds since it was fetched
+Fetched = namedtuple("Fetched", ["value", "stale", "age"])
+
+_cache = OrderedDict()  # key -> (value, fetched_at), least recently used first
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+def _remember(key, value):
+    with _cache_lock:
+        _cache[key] = (value, time.time())
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+
+def cached(key):
+    """(value, fetched_at) for key, or None; too old to serve even as stale counts as None"""
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] >= MAX_CACHE_AGE:
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return entry
+
+def _call(breaker, fetcher):
+    start = time.monotonic()
+    try:
+        value = fetcher()
+    except Exception as e:
+        breaker.record_failure(e)
+        if isinstance(e, UpstreamError):
+            raise
+        # Connection errors, timeouts and malformed payloads alike: callers handle one exception
+        raise UpstreamError(f"{breaker.name}: {e}") from e
+    breaker.record_success((time.monotonic() - start) * 1000)
+    return value
+
+def _refresh(name, key, fetcher):
+    try:
+        if BREAKERS[name].allow():
+            value = _call(BREAKERS[name], fetcher)
+            if value is not None:
+                _remember(key, value)
+    except Exception as e:
+        print(f"Background refresh of {key} failed: {e}")
+    finally:
+        with _cache_lock:
+            _refreshing.discard(key)
+
+def fetch(name, key, fetcher, fresh_for=0.0, revalidate_for=0.0):
+    """
+    Value for key from fetcher() behind the named breaker, as Fetched. A key
+    of None skips the cache and only applies the breaker.
+
+    Younger than fresh_for: served from cache. Up to fresh_for + revalidate_for:
+    served from cache while one background refresh runs. Otherwise fetched now;
+    if that fails or the breaker is open, the last good value is returned with
+    stale=True, and UpstreamError or BreakerOpen is raised only when there is
+    nothing cached.
+    """
+    breaker = BREAKERS[name]
+    entry = cached(key) if key is not None else None
+    if entry:
+        value, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < fresh_for:
+            return Fetched(value, False, age)
+        if age < fresh_for + revalidate_for:
+            with _cache_lock:
+                start_refresh = key not in _refreshing
+                _refreshing.add(key)
+            if start_refresh:
+                threading.Thread(target=_refresh, args=(name, key, fetcher), name=f"refresh-{name}", daemon=True).start()
+            return Fetched(value, False, age)
+
+    if not breaker.allow():
+        if entry:
+            return Fetched(entry[0], True, time.time() - entry[1])
+        raise BreakerOpen(breaker)
+    try:
+        value = _call(breaker, fetcher)
+    except Exception:
+        if entry:
+            return Fetched(entry[0], True, time.time() - entry[1])
+        raise
+    if key is not None and value is not None:
+        _remember(key, value)
+    return Fetched(value, False, 0.0)
+
+def describe_age(seconds):
+    """'3 minutes ago' style text for staleness markers"""
+    seconds = int(seconds)
+    for name, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {name}{'s' if count != 1 else ''} ago"
+    return "moments ago"
@@ -0,0 +1,197 @@
+"""
+ECHO AI - Conversation Recall
+A TF-IDF index over a session's whole conversation log, so turns that fell
+out of the recent-messages window can still be given to the model when they
+are relevant to what the user just said.
+
+Turns are indexed once, as they are added (lnc.ltc weighting: log term
+frequency, cosine-normalised per turn, with the inverse document frequency
+applied on the query side only), so adding a turn never touches the others.
+Each term keeps a posting list of (turn, weight); a query only walks the
+posting lists of its own terms and scores them with NumPy.
+
+The indexed sequence only ever grows at the end, so the index is saved next
+to the history file and a restart only indexes the turns added since; the
+timestamp of the last indexed turn tells whether a saved index still fits.
+
+Tuning: ECHO_RECALL_TURNS (default 3), ECHO_RECALL_CHARS prompt budget (default 1200).
+"""
+
+import math
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+RECALL_TURNS = int(os.getenv("ECHO_RECALL_TURNS", "3"))
+RECALL_CHARS = int(os.getenv("ECHO_RECALL_CHARS", "1200"))
+MIN_SCORE = 0.15
+SNIPPET_CHARS = 300
+INDEX_SUFFIX = ".recall.npz"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a an the and or but if then so of to in on at by for with from as is are was were be been being
+it its it's this that these those i me my you your we our he she they them his her their
+do does did doing have has had can could will would should shall may might must not no yes
+what what's which who whom how why when where there here about into over than too very just
+also some any all more most much many such only own same other up down out off again once
+please tell me say give get let know like ok okay echo
+""".split())
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+def index_path(history_path):
+    """Where the index of the history file at history_path is saved"""
+    return os.path.splitext(history_path)[0] + INDEX_SUFFIX
+
+class ConversationIndex:
+    """
+    Incremental TF-IDF index; turn ids are positions in entries, the indexed
+    sequence (a history list, or an archive.ConversationLog to include
+    archived days). Only the first len(index) entries are indexed.
+    """
+
+    def __init__(self, entries=None):
+        self.vocab = {}         # term -> term id
+        self.doc_ids = []       # term id -> array('i') of turn ids
+        self.weights = []       # term id -> array('f') of normalised weights
+        self.turns = 0          # entries indexed so far
+        self.saved = 0          # turns covered by the last save() or load()
+        self.entries = [] if entries is None else entries
+
+    def __len__(self):
+        return self.turns
+
+    def add(self, entry):
+        """Index entry as the next turn, O(terms in the entry)"""
+        turn = self.turns
+        self.turns += 1
+        counts = Counter(tokenize(entry.get("content", "")))
+        if not counts:
+            return
+        weights = {term: 1.0 + math.log(count) for term, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        for term, weight in weights.items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self.vocab[term] = len(self.doc_ids)
+                self.doc_ids.append(array("i"))
+                self.weights.append(array("f"))
+            self.doc_ids[term_id].append(turn)
+            self.weights[term_id].append(weight / norm)
+
+    def sync(self, entries=None):
+        """Index the entries added since the last call; entries, when given, becomes the indexed sequence"""
+        if entries is not None:
+            self.entries = entries
+        for entry in self.entries[self.turns:]:
+            self.add(entry)
+
+    @staticmethod
+    def _stamp(entry):
+        return f"{entry.get('timestamp', '')}|{entry.get('role', '')}"
+
+    def save(self, path):
+        """Write the postings to path (.npz); the entries themselves are not stored"""
+        lengths = np.fromiter((len(ids) for ids in self.doc_ids), dtype=np.int64, count=len(self.doc_ids))
+        last = self._stamp(self.entries[self.turns - 1]) if self.turns else ""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.frombuffer("\n".join(self.vocab).encode("utf-8"), dtype=np.uint8),
+                lengths=lengths,
+                doc_ids=np.frombuffer(b"".join(ids.tobytes() for ids in self.doc_ids), dtype=np.int32),
+                weights=np.frombuffer(b"".join(w.tobytes() for w in self.weights), dtype=np.float32),
+                turns=np.array(self.turns),
+                last=np.frombuffer(last.encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp_path, path)
+        self.saved = self.turns
+
+    @classmethod
+    def load(cls, path, entries):
+        """The index saved at path over entries, or None if there is none or it no longer fits them"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls(entries)
+                terms = data["terms"].tobytes().decode("utf-8")
+                index.vocab = {term: i for i, term in enumerate(terms.split("\n"))} if terms else {}
+                offsets = np.concatenate(([0], np.cumsum(data["lengths"])))
+                doc_ids, weights = data["doc_ids"], data["weights"]
+                for start, end in zip(offsets[:-1], offsets[1:]):
+                    index.doc_ids.append(array("i", doc_ids[start:end].tobytes()))
+                    index.weights.append(array("f", weights[start:end].tobytes()))
+                index.turns = index.saved = int(data["turns"])
+                last = data["last"].tobytes().decode("utf-8")
+        except Exception as e:
+            print(f"Error reading recall index {path}: {e}")
+            return None
+        # Saved for a different history (cleared, replaced or edited by hand)
+        if index.turns > len(entries) or (index.turns and cls._stamp(entries[index.turns - 1]) != last):
+            return None
+        return index
+
+    def search(self, text, limit=RECALL_TURNS, before=None, min_score=MIN_SCORE):
+        """[(score, turn id)] of the best matching turns older than turn `before`"""
+        total = self.turns if before is None else min(before, self.turns)
+        if total <= 0:
+            return []
+        query = {}
+        for term, count in Counter(tokenize(text)).items():
+            term_id = self.vocab.get(term)
+            if term_id is not None:
+                idf = math.log((self.turns + 1) / (len(self.doc_ids[term_id]) + 1)) + 1.0
+                query[term_id] = (1.0 + math.log(count)) * idf
+        if not query:
+            return []
+        query_norm = math.sqrt(sum(w * w for w in query.values()))
+
+        scores = np.zeros(self.turns, dtype=np.float32)
+        for term_id, weight in query.items():
+            # A turn appears at most once per posting list, so fancy-index add is exact
+            turns = np.array(self.doc_ids[term_id], dtype=np.int32)
+            scores[turns] += np.array(self.weights[term_id], dtype=np.float32) * (weight / query_norm)
+        scores = scores[:total]
+
+        limit = min(limit, total)
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[turn]), int(turn)) for turn in best if scores[turn] >= min_score]
+
+    def recall(self, text, before, limit=RECALL_TURNS, budget=RECALL_CHARS):
+        """
+        A system message with the older turns most relevant to text (each with
+        the other half of its question/answer pair when it fits), or None.
+        """
+        chosen = set()
+        used = 0
+        for _, turn in self.search(text, limit, before):
+            entry = self.entries[turn]
+            partner = turn + 1 if entry.get("role") == "user" else turn - 1
+            for candidate in (turn, partner):
+                if candidate in chosen or not 0 <= candidate < before:
+                    continue
+                size = min(len(self.entries[candidate].get("content", "")), SNIPPET_CHARS)
+                if used + size > budget:
+                    continue
+                chosen.add(candidate)
+                used += size
+        if not chosen:
+            return None
+        lines = []
+        for turn in sorted(chosen):
+            entry = self.entries[turn]
+            content = entry.get("content", "")
+            if len(content) > SNIPPET_CHARS:
+                content = content[:SNIPPET_CHARS].rsplit(" ", 1)[0] + "..."
+            speaker = "User" if entry.get("role") == "user" else "ECHO"
+            when = entry.get("timestamp", "")[:10]
+            lines.append(f"[{when}] {speaker}: {content}" if when else f"{speaker}: {content}")
+        return "Earlier in this conversation (use only if relevant):\n" + "\n".join(lines)
@@ -0,0 +1,235 @@
+"""
+ECHO AI - Reminder and Timer Scheduler
+Every pending reminder and timer lives in one binary min-heap keyed by due
+time, watched by a single thread that sleeps on a Condition until the earliest
+one is due. The heap keeps an index of where each item sits, so scheduling and
+cancelling are both O(log n) and 100k pending timers cost memory, not threads.
+Items are saved to a JSON file (batched, at most once per save_delay), and
+once more at exit if a batch is still waiting, then reloaded on start, so
+reminders survive a restart.
+"""
+
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+
+import persistence
+
+REMINDERS_FILE = "echo_reminders.json"
+
+class Scheduler:
+    """
+    Fires on_fire(item) for each scheduled item when it comes due. Items are
+    dicts: {'id', 'kind', 'text', 'due' (epoch seconds), 'created', 'session'}.
+    Listing and cancelling only ever see the items of the given session (None
+    is the default session, which also owns items saved before sessions).
+    """
+
+    def __init__(self, on_fire, path=REMINDERS_FILE, save_delay=1.0):
+        self.on_fire = on_fire
+        self.path = path
+        self.save_delay = save_delay
+        self.heap = []          # (due, id) tuples
+        self.index = {}         # id -> position in heap
+        self.items = {}         # id -> item
+        self.next_id = 1
+        self.condition = threading.Condition()
+        self.dirty = False
+        self.save_at = None
+        self.thread = None
+        self.running = False
+
+    # ---------- indexed heap ----------
+
+    def _swap(self, i, j):
+        heap = self.heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self.index[heap[i][1]] = i
+        self.index[heap[j][1]] = j
+
+    def _sift_up(self, i):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.heap[i] >= self.heap[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        size = len(self.heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and self.heap[child] < self.heap[smallest]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def _push(self, due, item_id):
+        self.heap.append((due, item_id))
+        self.index[item_id] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def _remove_at(self, i):
+        last = len(self.heap) - 1
+        if i != last:
+            self._swap(i, last)
+        _, item_id = self.heap.pop()
+        del self.index[item_id]
+        if i < len(self.heap):
+            self._sift_down(i)
+            self._sift_up(i)
+        return item_id
+
+    # ---------- public API ----------
+
+    def schedule(self, due, text, kind="reminder", session_id=None):
+        """Add an item due at epoch time due, returns the stored item"""
+        with self.condition:
+            item = {
+                "id": self.next_id,
+                "kind": kind,
+                "text": text,
+                "due": due,
+                "created": time.time(),
+                "session": session_id,
+            }
+            self.next_id += 1
+            self.items[item["id"]] = item
+            self._push(due, item["id"])
+            self._mark_dirty()
+            # Wake the thread in case this is now the earliest item
+            self.condition.notify()
+            return item
+
+    def _owned(self, item, kind, session_id):
+        return item.get("session") == session_id and (kind is None or item["kind"] == kind)
+
+    def cancel(self, item_id, session_id=None):
+        """Remove a pending item of the session, returns it or None if it has no such item"""
+        with self.condition:
+            position = self.index.get(item_id)
+            if position is None or not self._owned(self.items[item_id], None, session_id):
+                return None
+            self._remove_at(position)
+            self._mark_dirty()
+            self.condition.notify()
+            return self.items.pop(item_id)
+
+    def cancel_all(self, kind=None, session_id=None):
+        """Remove every pending item of the session (of one kind), returns how many were removed"""
+        with self.condition:
+            doomed = [i for i, item in self.items.items() if self._owned(item, kind, session_id)]
+            for item_id in doomed:
+                self._remove_at(self.index[item_id])
+                del self.items[item_id]
+            if doomed:
+                self._mark_dirty()
+                self.condition.notify()
+            return len(doomed)
+
+    def pending(self, kind=None, limit=None, session_id=None):
+        """Pending items of the session (of one kind) ordered by due time"""
+        with self.condition:
+            entries = [e for e in self.heap if self._owned(self.items[e[1]], kind, session_id)]
+            chosen = heapq.nsmallest(limit, entries) if limit else sorted(entries)
+            return [self.items[item_id] for _, item_id in chosen]
+
+    def __len__(self):
+        return len(self.heap)
+
+    # ---------- persistence ----------
+
+    def _mark_dirty(self):
+        # Batch writes: a burst of changes is saved once
+        if not self.dirty:
+            self.dirty = True
+            self.save_at = time.monotonic() + self.save_delay
+
+    def load(self):
+        """Load saved items; ones that came due while ECHO was off fire on start"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"Error loading reminders: {e}")
+            return 0
+        with self.condition:
+            for item in saved:
+                self.items[item["id"]] = item
+                self._push(item["due"], item["id"])
+                self.next_id = max(self.next_id, item["id"] + 1)
+        return len(saved)
+
+    def save(self):
+        """Write all pending items atomically"""
+        if not self.path:
+            return
+        with self.condition:
+            items = list(self.items.values())
+            self.dirty = False
+        try:
+            persistence.write_json(self.path, items, indent=None)
+        except Exception as e:
+            print(f"Error saving reminders: {e}")
+
+    # ---------- scheduler thread ----------
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self.thread.start()
+        # The thread is a daemon: changes still waiting for save_delay are written at exit
+        atexit.register(self.flush)
+
+    def flush(self):
+        """Save now if anything changed since the last save"""
+        if self.dirty:
+            self.save()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=2)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                due = []
+                while self.running:
+                    now = time.time()
+                    while self.heap and self.heap[0][0] <= now:
+                        due.append(self.items.pop(self._remove_at(0)))
+                    if due or (self.dirty and time.monotonic() >= self.save_at):
+                        break
+                    timeout = self.heap[0][0] - now if self.heap else None
+                    if self.dirty:
+                        flush_in = self.save_at - time.monotonic()
+                        timeout = flush_in if timeout is None else min(timeout, flush_in)
+                    self.condition.wait(timeout)
+                if not self.running and not due:
+                    return
+                if due:
+                    self._mark_dirty()
+
+            # Callbacks and disk writes happen outside the lock
+            for item in due:
+                try:
+                    self.on_fire(item)
+                except Exception as e:
+                    print(f"Reminder delivery error: {e}")
+            if self.dirty and time.monotonic() >= self.save_at:
+                self.save()
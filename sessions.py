@@ -0,0 +1,177 @@
+"""
+ECHO AI - Per-Session Conversation Store
+Each browser (session cookie) or API client (bearer token) gets its own
+conversation history and its own file under the sessions directory, so tabs
+and users neither share context nor rewrite the same file. Active sessions
+are kept in memory in a size-bounded LRU: a history is loaded from disk the
+first time it is used, and after every change it is handed to the shared
+write-behind flusher (see persistence.py), so a burst of turns is written
+once, shortly after the first. An evicted session stays in memory while a
+request is still using it and until its write has succeeded, so get() keeps
+handing out the same object and no turn is lost. Each session has its own
+lock, so concurrent users only wait on themselves.
+
+The default session (session_id None, used by the standalone voice mode)
+keeps using the original single conversation file.
+
+Tuning: ECHO_SESSIONS_DIR (default 'sessions'), ECHO_ACTIVE_SESSIONS (default 256).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import persistence
+
+SESSIONS_DIR = os.getenv("ECHO_SESSIONS_DIR", "sessions")
+MAX_ACTIVE_SESSIONS = int(os.getenv("ECHO_ACTIVE_SESSIONS", "256"))
+MAX_SESSION_ID_LENGTH = 256
+
+class Session:
+    __slots__ = ("id", "path", "store", "lock", "history", "dirty", "index", "users")
+
+    def __init__(self, session_id, path, store):
+        self.id = session_id
+        self.path = path
+        self.store = store
+        self.lock = threading.RLock()
+        self.history = None     # loaded lazily, under lock
+        self.dirty = False
+        self.index = None       # search index over history, built by the caller
+        self.users = 0          # requests inside session(), guarded by the store lock
+
+    def write(self):
+        """Called by the flusher"""
+        self.store._write(self)
+
+class SessionStore:
+    """
+    LRU of active sessions. load(path) -> list and save(history, path) do the
+    file IO, so the store decides when to touch disk but not the file format.
+    save raises on failure; the session then stays dirty and is written again
+    later instead of being dropped.
+    The default session's path is default_path, None leaves it to load/save.
+    """
+
+    def __init__(self, load, save, directory=SESSIONS_DIR, default_path=None, capacity=MAX_ACTIVE_SESSIONS,
+                 flusher=None):
+        self.load = load
+        self.save = save
+        self.directory = directory
+        self.default_path = default_path
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.active = OrderedDict()     # session id -> Session, least recently used first
+        self.evicted = {}               # session id -> Session waiting for the flusher
+        self.flusher = flusher or persistence.flusher
+        self.loads = 0
+        self.evictions = 0
+
+    def path_for(self, session_id):
+        if session_id is None:
+            return self.default_path
+        # Hashed, so ids and tokens are safe as file names and not stored in clear
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, session_id, pin=False):
+        """The Session for session_id, most recently used from now on; pin it with pin=True until unpin()"""
+        if session_id is not None and len(session_id) > MAX_SESSION_ID_LENGTH:
+            raise ValueError("Session id too long")
+        with self.lock:
+            session = self.active.get(session_id)
+            if session is not None:
+                self.active.move_to_end(session_id)
+            else:
+                # Evicted but still in use or not written yet: take the in-memory copy back
+                session = self.evicted.pop(session_id, None) or Session(session_id, self.path_for(session_id), self)
+                self.active[session_id] = session
+                while len(self.active) > self.capacity:
+                    victim_id, victim = self.active.popitem(last=False)
+                    self.evictions += 1
+                    # A changed victim is already scheduled with the flusher; one in use
+                    # is about to change and must not be loaded again from the old file
+                    if victim.dirty or victim.users:
+                        self.evicted[victim_id] = victim
+            if pin:
+                session.users += 1
+        return session
+
+    def unpin(self, session):
+        with self.lock:
+            session.users -= 1
+            # Evicted while in use and nothing to write: it can go now
+            if not session.users and not session.dirty and self.evicted.get(session.id) is session:
+                del self.evicted[session.id]
+
+    @contextmanager
+    def session(self, session_id, readonly=False):
+        """Hold the session's lock and yield it with its history loaded; changes are kept"""
+        session = self.get(session_id, pin=True)
+        try:
+            with session.lock:
+                self._ensure_loaded(session)
+                yield session
+                if not readonly:
+                    session.dirty = True
+            if not readonly:
+                self.flusher.schedule(session)
+        finally:
+            self.unpin(session)
+
+    @contextmanager
+    def history(self, session_id, readonly=False):
+        """Like session(), yielding just the history list"""
+        with self.session(session_id, readonly) as session:
+            yield session.history
+
+    def clear(self, session_id):
+        """Forget a session's history in memory and on disk"""
+        session = self.get(session_id)
+        with session.lock:
+            session.history = []
+            session.dirty = False
+            session.index = None
+            if session.path and os.path.exists(session.path):
+                os.remove(session.path)
+
+    def flush(self):
+        """Write every changed session now (shutdown, tests)"""
+        with self.lock:
+            sessions = list(self.active.values()) + list(self.evicted.values())
+        for session in sessions:
+            try:
+                self._write(session)
+            except Exception as e:
+                print(f"Error saving session: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "active": len(self.active),
+                "capacity": self.capacity,
+                "pending_writes": len(self.evicted),
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+    def _ensure_loaded(self, session):
+        if session.history is None:
+            session.history = self.load(session.path)
+            self.loads += 1
+
+    def _write(self, session):
+        with session.lock:
+            if session.dirty:
+                directory = os.path.dirname(session.path or "")
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # dirty is only cleared once the history is really on disk
+                self.save(session.history, session.path)
+                session.dirty = False
+        with self.lock:
+            # Unless it was taken back into the LRU meanwhile
+            if self.evicted.get(session.id) is session and not session.dirty and not session.users:
+                del self.evicted[session.id]
@@ -0,0 +1,615 @@
+class ECHOInterface {
+    constructor() {
+        this.terminal = document.getElementById('terminal');
+        this.commandInput = document.getElementById('commandInput');
+        this.sendBtn = document.getElementById('sendBtn');
+        this.micBtn = document.getElementById('micBtn');
+        this.connectionStatus = document.getElementById('connectionStatus');
+        this.coreStatus = document.getElementById('coreStatus');
+        this.voiceStatus = document.getElementById('voiceStatus');
+        this.scrollToTopBtn = document.getElementById('scrollToTop');
+        this.core = document.getElementById('core');
+
+        this.isProcessing = false;
+        this.isConnected = false;
+        this.isListening = false;
+        this.isSpeaking = false;
+
+        // Voice recognition
+        this.recognition = null;
+        // MediaRecorder fallback: record in the browser, transcribe on the server
+        this.recorder = null;
+        this.recordTimer = null;
+
+        // Persistent server channel: WebSocket, else Server-Sent Events plus HTTP
+        this.socket = null;
+        this.socketSupported = true;
+        this.socketOpenedOnce = false;
+        this.events = null;
+        this.pending = new Map();
+        this.nextRequestId = 1;
+        this.lastEventId = null;
+        this.reconnectDelay = 1000;
+        this.reportedOffline = false;
+        this.synthesis = window.speechSynthesis;
+
+        this.init();
+    }
+
+    init() {
+        this.setupEventListeners();
+        this.initVoiceRecognition();
+        this.connect();
+        this.startupSequence();
+    }
+
+    initVoiceRecognition() {
+        // Check if browser supports speech recognition
+        const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+
+        if (SpeechRecognition) {
+            this.recognition = new SpeechRecognition();
+            this.recognition.continuous = false;
+            this.recognition.interimResults = false;
+            this.recognition.lang = 'en-US';
+
+            this.recognition.onstart = () => {
+                this.isListening = true;
+                this.micBtn.classList.add('listening');
+                this.core.classList.add('listening');
+                this.addToTerminal('system', '🎤 Listening...');
+            };
+
+            this.recognition.onresult = (event) => {
+                const transcript = event.results[0][0].transcript;
+                this.commandInput.value = transcript;
+                // Automatically send the command by calling the handler directly
+                this.handleCommand();
+            };
+
+            this.recognition.onerror = (event) => {
+                this.addToTerminal('error', `Voice recognition error: ${event.error}`);
+                this.stopListening();
+            };
+
+            this.recognition.onend = () => {
+                this.stopListening();
+            };
+
+            this.voiceStatus.textContent = 'ENABLED';
+        } else if (window.MediaRecorder && navigator.mediaDevices) {
+            this.voiceStatus.textContent = 'ENABLED';
+            this.addToTerminal('system', 'Browser speech recognition unavailable, voice will be transcribed by ECHO Core.');
+        } else {
+            this.voiceStatus.textContent = 'NOT SUPPORTED';
+            this.micBtn.disabled = true;
+            this.addToTerminal('system', 'Voice recognition not supported in this browser. Try Chrome or Edge.');
+        }
+
+        // Check speech synthesis
+        if (!this.synthesis) {
+            this.addToTerminal('system', 'Speech synthesis not available.');
+        }
+    }
+
+    startListening() {
+        if (!this.recognition && !this.isListening && !this.isProcessing) {
+            this.startRecording();
+            return;
+        }
+        if (this.recognition && !this.isListening && !this.isProcessing) {
+            try {
+                this.commandInput.value = ''; // Clear input before listening
+                this.recognition.start();
+            } catch (error) {
+                console.error('Recognition start error:', error);
+                this.addToTerminal('error', 'Could not start voice recognition. It might already be active.');
+            }
+        }
+    }
+
+    async startRecording() {
+        try {
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            const chunks = [];
+            this.recorder = new MediaRecorder(stream);
+            this.recorder.ondataavailable = (event) => {
+                if (event.data.size > 0) chunks.push(event.data);
+            };
+            this.recorder.onstop = () => {
+                clearTimeout(this.recordTimer);
+                stream.getTracks().forEach(track => track.stop());
+                this.stopListening();
+                const blob = new Blob(chunks, { type: this.recorder.mimeType || 'audio/webm' });
+                this.recorder = null;
+                if (blob.size > 0) this.handleAudioCommand(blob);
+            };
+            this.recorder.start();
+            this.isListening = true;
+            this.micBtn.classList.add('listening');
+            this.core.classList.add('listening');
+            this.addToTerminal('system', '🎤 Recording... click the mic again to send.');
+            // Commands are short, stop on our own if the user forgets to
+            this.recordTimer = setTimeout(() => this.stopRecording(), 8000);
+        } catch (error) {
+            console.error('Recording error:', error);
+            this.addToTerminal('error', `Could not access the microphone: ${error.message}`);
+        }
+    }
+
+    stopRecording() {
+        if (this.recorder && this.recorder.state !== 'inactive') {
+            this.recorder.stop();
+        }
+    }
+
+    stopListening() {
+        if (this.isListening) {
+            this.isListening = false;
+            this.micBtn.classList.remove('listening');
+            this.core.classList.remove('listening');
+        }
+    }
+
+    speak(text) {
+        if (!this.synthesis || !text) return;
+
+        // Cancel any ongoing speech
+        this.synthesis.cancel();
+
+        const utterance = new SpeechSynthesisUtterance(text);
+        utterance.rate = 1.0;
+        utterance.pitch = 1.0;
+        utterance.volume = 1.0;
+
+        const voices = this.synthesis.getVoices();
+        const preferredVoice = voices.find(voice => voice.name === 'Google US English') || voices.find(voice => voice.lang === 'en-US');
+        if (preferredVoice) {
+            utterance.voice = preferredVoice;
+        }
+
+        utterance.onstart = () => {
+            this.isSpeaking = true;
+            this.core.classList.add('speaking');
+        };
+
+        utterance.onend = () => {
+            this.isSpeaking = false;
+            this.core.classList.remove('speaking');
+        };
+
+        utterance.onerror = () => {
+            this.isSpeaking = false;
+            this.core.classList.remove('speaking');
+        };
+
+        this.synthesis.speak(utterance);
+    }
+
+    playAudio(url, fallbackText) {
+        // Pre-rendered server audio from the phrase cache, browser synthesis if it fails
+        this.synthesis && this.synthesis.cancel();
+        const audio = new Audio(url);
+        audio.onplay = () => {
+            this.isSpeaking = true;
+            this.core.classList.add('speaking');
+        };
+        audio.onended = () => {
+            this.isSpeaking = false;
+            this.core.classList.remove('speaking');
+        };
+        audio.play().catch(() => {
+            this.isSpeaking = false;
+            this.core.classList.remove('speaking');
+            this.speak(fallbackText);
+        });
+    }
+
+    setupEventListeners() {
+        this.sendBtn.addEventListener('click', () => this.handleCommand());
+
+        this.micBtn.addEventListener('click', () => {
+            if (this.isListening) {
+                this.recognition ? this.recognition.stop() : this.stopRecording();
+            } else {
+                this.startListening();
+            }
+        });
+
+        this.commandInput.addEventListener('keypress', (e) => {
+            if (e.key === 'Enter' && !this.isProcessing) {
+                this.handleCommand();
+            }
+        });
+
+        window.addEventListener('scroll', () => {
+            if (window.pageYOffset > 300) {
+                this.scrollToTopBtn.classList.add('visible');
+            } else {
+                this.scrollToTopBtn.classList.remove('visible');
+            }
+        });
+
+        this.scrollToTopBtn.addEventListener('click', () => {
+            window.scrollTo({ top: 0, behavior: 'smooth' });
+        });
+
+        if (this.synthesis.getVoices().length === 0) {
+            this.synthesis.onvoiceschanged = () => {
+                 console.log('Voices loaded:', this.synthesis.getVoices().length);
+            };
+        }
+    }
+
+    async checkServerStatus() {
+        try {
+            // Using a timestamp to prevent caching
+            const response = await fetch(`/status?t=${new Date().getTime()}`);
+            if (!response.ok) throw new Error('Server responded with an error');
+            const data = await response.json();
+
+            if (data.status === 'online') {
+                this.isConnected = true;
+                this.updateStatus('online', 'ONLINE', 'ACTIVE');
+                this.addToTerminal('system', 'Flask backend connected successfully.');
+            } else {
+                throw new Error('Server status is offline');
+            }
+        } catch (error) {
+            console.error('Server connection failed:', error);
+            this.isConnected = false;
+            this.updateStatus('offline', 'OFFLINE', 'ERROR');
+            this.addToTerminal('error', 'Could not connect to ECHO Core. Is the Python server running?');
+        }
+    }
+
+    connect() {
+        if (window.WebSocket && this.socketSupported) {
+            this.openSocket();
+        } else {
+            this.openEventStream();
+        }
+    }
+
+    openSocket() {
+        const protocol = location.protocol === 'https:' ? 'wss' : 'ws';
+        const query = this.lastEventId ? `?last_id=${this.lastEventId}` : '';
+        const socket = new WebSocket(`${protocol}://${location.host}/ws${query}`);
+        let opened = false;
+
+        socket.onopen = () => {
+            opened = true;
+            this.socketOpenedOnce = true;
+            this.socket = socket;
+            this.reconnectDelay = 1000;
+            this.closeEventStream();
+            this.setConnected(true, 'WebSocket');
+        };
+
+        socket.onmessage = (event) => this.handleSocketMessage(JSON.parse(event.data));
+
+        socket.onclose = () => {
+            this.socket = null;
+            this.rejectPending('Connection to ECHO Core lost');
+            if (!opened && !this.socketOpenedOnce) {
+                // Server has no WebSocket endpoint: stay on SSE and HTTP
+                this.socketSupported = false;
+            } else {
+                setTimeout(() => this.openSocket(), this.reconnectDelay);
+                this.reconnectDelay = Math.min(this.reconnectDelay * 2, 30000);
+            }
+            // Keep receiving pushed events and sending over HTTP meanwhile
+            this.openEventStream();
+        };
+    }
+
+    openEventStream() {
+        if (this.events) return;
+        if (!window.EventSource) {
+            this.checkServerStatus();
+            return;
+        }
+        const query = this.lastEventId ? `?last_id=${this.lastEventId}` : '';
+        this.events = new EventSource(`/events${query}`);
+        this.events.onopen = () => this.setConnected(true, 'HTTP');
+        ['job', 'reminder'].forEach(type => {
+            this.events.addEventListener(type, (event) => {
+                this.lastEventId = Number(event.lastEventId);
+                this.handleServerEvent(type, JSON.parse(event.data));
+            });
+        });
+        // EventSource reconnects on its own, resuming from Last-Event-ID
+        this.events.onerror = () => {
+            if (!this.socket) this.setConnected(false);
+        };
+    }
+
+    closeEventStream() {
+        if (this.events) {
+            this.events.close();
+            this.events = null;
+        }
+    }
+
+    setConnected(connected, transport) {
+        const wasConnected = this.isConnected;
+        this.isConnected = connected;
+        if (connected) {
+            this.updateStatus('online', 'ONLINE', 'ACTIVE');
+            this.reportedOffline = false;
+            if (!wasConnected) {
+                this.addToTerminal('system', `Flask backend connected successfully (${transport}).`);
+            }
+        } else {
+            this.updateStatus('offline', 'OFFLINE', 'ERROR');
+            if (wasConnected) {
+                this.addToTerminal('error', 'Connection to ECHO Core lost. Reconnecting...');
+            } else if (!this.reportedOffline) {
+                this.addToTerminal('error', 'Could not connect to ECHO Core. Is the Python server running?');
+            }
+            this.reportedOffline = true;
+        }
+    }
+
+    handleSocketMessage(message) {
+        if (message.type === 'response') {
+            const request = this.pending.get(message.id);
+            if (request) {
+                this.pending.delete(message.id);
+                clearTimeout(request.timer);
+                request.resolve(message.data);
+            }
+        } else if (message.type === 'event') {
+            this.lastEventId = message.id;
+            this.handleServerEvent(message.event, message.data);
+        } else if (message.type === 'error') {
+            console.warn('ECHO Core:', message.text);
+        }
+    }
+
+    handleServerEvent(type, data) {
+        // Work that finished after its command returned: generated images, reminders
+        const response = data.result || data;
+        if (response.text || response.image_url) {
+            this.showResponse(response);
+        }
+    }
+
+    rejectPending(reason) {
+        this.pending.forEach(request => {
+            clearTimeout(request.timer);
+            request.reject(new Error(reason));
+        });
+        this.pending.clear();
+    }
+
+    updateStatus(connectionClass, statusText, coreText) {
+        this.connectionStatus.className = `status-indicator ${connectionClass}`;
+        this.connectionStatus.textContent = statusText;
+        this.coreStatus.textContent = coreText;
+    }
+
+addToTerminal(type, content) {
+const line = document.createElement('div');
+line.className = 'terminal-line';
+
+switch(type) {
+case 'user':
+    line.innerHTML = `<span class="prompt">USER@terminal:~$</span> <span class="user-input">${this.escapeHtml(content)}</span>`;
+    break;
+case 'ai':
+    line.innerHTML = `<span class="prompt">ECHO@neural-core:~$</span> <span class="ai-response">${this.escapeHtml(content)}</span>`;
+    break;
+case 'system':
+    const timestamp = new Date().toLocaleTimeString();
+    line.innerHTML = `<span class="system-msg">[SYSTEM ${timestamp}]</span> <span>${this.escapeHtml(content)}</span>`;
+    break;
+case 'error':
+    line.innerHTML = `<span class="system-msg">[ERROR]</span> <span class="error-msg">${this.escapeHtml(content)}</span>`;
+    break;
+case 'image':
+    line.innerHTML = `
+        <span class="prompt">ECHO@neural-core:~$</span> 
+        <div class="image-container">
+            <img src="${content.url}" alt="${content.alt}" class="captured-image" 
+                 onclick="window.open('${content.url}', '_blank')" 
+                 title="Click to open in new tab">
+            <div class="image-caption">${this.escapeHtml(content.caption)}</div>
+        </div>`;
+    break;
+}
+
+this.terminal.appendChild(line);
+this.terminal.scrollTop = this.terminal.scrollHeight;
+}
+
+    escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    async sendCommand(command) {
+        if (!this.isConnected) {
+            // Simulate a local error without a real network call
+            throw new Error('Not connected to server');
+        }
+
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            return new Promise((resolve, reject) => {
+                const id = this.nextRequestId++;
+                const timer = setTimeout(() => {
+                    this.pending.delete(id);
+                    reject(new Error('Timed out waiting for ECHO Core'));
+                }, 60000);
+                this.pending.set(id, { resolve, reject, timer });
+                this.socket.send(JSON.stringify({ id: id, command: command }));
+            });
+        }
+
+        const response = await fetch('/command', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ command: command })
+        });
+
+        if (response.status === 429 || response.status === 503) {
+            // Rate limited or shedding load, the body says when to try again
+            return await response.json();
+        }
+        if (!response.ok) {
+            throw new Error(`Server error: ${response.status} ${response.statusText}`);
+        }
+
+        return await response.json();
+    }
+
+    async sendAudioCommand(blob) {
+        if (!this.isConnected) {
+            throw new Error('Not connected to server');
+        }
+
+        const response = await fetch('/command/audio', {
+            method: 'POST',
+            headers: { 'Content-Type': blob.type },
+            body: blob
+        });
+
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || `Server error: ${response.status} ${response.statusText}`);
+        }
+
+        return await response.json();
+    }
+
+    showResponse(response) {
+        if (response.text) {
+            this.addToTerminal('ai', response.text);
+            if (response.audio_url) {
+                this.playAudio(response.audio_url, response.text);
+            } else {
+                this.speak(response.text);
+            }
+        } else {
+            this.addToTerminal('ai', 'Command processed successfully.');
+        }
+
+        // Display image if screenshot or photo was taken
+        if (response.image_url) {
+            this.addToTerminal('image', {
+                url: response.image_url,
+                alt: response.filename || 'Captured image',
+                caption: `✓ ${response.filename || 'Image'} - Click to view full size`
+            });
+        }
+        if (response.action === 'exit') {
+            this.addToTerminal('system', 'Session terminated by user request.');
+            this.commandInput.disabled = true;
+        }
+    }
+
+    async handleAudioCommand(blob) {
+        if (this.isProcessing) return;
+
+        this.isProcessing = true;
+        this.sendBtn.disabled = true;
+        this.micBtn.disabled = true;
+        this.sendBtn.innerHTML = '<div class="loading-spinner"></div>';
+
+        const existingCursor = this.terminal.querySelector('.cursor-line');
+        if(existingCursor) existingCursor.remove();
+
+        try {
+            const response = await this.sendAudioCommand(blob);
+            this.addToTerminal('user', response.transcript || '(no speech recognized)');
+            if (response.timings) {
+                console.log('Audio command timings (ms):', response.timings);
+            }
+            this.showResponse(response);
+        } catch (error) {
+            console.error('Audio command error:', error);
+            this.addToTerminal('error', `Voice command failed: ${error.message}.`);
+        } finally {
+            if (!this.commandInput.disabled) {
+               this.resetInput();
+            }
+        }
+    }
+
+    async handleCommand() {
+        const command = this.commandInput.value.trim();
+        if (!command || this.isProcessing) return;
+
+        this.isProcessing = true;
+        this.sendBtn.disabled = true;
+        this.micBtn.disabled = true;
+        this.sendBtn.innerHTML = '<div class="loading-spinner"></div>';
+
+        this.addToTerminal('user', command);
+        this.commandInput.value = '';
+
+        // Clear the "Ready for input" cursor if it exists
+        const existingCursor = this.terminal.querySelector('.cursor-line');
+        if(existingCursor) existingCursor.remove();
+
+        try {
+            if (command.toLowerCase() === 'clear') {
+                setTimeout(() => {
+                    this.terminal.innerHTML = '';
+                    this.addToTerminal('system', 'Terminal cleared.');
+                    this.resetInput();
+                }, 300);
+                return;
+            }
+
+            const response = await this.sendCommand(command);
+            this.showResponse(response);
+
+        } catch (error) {
+            console.error('Command error:', error);
+            const errorMsg = `Error connecting to ECHO Core: ${error.message}.`;
+            this.addToTerminal('error', errorMsg);
+            this.speak("I seem to be having trouble connecting to my core functions.");
+        } finally {
+            if (!this.commandInput.disabled) {
+               this.resetInput();
+            }
+        }
+    }
+
+    resetInput() {
+        this.isProcessing = false;
+        this.sendBtn.disabled = false;
+        this.sendBtn.innerHTML = '→';
+
+        if (this.voiceStatus.textContent === 'ENABLED') {
+            this.micBtn.disabled = false;
+        }
+
+        this.commandInput.focus();
+    }
+
+    startupSequence() {
+        const messages = [
+            { delay: 1000, type: 'system', text: 'Neural pathways establishing...' },
+            { delay: 2000, type: 'system', text: 'Holographic interface initializing...' },
+            { delay: 3000, type: 'system', text: 'Voice synthesis calibrated.' },
+            { delay: 4000, type: 'ai', text: 'Enhanced Cognitive Holographic Operator online.', speak: true },
+            { delay: 5500, type: 'ai', text: 'Ready for advanced cognitive processing. How may I assist you?', speak: true },
+        ];
+
+        messages.forEach(msg => {
+            setTimeout(() => {
+                this.addToTerminal(msg.type, msg.text);
+                if (msg.speak) {
+                    this.speak(msg.text);
+                }
+            }, msg.delay);
+        });
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    new ECHOInterface();
+});
@@ -9,6 +9,7 @@ import random
 import json
 from pathlib import Path
 import base64
+import persistence
 
 # Optional imports with error handling
 try:
@@ -364,8 +365,7 @@ def load_contacts():
 
 def save_contacts(contacts):
     try:
-        with open(CONTACTS_FILE, 'w') as f:
-            json.dump(contacts, f, indent=2)
+        persistence.write_json(CONTACTS_FILE, contacts)
     except Exception as e:
         print(f"Error saving contacts: {e}")
 
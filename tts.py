@@ -0,0 +1,222 @@
+"""
+ECHO AI - Text-to-Speech Worker
+pyttsx3 engines are not thread safe, so every use of the engine goes through a
+single worker thread fed by a job queue. The worker renders audio files for the
+server (cached on disk keyed by text, voice and rate, so fixed phrases are
+synthesized once) and speaks aloud for standalone mode, where queued speech can
+be interrupted as soon as the user starts talking (barge-in).
+
+Server renders are bounded: text longer than MAX_TEXT_CHARS is refused, at
+most MAX_QUEUED_JOBS jobs wait for the worker (a render request beyond that
+gets TTSBusy instead of queueing), and the disk cache is trimmed back under
+its size limit, least recently used files first.
+
+Tuning: ECHO_TTS_CACHE_DIR (default 'tts_cache'), ECHO_TTS_MAX_CHARS (default 1000),
+ECHO_TTS_QUEUE (default 32), ECHO_TTS_CACHE_MB (default 200).
+"""
+
+import hashlib
+import os
+import platform
+import queue
+import threading
+from concurrent.futures import Future
+
+try:
+    import pyttsx3
+    TTS_AVAILABLE = True
+except ImportError:
+    TTS_AVAILABLE = False
+
+TTS_CACHE_DIR = os.getenv("ECHO_TTS_CACHE_DIR", "tts_cache")
+MAX_TEXT_CHARS = int(os.getenv("ECHO_TTS_MAX_CHARS", "1000"))
+MAX_QUEUED_JOBS = int(os.getenv("ECHO_TTS_QUEUE", "32"))
+MAX_CACHE_BYTES = int(float(os.getenv("ECHO_TTS_CACHE_MB", "200")) * 1024 * 1024)
+
+# The macOS driver (NSSpeechSynthesizer) writes AIFF, SAPI5 and espeak write WAV
+AUDIO_EXTENSION = ".aiff" if platform.system().lower() == "darwin" else ".wav"
+AUDIO_MIMETYPE = "audio/aiff" if AUDIO_EXTENSION == ".aiff" else "audio/wav"
+
+class TTSBusy(Exception):
+    """The worker's job queue is full"""
+
+class TTSWorker:
+    """Owns the pyttsx3 engine and runs every synthesis job on one dedicated thread"""
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, rate=None, max_queued=MAX_QUEUED_JOBS, max_cache_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.rate = rate
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_bytes = None     # size of the cache directory, counted on first use
+        self.jobs = queue.Queue(maxsize=max_queued)
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.engine = None
+        self.thread = None
+        # Bumped by interrupt() so utterances queued before it are dropped
+        self.speech_generation = 0
+        self.stop_speaking = threading.Event()
+        self.speaking = False
+
+    # ---------- worker thread ----------
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        try:
+            self.engine = pyttsx3.init()
+            if self.rate:
+                self.engine.setProperty('rate', self.rate)
+        except Exception as e:
+            print(f"TTS worker could not start: {e}")
+            self.engine = None
+        while True:
+            job, args, future = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self.engine is None:
+                    raise RuntimeError("Text-to-speech engine not available")
+                future.set_result(job(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, job, *args, block=True):
+        """Queue a callable that needs the engine, returns a Future; raises TTSBusy if not block and full"""
+        self.start()
+        future = Future()
+        try:
+            self.jobs.put((job, args, future), block=block)
+        except queue.Full:
+            raise TTSBusy("Text-to-speech is busy, please try again shortly")
+        return future
+
+    # ---------- rendering ----------
+
+    def cache_path(self, text, voice=None):
+        key = hashlib.sha256(f"{voice or 'default'}|{self.rate or 'default'}|{text}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, key + AUDIO_EXTENSION)
+
+    def cached(self, text, voice=None):
+        """Path of an already rendered phrase, or None"""
+        path = self.cache_path(text, voice)
+        return path if os.path.exists(path) else None
+
+    def _render(self, text, voice, path):
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.cache_dir, exist_ok=True)
+        default_voice = self.engine.getProperty('voice')
+        tmp_path = f"{path}.{threading.get_ident()}.tmp{AUDIO_EXTENSION}"
+        try:
+            if voice:
+                self.engine.setProperty('voice', voice)
+            self.engine.save_to_file(text, tmp_path)
+            self.engine.runAndWait()
+            os.replace(tmp_path, path)
+        finally:
+            if voice:
+                self.engine.setProperty('voice', default_voice)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._trim_cache(os.path.getsize(path))
+        return path
+
+    def _trim_cache(self, added):
+        """Worker thread: delete least recently used files while the cache is over its limit"""
+        if self.cache_bytes is None:
+            self.cache_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.is_file())
+        else:
+            self.cache_bytes += added
+        if self.cache_bytes <= self.max_cache_bytes:
+            return
+        files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                       for entry in os.scandir(self.cache_dir) if entry.is_file())
+        self.cache_bytes = sum(size for _, size, _ in files)
+        # The newest file is the one just rendered, it always stays
+        for _, size, path in files[:-1]:
+            if self.cache_bytes <= self.max_cache_bytes:
+                break
+            try:
+                os.remove(path)
+                self.cache_bytes -= size
+            except OSError:
+                pass
+
+    def render_async(self, text, voice=None, block=True):
+        """Future resolving to the audio file for text, shared by concurrent callers"""
+        path = self.cache_path(text, voice)
+        if os.path.exists(path):
+            try:
+                os.utime(path)     # recently used, kept longest by the cache trim
+            except OSError:
+                pass
+            future = Future()
+            future.set_result(path)
+            return future
+        with self.lock:
+            future = self.pending.get(path)
+            if future is None:
+                future = self.submit(self._render, text, voice, path, block=block)
+                self.pending[path] = future
+                future.add_done_callback(lambda _: self._forget(path))
+        return future
+
+    def _forget(self, path):
+        with self.lock:
+            self.pending.pop(path, None)
+
+    def render(self, text, voice=None, timeout=30, block=True):
+        """Render text to an audio file (or return the cached one) and return its path"""
+        return self.render_async(text, voice, block).result(timeout=timeout)
+
+    def prewarm(self, phrases, voice=None):
+        """Render phrases in the background so the first request for them is a cache hit"""
+        return [self.render_async(phrase, voice) for phrase in phrases if phrase]
+
+    def voices(self):
+        """Installed voices as [{'id', 'name'}]"""
+        def list_voices():
+            return [{"id": v.id, "name": v.name} for v in self.engine.getProperty('voices')]
+        return self.submit(list_voices).result(timeout=10)
+
+    # ---------- speaking ----------
+
+    def _speak(self, text, generation):
+        if generation != self.speech_generation:
+            return False
+        self.stop_speaking.clear()
+        self.speaking = True
+        try:
+            # External loop instead of runAndWait() so playback can be stopped mid-sentence
+            self.engine.say(text)
+            self.engine.startLoop(False)
+            try:
+                while self.engine.isBusy():
+                    if self.stop_speaking.wait(0.02):
+                        self.engine.stop()
+                        return False
+                    self.engine.iterate()
+            finally:
+                self.engine.endLoop()
+            return True
+        finally:
+            self.speaking = False
+
+    def speak(self, text):
+        """Queue text to be spoken aloud, returns a Future that is True if it finished uninterrupted"""
+        return self.submit(self._speak, text, self.speech_generation)
+
+    def interrupt(self):
+        """Barge-in: stop the current utterance and drop everything queued behind it"""
+        self.speech_generation += 1
+        self.stop_speaking.set()
+
+    def is_busy(self):
+        return self.speaking or not self.jobs.empty()
+
+tts_worker = TTSWorker() if TTS_AVAILABLE else None
@@ -0,0 +1,188 @@
+"""
+ECHO AI - Unit Conversion Registry
+Units are nodes in a graph whose edges are the everyday definitions (a mile
+is 5280 feet, a foot is 12 inches, an inch is 2.54 cm...). At import every
+unit is resolved to its dimension's base unit by walking the graph, and the
+factor for every pair in a dimension is stored in one table, so a conversion
+is a single dict lookup. Conversions are affine (scale and offset) so
+temperatures use the same table.
+
+'pound' is both a mass and a currency: a command only counts as a unit
+conversion when both sides are known units, so 'convert 5 pounds to kg' is
+mass and 'convert 5 pounds to dollars' is left to the currency converter.
+"""
+
+import re
+from collections import deque, namedtuple
+
+Unit = namedtuple("Unit", ["name", "dimension", "singular", "plural", "symbol"])
+
+class ConversionError(ValueError):
+    """Units that cannot be converted into each other"""
+
+# name: (dimension, singular, plural, symbol, extra aliases)
+UNIT_DEFINITIONS = {
+    # length
+    "m": ("length", "meter", "meters", "m", ["metre", "metres"]),
+    "km": ("length", "kilometer", "kilometers", "km", ["kilometre", "kilometres", "kms"]),
+    "cm": ("length", "centimeter", "centimeters", "cm", ["centimetre", "centimetres"]),
+    "mm": ("length", "millimeter", "millimeters", "mm", ["millimetre", "millimetres"]),
+    "mi": ("length", "mile", "miles", "mi", []),
+    "yd": ("length", "yard", "yards", "yd", []),
+    "ft": ("length", "foot", "feet", "ft", ["foots"]),
+    "in": ("length", "inch", "inches", "in", []),
+    "nmi": ("length", "nautical mile", "nautical miles", "nmi", []),
+    # mass
+    "kg": ("mass", "kilogram", "kilograms", "kg", ["kilo", "kilos", "kgs"]),
+    "g": ("mass", "gram", "grams", "g", ["gm", "gms"]),
+    "mg": ("mass", "milligram", "milligrams", "mg", []),
+    "t": ("mass", "tonne", "tonnes", "t", ["metric ton", "metric tons"]),
+    "lb": ("mass", "pound", "pounds", "lb", ["lbs"]),
+    "oz": ("mass", "ounce", "ounces", "oz", []),
+    "st": ("mass", "stone", "stones", "st", []),
+    # volume
+    "l": ("volume", "liter", "liters", "L", ["litre", "litres", "ltr"]),
+    "ml": ("volume", "milliliter", "milliliters", "mL", ["millilitre", "millilitres"]),
+    "m3": ("volume", "cubic meter", "cubic meters", "m³", ["cubic metre", "cubic metres"]),
+    "gal": ("volume", "gallon", "gallons", "gal", []),
+    "qt": ("volume", "quart", "quarts", "qt", []),
+    "pt": ("volume", "pint", "pints", "pt", []),
+    "cup": ("volume", "cup", "cups", "cup", []),
+    "floz": ("volume", "fluid ounce", "fluid ounces", "fl oz", ["fl oz"]),
+    "tbsp": ("volume", "tablespoon", "tablespoons", "tbsp", []),
+    "tsp": ("volume", "teaspoon", "teaspoons", "tsp", []),
+    # time
+    "ms": ("time", "millisecond", "milliseconds", "ms", []),
+    "s": ("time", "second", "seconds", "s", ["sec", "secs"]),
+    "min": ("time", "minute", "minutes", "min", ["mins"]),
+    "h": ("time", "hour", "hours", "h", ["hr", "hrs"]),
+    "day": ("time", "day", "days", "d", []),
+    "week": ("time", "week", "weeks", "wk", []),
+    "month": ("time", "month", "months", "mo", []),
+    "year": ("time", "year", "years", "yr", ["yrs"]),
+    # speed
+    "m/s": ("speed", "meter per second", "meters per second", "m/s", ["metres per second", "mps"]),
+    "km/h": ("speed", "kilometer per hour", "kilometers per hour", "km/h", ["kmh", "kph", "kmph", "kilometres per hour"]),
+    "mph": ("speed", "mile per hour", "miles per hour", "mph", []),
+    "kn": ("speed", "knot", "knots", "kn", []),
+    "ft/s": ("speed", "foot per second", "feet per second", "ft/s", ["fps"]),
+    # data size
+    "bit": ("data", "bit", "bits", "bit", []),
+    "B": ("data", "byte", "bytes", "B", []),
+    "KB": ("data", "kilobyte", "kilobytes", "KB", []),
+    "MB": ("data", "megabyte", "megabytes", "MB", []),
+    "GB": ("data", "gigabyte", "gigabytes", "GB", []),
+    "TB": ("data", "terabyte", "terabytes", "TB", []),
+    "KiB": ("data", "kibibyte", "kibibytes", "KiB", []),
+    "MiB": ("data", "mebibyte", "mebibytes", "MiB", []),
+    "GiB": ("data", "gibibyte", "gibibytes", "GiB", []),
+    # temperature
+    "C": ("temperature", "degree Celsius", "degrees Celsius", "°C", ["celsius", "centigrade", "°c"]),
+    "F": ("temperature", "degree Fahrenheit", "degrees Fahrenheit", "°F", ["fahrenheit", "°f"]),
+    "K": ("temperature", "kelvin", "kelvin", "K", ["kelvins"]),
+}
+
+# Graph edges: value in `to` = value in `from` * scale + offset
+UNIT_EDGES = [
+    ("km", "m", 1000), ("cm", "m", 0.01), ("mm", "cm", 0.1),
+    ("in", "cm", 2.54), ("ft", "in", 12), ("yd", "ft", 3), ("mi", "ft", 5280), ("nmi", "m", 1852),
+    ("g", "kg", 0.001), ("mg", "g", 0.001), ("t", "kg", 1000),
+    ("lb", "kg", 0.45359237), ("oz", "lb", 1 / 16), ("st", "lb", 14),
+    ("ml", "l", 0.001), ("m3", "l", 1000),
+    ("gal", "l", 3.785411784), ("qt", "gal", 0.25), ("pt", "qt", 0.5), ("cup", "pt", 0.5),
+    ("floz", "cup", 0.125), ("tbsp", "floz", 0.5), ("tsp", "tbsp", 1 / 3),
+    ("ms", "s", 0.001), ("min", "s", 60), ("h", "min", 60), ("day", "h", 24), ("week", "day", 7),
+    ("year", "day", 365.25), ("month", "year", 1 / 12),
+    ("km/h", "m/s", 1 / 3.6), ("mph", "m/s", 0.44704), ("kn", "m/s", 1852 / 3600), ("ft/s", "m/s", 0.3048),
+    ("bit", "B", 0.125), ("KB", "B", 1000), ("MB", "KB", 1000), ("GB", "MB", 1000), ("TB", "GB", 1000),
+    ("KiB", "B", 1024), ("MiB", "KiB", 1024), ("GiB", "MiB", 1024),
+    ("F", "C", 5 / 9, -160 / 9), ("C", "K", 1, 273.15),
+]
+
+def _build_registry():
+    units = {}
+    aliases = {}
+    for name, (dimension, singular, plural, symbol, extra) in UNIT_DEFINITIONS.items():
+        units[name] = Unit(name, dimension, singular, plural, symbol)
+        for alias in [name, symbol, singular, plural] + extra:
+            # Lower-cased, so 'mb' and 'Mb' both read as megabytes
+            aliases.setdefault(alias.lower(), name)
+    return units, aliases
+
+def _build_factor_table(units):
+    """Walk the edge graph once per dimension and store every pair's (scale, offset)"""
+    graph = {name: [] for name in units}
+    for edge in UNIT_EDGES:
+        source, target, scale = edge[:3]
+        offset = edge[3] if len(edge) > 3 else 0.0
+        graph[source].append((target, scale, offset))
+        # Inverse edge: source = (target - offset) / scale
+        graph[target].append((source, 1 / scale, -offset / scale))
+
+    # Affine map from every unit to the first unit reached in its dimension
+    to_base = {}
+    for start in units:
+        if start in to_base:
+            continue
+        to_base[start] = (1.0, 0.0)
+        pending = deque([start])
+        while pending:
+            unit = pending.popleft()
+            # value_in_start = value_in_unit * scale + offset
+            scale, offset = to_base[unit]
+            for neighbour, edge_scale, edge_offset in graph[unit]:
+                if neighbour in to_base:
+                    continue
+                # value_in_unit = value_in_neighbour / edge_scale - edge_offset / edge_scale
+                to_base[neighbour] = (scale / edge_scale, offset - scale * edge_offset / edge_scale)
+                pending.append(neighbour)
+
+    table = {}
+    for a, unit_a in units.items():
+        for b, unit_b in units.items():
+            if unit_a.dimension != unit_b.dimension:
+                continue
+            scale_a, offset_a = to_base[a]
+            scale_b, offset_b = to_base[b]
+            table[(a, b)] = (scale_a / scale_b, (offset_a - offset_b) / scale_b)
+    return table
+
+UNITS, ALIASES = _build_registry()
+CONVERSIONS = _build_factor_table(UNITS)
+
+CONVERSION_PATTERN = re.compile(
+    r"(-?\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:degrees?\s+)?([a-z°/³ ]+?)\s+(?:to|in|into)\s+(?:degrees?\s+)?([a-z°/³ ]+?)\s*[?.!]?$"
+)
+
+def lookup_unit(text):
+    """Canonical unit name for a spelling, or None"""
+    return ALIASES.get(text.strip().lower())
+
+def parse_conversion(text):
+    """(amount, from_unit, to_unit) when both sides are known units, otherwise None"""
+    match = CONVERSION_PATTERN.search(text.lower())
+    if not match:
+        return None
+    amount, source, target = match.groups()
+    source, target = lookup_unit(source), lookup_unit(target)
+    if source is None or target is None:
+        return None
+    return float(amount.replace(",", "")), source, target
+
+def convert(amount, source, target):
+    """amount in source units expressed in target units (one table lookup)"""
+    factor = CONVERSIONS.get((source, target))
+    if factor is None:
+        raise ConversionError(
+            f"Can't convert {UNITS[source].plural} to {UNITS[target].plural}: "
+            f"{UNITS[source].dimension} and {UNITS[target].dimension} are different kinds of unit."
+        )
+    scale, offset = factor
+    return amount * scale + offset
+
+def format_quantity(amount, unit):
+    unit = UNITS[unit]
+    text = f"{amount:,.6g}" if abs(amount) < 1e15 else f"{amount:.4e}"
+    if unit.dimension == "temperature" and unit.name != "K":
+        return f"{text}{unit.symbol}"
+    return f"{text} {unit.singular if amount == 1 else unit.plural}"
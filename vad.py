@@ -0,0 +1,128 @@
+"""
+ECHO AI - Voice Activity Detection
+Frame-level VAD in NumPy that gates what reaches the speech recognizer. Each
+20ms frame is classified by short-time energy against an adaptive noise floor
+plus zero-crossing rate. Onset requires a few consecutive speech frames, so
+clicks and bumps are ignored, and a hangover keeps short pauses inside a phrase.
+"""
+
+import time
+
+import numpy as np
+
+class VADStats:
+    """Counters reported when a listening session ends"""
+
+    def __init__(self):
+        self.frames = 0
+        self.speech_frames = 0
+        self.segments = 0
+        self.rejected_segments = 0
+        self.cpu_seconds = 0.0
+        self.frame_seconds = 0.0
+
+    @property
+    def audio_seconds(self):
+        return self.frames * self.frame_seconds
+
+    def as_dict(self):
+        audio = self.audio_seconds
+        return {
+            "audio_seconds": round(audio, 2),
+            "speech_seconds": round(self.speech_frames * self.frame_seconds, 2),
+            "segments_sent": self.segments,
+            "recognition_calls_avoided": self.rejected_segments,
+            "vad_cpu_seconds": round(self.cpu_seconds, 4),
+            "vad_cpu_percent": round(100 * self.cpu_seconds / audio, 3) if audio else 0.0,
+        }
+
+    def report(self):
+        d = self.as_dict()
+        return (
+            f"VAD: {d['audio_seconds']}s audio, {d['speech_seconds']}s speech, "
+            f"{d['segments_sent']} segments sent, {d['recognition_calls_avoided']} recognition calls avoided, "
+            f"CPU {d['vad_cpu_seconds']}s ({d['vad_cpu_percent']}% of real time)"
+        )
+
+class EnergyVAD:
+    """
+    Streaming VAD over 16-bit mono PCM. feed() accepts chunks of any size and
+    returns the per-frame speech decisions after smoothing.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, energy_ratio=4.0, zcr_max=0.45,
+                 onset_frames=3, hangover_frames=10, noise_adapt=0.05, min_noise=100.0):
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.energy_ratio = energy_ratio    # speech energy vs noise floor
+        self.zcr_max = zcr_max              # above this a frame is hiss, not voice
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.noise_adapt = noise_adapt
+        self.min_noise = min_noise          # mean-square floor so digital silence is not 'noise'
+        self.noise_floor = None
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.run = 0
+        self.hangover = 0
+        self.in_speech = False
+        self.stats = VADStats()
+        self.stats.frame_seconds = frame_ms / 1000
+
+    def calibrate(self, pcm):
+        """Seed the noise floor from a stretch of background audio"""
+        energy, _ = self.frame_features(np.frombuffer(pcm, dtype=np.int16))
+        if energy.size:
+            self.noise_floor = max(float(np.median(energy)), self.min_noise)
+
+    def frame_features(self, samples):
+        """Mean-square energy and zero-crossing rate for every whole frame in samples"""
+        count = samples.size // self.frame_size
+        frames = samples[:count * self.frame_size].reshape(count, self.frame_size).astype(np.float32)
+        energy = np.mean(frames * frames, axis=1)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_size - 1)
+        return energy, zcr
+
+    def feed(self, pcm, threshold_factor=1.0):
+        """Classify a chunk, returns a list of smoothed per-frame booleans"""
+        start = time.thread_time()
+        samples = np.concatenate((self.remainder, np.frombuffer(pcm, dtype=np.int16)))
+        whole = samples.size - samples.size % self.frame_size
+        self.remainder = samples[whole:]
+        energy, zcr = self.frame_features(samples[:whole])
+
+        if self.noise_floor is None and energy.size:
+            self.noise_floor = max(float(np.median(energy)), self.min_noise)
+        floor = self.noise_floor or self.min_noise
+        raw = (energy > floor * self.energy_ratio * threshold_factor) & (zcr < self.zcr_max)
+
+        decisions = []
+        for is_speech, frame_energy in zip(raw.tolist(), energy.tolist()):
+            if is_speech:
+                self.run += 1
+                if self.run >= self.onset_frames:
+                    self.in_speech = True
+                    self.hangover = self.hangover_frames
+            else:
+                if 0 < self.run < self.onset_frames and not self.in_speech:
+                    # A burst too short to be speech (click, bump): no recognition call
+                    self.stats.rejected_segments += 1
+                self.run = 0
+                if self.hangover > 0:
+                    self.hangover -= 1
+                else:
+                    self.in_speech = False
+                if not self.in_speech:
+                    # Only track the floor on frames that are clearly background
+                    floor += self.noise_adapt * (frame_energy - floor)
+                    floor = max(floor, self.min_noise)
+            decisions.append(self.in_speech)
+
+        self.noise_floor = floor
+        self.stats.frames += len(decisions)
+        self.stats.speech_frames += sum(decisions)
+        self.stats.cpu_seconds += time.thread_time() - start
+        return decisions
+
+    def is_speech(self, pcm, threshold_factor=1.0):
+        """True if any frame in the chunk is speech after smoothing"""
+        return any(self.feed(pcm, threshold_factor))
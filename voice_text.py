@@ -0,0 +1,294 @@
+"""
+ECHO AI - Voice Text Normalizer
+Turns LLM markdown into speech-friendly text in a single pass over the input.
+Every rule is one branch of a precompiled alternation and none of the branches
+can scan past the next delimiter or line break, so the cost stays linear in the
+input size. Numbers, currency amounts, units, ordinals, version numbers and
+URLs are expanded into words on the way, runs of spaces left behind are
+collapsed in one last pass, and the output can optionally be wrapped as SSML.
+"""
+
+import re
+
+# ==================== NUMBER WORDS ====================
+
+ONES = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+    "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+    "seventeen", "eighteen", "nineteen",
+]
+TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+SCALES = [(10**12, "trillion"), (10**9, "billion"), (10**6, "million"), (1000, "thousand")]
+
+ORDINAL_IRREGULAR = {
+    "one": "first", "two": "second", "three": "third", "five": "fifth",
+    "eight": "eighth", "nine": "ninth", "twelve": "twelfth",
+}
+
+# Numbers longer than this are read digit by digit (phone numbers, IDs)
+MAX_SPOKEN_DIGITS = 15
+
+def _below_thousand(n):
+    words = []
+    if n >= 100:
+        words.append(f"{ONES[n // 100]} hundred")
+        n %= 100
+    if n >= 20:
+        words.append(TENS[n // 10] + (f" {ONES[n % 10]}" if n % 10 else ""))
+    elif n or not words:
+        words.append(ONES[n])
+    return " ".join(words)
+
+def number_to_words(n):
+    """Spell out an integer, e.g. 1234 -> 'one thousand two hundred thirty four'"""
+    if n < 0:
+        return "minus " + number_to_words(-n)
+    if n < 1000:
+        return _below_thousand(n)
+    words = []
+    for value, name in SCALES:
+        if n >= value:
+            words.append(f"{_below_thousand(n // value)} {name}")
+            n %= value
+    if n:
+        words.append(_below_thousand(n))
+    return " ".join(words)
+
+def year_to_words(n):
+    """Read a four digit year the way people say it, e.g. 1990 -> 'nineteen ninety'"""
+    if 2000 <= n <= 2009 or n % 1000 == 0:
+        return number_to_words(n)
+    high, low = divmod(n, 100)
+    if low == 0:
+        return f"{number_to_words(high)} hundred"
+    if low < 10:
+        return f"{number_to_words(high)} oh {ONES[low]}"
+    return f"{number_to_words(high)} {number_to_words(low)}"
+
+def decade_to_words(n):
+    """1990 -> 'nineteen nineties', 1900 -> 'nineteen hundreds'"""
+    words = year_to_words(n)
+    return words[:-1] + "ies" if words.endswith("y") else words + "s"
+
+def ordinal_to_words(n):
+    words = number_to_words(n).split(" ")
+    last = words[-1]
+    if last in ORDINAL_IRREGULAR:
+        words[-1] = ORDINAL_IRREGULAR[last]
+    elif last.endswith("y"):
+        words[-1] = last[:-1] + "ieth"
+    else:
+        words[-1] = last + "th"
+    return " ".join(words)
+
+def decimal_to_words(literal):
+    """Spell out a numeric literal such as '1,234.56' or '-0.5'"""
+    literal = literal.replace(",", "")
+    negative = literal.startswith("-")
+    literal = literal.lstrip("-")
+    whole, _, fraction = literal.partition(".")
+    if len(whole) > MAX_SPOKEN_DIGITS:
+        spoken = " ".join(ONES[int(d)] for d in whole)
+    else:
+        spoken = number_to_words(int(whole or "0"))
+    if fraction:
+        spoken += " point " + " ".join(ONES[int(d)] for d in fraction)
+    return ("minus " if negative else "") + spoken
+
+# ==================== UNITS AND CURRENCY ====================
+
+# symbol -> (singular, plural, minor singular, minor plural)
+CURRENCY_SYMBOLS = {
+    "$": ("dollar", "dollars", "cent", "cents"),
+    "€": ("euro", "euros", "cent", "cents"),
+    "£": ("pound", "pounds", "penny", "pence"),
+    "₹": ("rupee", "rupees", "paisa", "paise"),
+    "¥": ("yen", "yen", None, None),
+}
+
+AMOUNT_SCALES = {
+    "k": "thousand", "K": "thousand", "thousand": "thousand",
+    "M": "million", "million": "million", "B": "billion", "bn": "billion",
+    "billion": "billion", "trillion": "trillion",
+}
+
+# written unit -> (singular, plural)
+UNITS = {
+    "km": ("kilometer", "kilometers"), "m": ("meter", "meters"),
+    "cm": ("centimeter", "centimeters"), "mm": ("millimeter", "millimeters"),
+    "mi": ("mile", "miles"), "ft": ("foot", "feet"),
+    "kg": ("kilogram", "kilograms"), "g": ("gram", "grams"), "mg": ("milligram", "milligrams"),
+    "lb": ("pound", "pounds"), "lbs": ("pound", "pounds"),
+    "l": ("liter", "liters"), "ml": ("milliliter", "milliliters"),
+    "mph": ("mile per hour", "miles per hour"), "km/h": ("kilometer per hour", "kilometers per hour"),
+    "kmh": ("kilometer per hour", "kilometers per hour"), "m/s": ("meter per second", "meters per second"),
+    "hPa": ("hectopascal", "hectopascals"), "kWh": ("kilowatt hour", "kilowatt hours"),
+    "KB": ("kilobyte", "kilobytes"), "MB": ("megabyte", "megabytes"),
+    "GB": ("gigabyte", "gigabytes"), "TB": ("terabyte", "terabytes"),
+    "ms": ("millisecond", "milliseconds"), "sec": ("second", "seconds"), "secs": ("second", "seconds"),
+    "min": ("minute", "minutes"), "mins": ("minute", "minutes"),
+    "hr": ("hour", "hours"), "hrs": ("hour", "hours"),
+    "%": ("percent", "percent"),
+    "USD": ("US dollar", "US dollars"), "INR": ("rupee", "rupees"), "EUR": ("euro", "euros"),
+    "GBP": ("pound", "pounds"), "JPY": ("yen", "yen"),
+}
+
+TEMPERATURE_UNITS = {"C": "Celsius", "F": "Fahrenheit"}
+
+def _with_unit(literal, singular, plural):
+    value = literal.replace(",", "")
+    return f"{decimal_to_words(literal)} {singular if value in ('1', '-1') else plural}"
+
+# ==================== MASTER PATTERN ====================
+
+_NUMBER = r"(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?"
+_UNIT_ALTERNATION = "|".join(re.escape(u) for u in sorted(UNITS, key=len, reverse=True))
+_EMOJI_RANGES = (
+    "\U0001F000-\U0001FAFF\U00002600-\U000027BF\U00002B00-\U00002BFF"
+    "\U0001F1E6-\U0001F1FF\uFE0E\uFE0F\u200D\u20E3"
+)
+_EMOJI = f"[{_EMOJI_RANGES}]"
+
+# Every branch below starts with one of these characters. Checking them first
+# lets the engine skip ordinary text without trying each branch in turn, so no
+# branch starts with a space: line-start rules match from the newline before the
+# line (the text is given a leading one), and spaces left next to removed markup
+# are collapsed afterwards by SPACES_PATTERN.
+_GATE = rf"(?=[\n`#\-*•+\d\[_$€£₹¥|&<>{_EMOJI_RANGES}]|https?:)"
+
+VOICE_PATTERN = re.compile(
+    _GATE + "(?:" + "|".join([
+        r"(?P<fence>\n[ \t]*```[^\n]*$)",
+        r"(?P<header>\n[ \t]*#{1,6}[ \t]+)",
+        r"(?P<rule>\n[ \t]*(?:-{3,}|\*{3,}|_{3,})[ \t]*$)",
+        r"(?P<bullet>\n[ \t]*[-*•+][ \t]+)",
+        r"(?P<numbered>\n[ \t]*\d+[.)][ \t]+)",
+        r"(?P<link>\[(?P<link_text>[^\]\n]+)\]\([^)\s]+\))",
+        r"(?P<url>https?://(?:www\.)?(?P<host>[^/\s<>\"]+)(?:[^\s<>\"]*[^\s<>\".,;:!?)\]])?)",
+        r"(?P<bold>\*\*(?P<bold_text>[^*\n]+)\*\*|__(?P<bold_alt>[^_\n]+)__)",
+        r"(?P<italic>\*(?P<italic_text>[^*\n]+)\*)",
+        r"(?P<code>`(?P<code_text>[^`\n]+)`)",
+        rf"(?P<money>(?P<symbol>[$€£₹¥])[ ]?(?P<amount>{_NUMBER})"
+        r"(?:[ ]?(?P<scale>k|K|M|B|bn|thousand|million|billion|trillion)\b)?)",
+        rf"(?P<temp>(?<![\w.])(?P<temp_value>-?{_NUMBER})[ ]?°[ ]?(?P<temp_unit>[CF])\b)",
+        r"(?P<clock>\d+(?:[:/]\d+)+)",
+        r"(?P<version>(?<![\w.])\d+(?:\.\d+){2,})",
+        r"(?P<ordinal>(?<![\w.])(?P<ordinal_value>\d+)(?:st|nd|rd|th)\b)",
+        r"(?P<decade>(?<![\w.])(?P<decade_value>1[1-9]\d0|20\d0)'?s\b)",
+        rf"(?P<number>(?<![\w.])(?P<number_value>-?{_NUMBER})"
+        rf"(?:[ ]?(?P<unit>{_UNIT_ALTERNATION})(?![A-Za-z/]))?)",
+        r"(?P<dashes>-{3,})",
+        r"(?P<pipe>\|[ \t]*)",
+        rf"(?P<emoji>{_EMOJI}+[ \t]*)",
+        r"(?P<escape>[&<>])",
+        # All but the last newline of a blank run, which may still start a list item
+        r"(?P<breaks>\n+(?=\n))",
+    ]) + ")",
+    re.MULTILINE,
+)
+GATE_PATTERN = re.compile(_GATE)
+SPACES_PATTERN = re.compile(r"[ \t]{2,}")
+
+SSML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+# A four digit number is read as a year ('nineteen ninety') only in a year context:
+# after 'in', 'since', 'by', 'from' and the like, next to a month, or before an era.
+# Anywhere else '1234 students' stays 'one thousand two hundred thirty four'.
+_MONTHS = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+           r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+YEAR_BEFORE = re.compile(
+    r"(?:\b(?:in|since|by|from|until|till|during|year)"
+    rf"|\b{_MONTHS}\.?(?: \d{{1,2}}(?:st|nd|rd|th)?)?,?"
+    rf"|\b\d{{1,2}}(?:st|nd|rd|th)? (?:of )?{_MONTHS},?)[ ]$",
+    re.IGNORECASE,
+)
+YEAR_AFTER = re.compile(r"[ ]?(?:AD|BC|BCE|CE)\b")
+# How far back YEAR_BEFORE looks, enough for 'september 30th, '
+YEAR_CONTEXT_CHARS = 20
+
+def _is_year(match, value):
+    if not 1100 <= value <= 2099:
+        return False
+    text, start, end = match.string, match.start(), match.end()
+    return bool(YEAR_BEFORE.search(text, max(0, start - YEAR_CONTEXT_CHARS), start) or YEAR_AFTER.match(text, end))
+
+def _replace(match, ssml, expand_numbers):
+    kind = match.lastgroup
+    group = match.group
+
+    if kind in ("fence", "header", "rule", "bullet", "numbered"):
+        return "\n"
+    if kind in ("dashes", "emoji"):
+        return ""
+    if kind == "link":
+        return _normalize(group("link_text"), ssml, expand_numbers)
+    if kind == "url":
+        return group("host").replace(".", " dot ")
+    if kind == "bold":
+        inner = _normalize(group("bold_text") or group("bold_alt"), ssml, expand_numbers)
+        return f"<emphasis>{inner}</emphasis>" if ssml else inner
+    if kind == "italic":
+        return _normalize(group("italic_text"), ssml, expand_numbers)
+    if kind == "code":
+        return _normalize(group("code_text"), ssml, expand_numbers)
+    if kind == "pipe":
+        return " "
+    if kind == "escape":
+        return SSML_ESCAPES[match.group()] if ssml else match.group()
+    if kind == "breaks":
+        return '\n<break time="500ms"/>' if ssml else "\n"
+    if not expand_numbers:
+        return match.group()
+
+    if kind == "money":
+        singular, plural, minor, minor_plural = CURRENCY_SYMBOLS[group("symbol")]
+        amount = group("amount").replace(",", "")
+        scale = group("scale")
+        if scale:
+            return f"{decimal_to_words(amount)} {AMOUNT_SCALES[scale]} {plural}"
+        whole, _, fraction = amount.partition(".")
+        spoken = f"{number_to_words(int(whole))} {singular if whole == '1' else plural}"
+        if minor and len(fraction) == 2 and int(fraction):
+            cents = int(fraction)
+            spoken += f" and {number_to_words(cents)} {minor if cents == 1 else minor_plural}"
+        elif fraction and int(fraction):
+            spoken = f"{decimal_to_words(amount)} {plural}"
+        return spoken
+    if kind == "temp":
+        value = group("temp_value")
+        degrees = "degree" if value.replace(",", "") in ("1", "-1") else "degrees"
+        return f"{decimal_to_words(value)} {degrees} {TEMPERATURE_UNITS[group('temp_unit')]}"
+    if kind == "clock":
+        return match.group()
+    if kind == "version":
+        # '3.11.7' -> 'three point eleven point seven', not a decimal with '.7' left over
+        return " point ".join(decimal_to_words(part) for part in match.group().split("."))
+    if kind == "ordinal":
+        return ordinal_to_words(int(group("ordinal_value")))
+    if kind == "decade":
+        return decade_to_words(int(group("decade_value")))
+    if kind == "number":
+        literal = group("number_value")
+        unit = group("unit")
+        if unit:
+            return _with_unit(literal, *UNITS[unit])
+        if len(literal) == 4 and literal.isdigit() and _is_year(match, int(literal)):
+            return year_to_words(int(literal))
+        return decimal_to_words(literal)
+    return match.group()
+
+def _normalize(text, ssml, expand_numbers):
+    if not GATE_PATTERN.search(text):
+        return text  # nothing any rule could match, common for bold and code spans
+    # The leading newline lets the line-start rules match the first line too
+    return VOICE_PATTERN.sub(lambda m: _replace(m, ssml, expand_numbers), "\n" + text)[1:]
+
+def normalize_for_voice(text, ssml=False, expand_numbers=True):
+    """
+    Strip markdown and rewrite text so it reads naturally through TTS.
+    With ssml=True the result is a <speak> document with emphasis and pauses.
+    """
+    if not text:
+        return "<speak></speak>" if ssml else ""
+    spoken = SPACES_PATTERN.sub(" ", _normalize(text, ssml, expand_numbers)).strip()
+    return f"<speak>{spoken}</speak>" if ssml else spoken
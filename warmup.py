@@ -0,0 +1,89 @@
+"""
+ECHO AI - Startup Warm-up
+Primes the cold paths (LLM client, first upstream fetches, joke data, TTS
+engine, speech model) in parallel at boot, so the first users after a
+restart do not pay for them. Each component reports its state:
+
+    warming   still running
+    ready     primed
+    degraded  failed or timed out, requests still work but may be slow
+    skipped   disabled by configuration
+
+The instance counts as ready once nothing is warming; degraded components
+do not hold it back, an upstream outage should not take every instance out
+of the load balancer.
+
+Tuning: ECHO_WARMUP ('all' (default), 'none' or a comma separated list of
+components), ECHO_WARMUP_TIMEOUT seconds per component (default 60).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WARMUP = os.getenv("ECHO_WARMUP", "all")
+WARMUP_TIMEOUT = float(os.getenv("ECHO_WARMUP_TIMEOUT", "60"))
+
+WARMING, READY, DEGRADED, SKIPPED = "warming", "ready", "degraded", "skipped"
+
+def enabled_components(names, setting=WARMUP):
+    setting = setting.strip().lower()
+    if setting in ("", "all"):
+        return set(names)
+    if setting == "none":
+        return set()
+    return {name.strip() for name in setting.split(",")} & set(names)
+
+class Warmup:
+    """Runs tasks ({component: callable}) in parallel; a task fails by raising"""
+
+    def __init__(self, tasks, setting=WARMUP, timeout=WARMUP_TIMEOUT):
+        self.tasks = tasks
+        self.timeout = timeout
+        self.enabled = enabled_components(tasks, setting)
+        self.lock = threading.Lock()
+        self.components = {
+            name: {"state": WARMING if name in self.enabled else SKIPPED, "ms": None, "error": None}
+            for name in tasks
+        }
+        self.started = None
+
+    def start(self):
+        self.started = time.monotonic()
+        if not self.enabled:
+            return
+        pool = ThreadPoolExecutor(max_workers=len(self.enabled), thread_name_prefix="warmup")
+        for name in self.enabled:
+            pool.submit(self._run, name, self.tasks[name])
+        pool.shutdown(wait=False)
+        timer = threading.Timer(self.timeout, self._expire)
+        timer.daemon = True
+        timer.start()
+
+    def _run(self, name, task):
+        start = time.monotonic()
+        try:
+            task()
+            state, error = READY, None
+        except Exception as e:
+            state, error = DEGRADED, str(e) or type(e).__name__
+        with self.lock:
+            # A late finish still counts, the component is warm now
+            self.components[name] = {"state": state, "ms": round((time.monotonic() - start) * 1000, 1), "error": error}
+        if error:
+            print(f"Warm-up of {name} degraded: {error}")
+
+    def _expire(self):
+        with self.lock:
+            for name, component in self.components.items():
+                if component["state"] == WARMING:
+                    component.update(state=DEGRADED, error=f"still warming after {self.timeout:.0f}s")
+
+    def ready(self):
+        with self.lock:
+            return all(component["state"] != WARMING for component in self.components.values())
+
+    def status(self):
+        with self.lock:
+            return {name: dict(component) for name, component in self.components.items()}